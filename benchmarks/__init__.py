@@ -0,0 +1,4 @@
+"""
+Benchmarks for the infoblox package, run with python -m benchmarks.<name>
+
+"""
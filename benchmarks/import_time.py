@@ -0,0 +1,86 @@
+"""
+Import time benchmark for the package and the command line app, using the
+interpreter's ``-X importtime`` report. Each statement runs in a new
+interpreter, and the modules the interpreter imports on its own are left
+out of the results.
+
+    python -m benchmarks.import_time [repeat]
+
+"""
+import re
+import subprocess
+import sys
+
+REPEAT = 5
+
+# The statements run by the benchmark, named after what they measure
+STATEMENTS = [('package', 'import infoblox'),
+              ('record', 'import infoblox.record'),
+              ('session', 'import infoblox.session'),
+              ('cli', "import infoblox.cli; "
+                      "infoblox.cli.build_parser(['10.0.0.2', 'add'])")]
+
+PATTERN = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def imports(statement):
+    """Run the statement in a new interpreter, returning the cumulative
+    import time in microseconds of each top-level import it made, and the
+    names of all of the modules it imported.
+
+    :param str statement: The Python statement to run
+    :rtype: tuple(dict, set)
+
+    """
+    baseline = set(_report('pass'))
+    cumulative, modules = {}, set()
+    for name, (total, depth) in _report(statement).items():
+        if name in baseline:
+            continue
+        modules.add(name)
+        if depth == 0:
+            cumulative[name] = total
+    return cumulative, modules
+
+
+def measure(statement, repeat=REPEAT):
+    """Return the best total import time of the statement in microseconds.
+
+    :param str statement: The Python statement to run
+    :param int repeat: The number of times to run it
+    :rtype: int
+
+    """
+    return min(sum(imports(statement)[0].values()) for _ in range(repeat))
+
+
+def _report(statement):
+    """Return the ``-X importtime`` report for the statement, as the
+    cumulative time and nesting depth of each imported module.
+
+    :rtype: dict
+
+    """
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c',
+                                statement], stderr=subprocess.PIPE)
+    _stdout, stderr = process.communicate()
+    if process.returncode:
+        raise RuntimeError(stderr.decode('utf-8'))
+    report = {}
+    for line in stderr.decode('utf-8').splitlines():
+        match = PATTERN.match(line)
+        if match:
+            report[match.group(4)] = (int(match.group(2)),
+                                      len(match.group(3)) // 2)
+    return report
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else REPEAT
+    for name, statement in STATEMENTS:
+        sys.stdout.write('%-10s %10.1f ms\n' %
+                         (name, measure(statement, repeat) / 1000.0))
+
+
+if __name__ == '__main__':
+    main()
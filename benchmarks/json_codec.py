@@ -0,0 +1,73 @@
+"""
+Benchmark of the JSON libraries supported by :mod:`infoblox.codec`, encoding
+and decoding paged record:host responses like those returned by the WAPI.
+
+    python -m benchmarks.json_codec [hosts] [addresses]
+
+The decode benchmark starts from the UTF-8 bytes of the body, as received.
+The ``json (text)`` row decodes the bytes to text first, as the session did
+before the codec was added.
+
+"""
+import json
+import sys
+import timeit
+
+from benchmarks import suite
+from infoblox import codec
+
+ADDRESSES = 4
+HOSTS = 1000
+REPEAT = 5
+
+
+def payload(hosts=HOSTS, addresses=ADDRESSES):
+    """Return a paged record:host response body.
+
+    :param int hosts: The number of hosts in the page
+    :param int addresses: The number of IPv4 addresses of each host
+    :rtype: dict
+
+    """
+    return {'result': [suite.host_payload(offset, addresses)
+                       for offset in range(hosts)],
+            'next_page_id': '789c5590c14ec3300c86ef7d8a'}
+
+
+def measure(function, repeat=REPEAT):
+    """Return the best time in milliseconds of calling the function.
+
+    :param callable function: The function to time
+    :param int repeat: The number of times to call it
+    :rtype: float
+
+    """
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000.0
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else HOSTS
+    addresses = int(sys.argv[2]) if len(sys.argv) > 2 else ADDRESSES
+    value = payload(hosts, addresses)
+    content = json.dumps(value).encode('utf-8')
+    sys.stdout.write('%i hosts, %i addresses each, %.1f KiB\n' %
+                     (hosts, addresses, len(content) / 1024.0))
+    sys.stdout.write('%-12s %12s %12s\n' % ('library', 'encode ms',
+                                            'decode ms'))
+    sys.stdout.write('%-12s %12.2f %12.2f\n' % (
+        'json (text)',
+        measure(lambda: json.dumps(value).encode('utf-8')),
+        measure(lambda: json.loads(content.decode('utf-8')))))
+    try:
+        for library in codec.available():
+            codec.use(library)
+            assert codec.loads(codec.encode(value)) == value
+            sys.stdout.write('%-12s %12.2f %12.2f\n' % (
+                library, measure(lambda: codec.encode(value)),
+                measure(lambda: codec.loads(content))))
+    finally:
+        codec.use()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Micro-benchmark comparing the per-class field registry used by
+Mapping.keys() with the previous dir()/inspect based scan.
+
+    python -m benchmarks.mapping_keys
+
+"""
+import inspect
+import timeit
+
+from infoblox import record
+
+ITERATIONS = 20000
+
+
+def legacy_keys(obj):
+    """The Mapping.keys() implementation prior to the field registry."""
+    return sorted([k for k in dir(obj) if
+                   k[0:1] != '_' and k != 'keys' and not k.isupper() and
+                   not inspect.ismethod(getattr(obj, k)) and
+                   not (hasattr(obj.__class__, k) and
+                        isinstance(getattr(obj.__class__, k), property)) and
+                   not isinstance(getattr(obj, k), property)])
+
+
+def main():
+    for obj in [record.Host(None),
+                record.HostIPv4._from_values(None, {'ipv4addr': '10.0.0.1'}),
+                record.HostIPv6._from_values(None, {'ipv6addr': '::1'})]:
+        assert legacy_keys(obj) == obj.keys()
+        name = obj.__class__.__name__
+        legacy = min(timeit.repeat(lambda: legacy_keys(obj),
+                                   number=ITERATIONS, repeat=3))
+        current = min(timeit.repeat(obj.keys, number=ITERATIONS, repeat=3))
+        contains = min(timeit.repeat(lambda: 'comment' in obj,
+                                     number=ITERATIONS, repeat=3))
+        print('%-10s legacy keys() %8.2f us  registry keys() %6.2f us  '
+              '(%5.1fx)  __contains__ %5.2f us' %
+              (name, legacy / ITERATIONS * 1e6, current / ITERATIONS * 1e6,
+               legacy / current, contains / ITERATIONS * 1e6))
+
+
+if __name__ == '__main__':
+    main()
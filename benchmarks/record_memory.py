@@ -0,0 +1,79 @@
+"""
+Memory benchmark comparing the regular record classes with the compact,
+slots based ones in infoblox.compact, for an inventory of hosts that each
+have fully populated HostIPv4 addresses.
+
+    python -m benchmarks.record_memory [hosts]
+
+"""
+import gc
+import sys
+import tracemalloc
+
+from infoblox import compact
+from infoblox import record
+
+ADDRESSES = 2
+HOSTS = 20000
+
+
+def payloads(count):
+    """Return WAPI record:host responses with all HostIPv4 fields set.
+
+    :param int count: The number of hosts
+    :rtype: list
+
+    """
+    fields = record.HostIPv4._fields()[0]
+    values = []
+    for offset in range(count):
+        name = 'host%06i.bar.net' % offset
+        addresses = []
+        for index in range(ADDRESSES):
+            address = dict((field, '%s-%i-%i' % (field, offset, index))
+                           for field in fields)
+            address['_ref'] = 'record:host_ipv4addr/ZG5z%i%i:%s' % (
+                offset, index, name)
+            addresses.append(address)
+        values.append({'_ref': 'record:host/ZG5z%i:%s/default' % (offset,
+                                                                   name),
+                       'name': name,
+                       'comment': 'Host %i' % offset,
+                       'ipv4addrs': addresses})
+    return values
+
+
+def measure(cls, values):
+    """Return the bytes allocated building the records from the values,
+    while the records are still referenced.
+
+    :param class cls: The record class
+    :param list values: The WAPI responses
+    :rtype: int
+
+    """
+    gc.collect()
+    tracemalloc.start()
+    records = [cls._from_values(None, value) for value in values]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(records) == len(values)
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else HOSTS
+    values = payloads(count)
+    regular = measure(record.Host, values)
+    small = measure(compact.Host, values)
+    print('%i hosts with %i addresses of %i fields each' %
+          (count, ADDRESSES, len(record.HostIPv4._fields()[0])))
+    print('%-16s %10.1f MiB %8.0f bytes/host' %
+          ('record.Host', regular / 1048576.0, regular / float(count)))
+    print('%-16s %10.1f MiB %8.0f bytes/host  (%.1fx smaller)' %
+          ('compact.Host', small / 1048576.0, small / float(count),
+           regular / float(small)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark connection reuse when a Session is shared by a pool of threads,
+against a local HTTP/1.1 stand-in server that counts the connections it
+accepts. Requests are sent in waves of concurrent lookups, as bulk jobs do,
+so connections returned to a pool that is too small are discarded and have
+to be opened again for the next wave.
+
+    python -m benchmarks.session_pool
+
+"""
+import threading
+import time
+from concurrent import futures
+
+try:
+    from http import server
+except ImportError:
+    import BaseHTTPServer as server
+
+from infoblox import session
+
+# Simulated appliance response time, in seconds
+LATENCY = 0.005
+THREADS = 32
+WAVES = 50
+
+
+class Handler(server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with Handler.lock:
+            Handler.connections += 1
+        server.BaseHTTPRequestHandler.setup(self)
+
+    def do_GET(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(LATENCY)
+        body = b'[]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(server.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def process_request(self, request, client_address):
+        thread = threading.Thread(target=self.process_request_thread,
+                                  args=(request, client_address))
+        thread.daemon = True
+        thread.start()
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def run(address, **kwargs):
+    Handler.connections = 0
+    value = session.Session(address, https=False, **kwargs)
+    start = time.time()
+    with futures.ThreadPoolExecutor(THREADS) as executor:
+        for _wave in range(WAVES):
+            list(executor.map(lambda _i: value.get('record:host'),
+                              range(THREADS)))
+    return Handler.connections, THREADS * WAVES / (time.time() - start)
+
+
+def main():
+    httpd = Server(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    address = '127.0.0.1:%i' % httpd.server_address[1]
+    for label, kwargs in [('default pool (10)', {}),
+                          ('pool_maxsize=%i' % THREADS,
+                           {'pool_maxsize': THREADS}),
+                          ('pool_maxsize=%i, keepalive=30' % THREADS,
+                           {'pool_maxsize': THREADS, 'keepalive': 30})]:
+        connections, rate = run(address, **kwargs)
+        print('%-32s %5i connections  %7.0f req/s' %
+              (label, connections, rate))
+    httpd.shutdown()
+
+
+if __name__ == '__main__':
+    main()
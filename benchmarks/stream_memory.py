@@ -0,0 +1,84 @@
+"""
+Memory benchmark comparing decoding a page of record:host results with
+``response.json()`` against parsing it incrementally with
+:class:`infoblox.stream.Parser`, processing one record at a time as
+``Host.iterate(session, stream=True)`` does. The body is encoded before
+measuring and fed in chunks, as it would be received.
+
+    python -m benchmarks.stream_memory [hosts...]
+
+"""
+import gc
+import sys
+import tracemalloc
+
+from benchmarks import suite
+from infoblox import codec
+from infoblox import record
+from infoblox import stream
+
+ADDRESSES = 4
+HOSTS = (1000, 10000, 25000)
+
+
+def body(count):
+    """Return the encoded body of a page of record:host results.
+
+    :param int count: The number of hosts
+    :rtype: bytes
+
+    """
+    return codec.encode({'result': [suite.host_payload(offset, ADDRESSES)
+                                    for offset in range(count)]})
+
+
+def chunks(content, size=stream.CHUNK_SIZE):
+    for offset in range(0, len(content), size):
+        yield content[offset:offset + size]
+
+
+def decoded(content):
+    for values in codec.loads(b''.join(chunks(content)))['result']:
+        yield values
+
+
+def streamed(content):
+    parser = stream.Parser()
+    for chunk in chunks(content):
+        for values in parser.feed(chunk):
+            yield values
+    parser.close()
+
+
+def measure(iterable):
+    """Return the peak bytes allocated while building a record for each of
+    the values, keeping only the last one.
+
+    :param iterable iterable: Yields the values of each record
+    :rtype: int
+
+    """
+    gc.collect()
+    tracemalloc.start()
+    for values in iterable:
+        host = record.Host._from_values(None, values, True)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert host.name
+    return peak
+
+
+def main():
+    counts = [int(value) for value in sys.argv[1:]] or HOSTS
+    print('%8s %10s %14s %14s' % ('hosts', 'body MiB', 'json() MiB',
+                                  'streamed MiB'))
+    for count in counts:
+        content = body(count)
+        print('%8i %10.1f %14.1f %14.1f' % (
+            count, len(content) / 1048576.0,
+            measure(decoded(content)) / 1048576.0,
+            measure(streamed(content)) / 1048576.0))
+
+
+if __name__ == '__main__':
+    main()
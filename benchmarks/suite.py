@@ -0,0 +1,275 @@
+"""
+Benchmark suite for the Record, Mapping and Session hot paths, with
+machine-readable results and regression checks against a stored baseline.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 15
+
+Each benchmark reports the best time per operation over several repeats.
+When a baseline is given, the run exits with a non-zero status if any
+benchmark is slower than its baseline by more than the threshold
+percentage.
+
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from infoblox import codec
+from infoblox import index
+from infoblox import record
+from infoblox import testing
+
+ADDRESSES = 256
+HOSTS = 100
+REPEAT = 5
+THRESHOLD = 20.0
+
+
+def host_payload(offset=0, addresses=ADDRESSES):
+    """Return a WAPI record:host response with many addresses, as returned
+    for large DHCP reservations.
+
+    :param int offset: Makes the names and references unique
+    :param int addresses: The number of IPv4 addresses
+    :rtype: dict
+
+    """
+    name = 'host%05i.bar.net' % offset
+    return {
+        '_ref': 'record:host/ZG5zLmhvc3QkLl9kZWZhdWx0%i:%s/default' %
+                (offset, name),
+        'name': name,
+        'comment': 'Benchmark host %i' % offset,
+        'configure_for_dns': True,
+        'view': 'default',
+        'extattrs': {'Owner': {'value': 'benchmarks'}},
+        'ipv4addrs': [{
+            '_ref': 'record:host_ipv4addr/ZG5zLmhvc3RfYWRkcmVzcyQ%i:'
+                    '10.%i.%i.%i/%s/default' % (
+                        index, offset % 256, index // 256, index % 256, name),
+            'configure_for_dhcp': True,
+            'host': name,
+            'ipv4addr': '10.%i.%i.%i' % (offset % 256, index // 256,
+                                         index % 256),
+            'mac': '00:50:56:%02x:%02x:%02x' % (offset % 256, index // 256,
+                                                index % 256)}
+            for index in range(addresses)],
+        'ipv6addrs': [{
+            '_ref': 'record:host_ipv6addr/ZG5zLmhvc3RfYWRkcmVzcyQ2%i:'
+                    'fd00::%x/%s/default' % (index, index, name),
+            'configure_for_dhcp': False,
+            'host': name,
+            'ipv6addr': 'fd00::%x' % index}
+            for index in range(addresses // 4)]}
+
+
+def bench_mapping_keys():
+    host = record.Host._from_values(None, host_payload(addresses=1))
+    return host.keys, 20000
+
+
+def bench_assign_large_host():
+    values = host_payload()
+
+    def assign():
+        host = record.Host.__new__(record.Host)
+        host._session = None
+        host._ref = None
+        host._assign(values)
+    return assign, 20
+
+
+def bench_save_payload_create():
+    host = record.Host(None)
+    host._assign(host_payload())
+    host._ref = None
+    return host._save_request, 200
+
+
+def bench_save_payload_update():
+    host = record.Host._from_values(None, host_payload())
+
+    def build():
+        host.comment = 'Changed'
+        return host._save_request()
+    return build, 2000
+
+
+def bench_get_class():
+    refs = ['record:host/ZG5z:foo.bar.net/default',
+            'record:host_ipv4addr/ZG5z:10.0.0.1/foo.bar.net/default',
+            'record:host_ipv6addr/ZG5z:fd00::1/foo.bar.net/default',
+            'ipv4address/Li5pcHY0:10.0.0.1']
+
+    def lookup():
+        for ref in refs:
+            record.get_class(ref)
+    return lookup, 20000
+
+
+def bench_json_encode():
+    values = [host_payload(offset, 4) for offset in range(HOSTS)]
+    return lambda: codec.encode(values), 50
+
+
+def bench_json_decode():
+    content = codec.encode([host_payload(offset, 4)
+                            for offset in range(HOSTS)])
+    return lambda: codec.loads(content), 50
+
+
+def bench_session_fetch():
+    wapi = testing.FakeWAPI()
+    wapi.start()
+    for offset in range(HOSTS):
+        wapi.add_host('host%05i.bar.net' % offset, ['10.0.%i.%i' % (
+            offset // 256, offset % 256)])
+    session = wapi.session()
+    names = ['host%05i.bar.net' % offset for offset in range(HOSTS)]
+
+    def fetch():
+        for name in names:
+            record.Host(session, name=name)
+    fetch.cleanup = wapi.stop
+    return fetch, 1
+
+
+def bench_index_lookup():
+    hosts = index.HostIndex(record.Host._from_values(None, host_payload(
+        offset, 4)) for offset in range(HOSTS * 100))
+
+    def lookup():
+        hosts.get('host00042.bar.net')
+        hosts.by_address('10.42.0.1')
+        hosts.by_mac('00:50:56:2a:00:01')
+        hosts.in_network('10.42.0.0/30')
+    return lookup, 2000
+
+
+# Benchmarks that run a whole batch of operations per call
+OPERATIONS = {'get_class': 4, 'index_lookup': 4, 'session_fetch': HOSTS}
+
+BENCHMARKS = [('mapping_keys', bench_mapping_keys),
+              ('assign_large_host', bench_assign_large_host),
+              ('save_payload_create', bench_save_payload_create),
+              ('save_payload_update', bench_save_payload_update),
+              ('get_class', bench_get_class),
+              ('json_encode', bench_json_encode),
+              ('json_decode', bench_json_decode),
+              ('index_lookup', bench_index_lookup),
+              ('session_fetch', bench_session_fetch)]
+
+
+def run(names=None, repeat=REPEAT):
+    """Run the benchmarks, returning their results keyed by name.
+
+    :param list names: Only run these benchmarks
+    :param int repeat: The number of times to repeat each benchmark
+    :rtype: dict
+
+    """
+    results = {}
+    for name, setup in BENCHMARKS:
+        if names and name not in names:
+            continue
+        func, number = setup()
+        try:
+            best = min(timeit.repeat(func, number=number, repeat=repeat))
+        finally:
+            if hasattr(func, 'cleanup'):
+                func.cleanup()
+        per_op = best / number / OPERATIONS.get(name, 1)
+        results[name] = {'seconds_per_op': per_op,
+                         'ops_per_second': 1 / per_op if per_op else 0.0}
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Compare the results with the baseline, returning a description of
+    each benchmark that is slower by more than ``threshold`` percent.
+
+    :param dict results: The current results
+    :param dict baseline: The baseline results
+    :param float threshold: The allowed slowdown, in percent
+    :rtype: list
+
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        expected = baseline[name]['seconds_per_op']
+        change = (result['seconds_per_op'] - expected) / expected * 100
+        if change > threshold:
+            regressions.append('%s is %.1f%% slower than the baseline '
+                               '(%.3g s vs %.3g s per op)' %
+                               (name, change, result['seconds_per_op'],
+                                expected))
+    return regressions
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help='Only run these benchmarks: %s' %
+                             ', '.join(name for name, _s in BENCHMARKS))
+    parser.add_argument('-o', '--output',
+                        help='Write the results as JSON to this file')
+    parser.add_argument('-b', '--baseline',
+                        help='Compare the results with this results file')
+    parser.add_argument('-s', '--save-baseline',
+                        help='Write the results to this baseline file')
+    parser.add_argument('-t', '--threshold', type=float, default=THRESHOLD,
+                        help='Allowed slowdown compared with the baseline, '
+                             'in percent. Default: %(default)s')
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT,
+                        help='Number of times to repeat each benchmark. '
+                             'Default: %(default)s')
+    args = parser.parse_args(args)
+    unknown = set(args.benchmarks) - set(name for name, _s in BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+    return args
+
+
+def main(args=None):
+    args = parse_args(args)
+    output = {'python': platform.python_version(),
+              'platform': platform.platform(),
+              'json': codec.name,
+              'timestamp': int(time.time()),
+              'results': run(args.benchmarks, args.repeat)}
+    for name, result in sorted(output['results'].items()):
+        sys.stderr.write('%-22s %12.3f us/op %14.1f ops/s\n' %
+                         (name, result['seconds_per_op'] * 1e6,
+                          result['ops_per_second']))
+    content = json.dumps(output, indent=2, sort_keys=True) + '\n'
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as handle:
+                handle.write(content)
+    if not args.output:
+        sys.stdout.write(content)
+    if args.baseline:
+        try:
+            with open(args.baseline) as handle:
+                baseline = json.load(handle)['results']
+        except (IOError, KeyError, ValueError) as error:
+            sys.stderr.write('Could not read the baseline %s: %r\n' %
+                             (args.baseline, error))
+            return 2
+        regressions = compare(output['results'], baseline, args.threshold)
+        for regression in regressions:
+            sys.stderr.write('REGRESSION: %s\n' % regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
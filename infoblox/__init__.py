@@ -1,8 +1,37 @@
 __version__ = '1.1.1'
 
-from infoblox.session import Session
+import sys
 
-from infoblox.record import Host
-from infoblox.record import HostIPv4
-from infoblox.record import HostIPv6
-from infoblox.record import IPv4Address
+# The public names of the package and the modules they are imported from on
+# first use, so that importing the package does not import requests
+_EXPORTS = {'Session': 'infoblox.session',
+            'CachingSession': 'infoblox.cache',
+            'Host': 'infoblox.record',
+            'HostIPv4': 'infoblox.record',
+            'HostIPv6': 'infoblox.record',
+            'IPv4Address': 'infoblox.record'}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError('module %r has no attribute %r' %
+                             (__name__, name))
+    value = getattr(__import__(_EXPORTS[name], fromlist=[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+if sys.version_info < (3, 7):  # Module __getattr__ is not supported
+    from infoblox.session import Session
+    from infoblox.cache import CachingSession
+
+    from infoblox.record import Host
+    from infoblox.record import HostIPv4
+    from infoblox.record import HostIPv6
+    from infoblox.record import IPv4Address
@@ -0,0 +1,288 @@
+"""
+asyncio counterparts of the Infoblox Session and record classes. Requires
+Python 3.5+ and `aiohttp <https://docs.aiohttp.org>`_.
+
+Example::
+
+    async with infoblox.aio.AsyncSession(host, user, password) as session:
+        host = infoblox.aio.Host(session, name='foo.bar.net')
+        if await host.fetch():
+            print(host.ipv4addrs)
+
+Unlike the blocking classes, the record classes in this module never fetch
+from their constructor, the caller awaits :meth:`AsyncRecord.fetch`.
+
+"""
+import asyncio
+import logging
+import ssl
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from infoblox import codec
+from infoblox import record
+from infoblox import session
+
+LOGGER = logging.getLogger(__name__)
+
+POOL_SIZE = 100
+
+
+class Response(object):
+    """The subset of :class:`requests.Response` that the record classes use,
+    populated from a completed aiohttp response.
+
+    """
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return codec.loads(self.content)
+
+
+class AsyncSession(object):
+    """asyncio counterpart of :class:`infoblox.Session`, backed by an aiohttp
+    client session with a bounded connection pool.
+
+    :param str host: The Infoblox host to communicate with
+    :param str username: The user to authenticate with
+    :param str password: The password to authenticate with
+    :param bool https: Use HTTPS to communicate with the device
+    :param str wapi_version: Override the WAPI version, eg ``1.7``
+    :param int pool_size: The maximum number of simultaneous connections
+    :param bool|str verify: Verify the TLS certificate, or the path to a CA
+        bundle to verify it with
+
+    """
+    BASE_PATH = session.Session.BASE_PATH
+    HEADERS = session.Session.HEADERS
+
+    _request_url = session.Session._request_url
+
+    def __init__(self, host, username=None, password=None, https=True,
+                 wapi_version=None, pool_size=POOL_SIZE, verify=False):
+        if aiohttp is None:
+            raise RuntimeError('aiohttp is required for AsyncSession')
+        if wapi_version:
+            self.BASE_PATH = '/wapi/v%s' % wapi_version
+        self.auth = aiohttp.BasicAuth(username or session.USERNAME,
+                                      password or session.PASSWORD)
+        self.host = host
+        self.pool_size = pool_size
+        self.scheme = 'https' if https else 'http'
+        self.session = None
+        self.verify = verify
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close the pooled connections to the Infoblox appliance."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def delete(self, path):
+        """Call the Infoblox device to delete the ref
+
+        :param str path: The reference id
+        :rtype: infoblox.aio.Response
+
+        """
+        return await self._request('DELETE', self._request_url(path))
+
+    async def get(self, path, data=None, return_fields=None):
+        """Call the Infoblox device to get the obj for the data passed in
+
+        :param str path: The object type or reference id
+        :param dict data: The data for the get request
+        :param dict return_fields: The query arguments for the request
+        :rtype: infoblox.aio.Response
+
+        """
+        return await self._request('GET',
+                                   self._request_url(path, return_fields),
+                                   codec.encode(data))
+
+    async def post(self, path, data, return_fields=None):
+        """Call the Infoblox device to post the obj for the data passed in
+
+        :param str path: The object type
+        :param dict data: The data for the post
+        :param dict return_fields: The query arguments for the request
+        :rtype: infoblox.aio.Response
+
+        """
+        LOGGER.debug('Posting data: %r', data)
+        return await self._request('POST',
+                                   self._request_url(path, return_fields),
+                                   codec.encode(data or {}), self.HEADERS)
+
+    async def put(self, path, data, return_fields=None):
+        """Call the Infoblox device to put the obj for the data passed in
+
+        :param str path: The reference id
+        :param dict data: The data for the put
+        :param dict return_fields: The query arguments for the request
+        :rtype: infoblox.aio.Response
+
+        """
+        LOGGER.debug('Putting data: %r', data)
+        return await self._request('PUT',
+                                   self._request_url(path, return_fields),
+                                   codec.encode(data or {}), self.HEADERS)
+
+    async def _request(self, method, url, data=None, headers=None):
+        if self.session is None:
+            # The client session has to be created with a running event loop
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size,
+                                               ssl=self._ssl()),
+                auth=self.auth)
+        async with self.session.request(method, url, data=data,
+                                        headers=headers) as response:
+            return Response(response.status, await response.read())
+
+    def _ssl(self):
+        """Return the aiohttp ``ssl`` argument for the verify setting: False
+        to skip verification, None for the default checks, or a context
+        that trusts the CA bundle.
+
+        :rtype: bool|None|ssl.SSLContext
+
+        """
+        if not self.verify:
+            return False
+        if self.verify is True:
+            return None
+        return ssl.create_default_context(cafile=self.verify)
+
+
+class AsyncRecord(object):
+    """Mixin that replaces the blocking :class:`infoblox.record.Record`
+    request methods with coroutines. Payload building and response handling
+    are shared with the blocking classes.
+
+    """
+    _autoload = False
+
+    async def delete(self):
+        """Remove the item from the infoblox server.
+
+        :rtype: bool
+        :raises: AssertionError
+        :raises: ValueError
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        self._check_delete()
+        return self._deleted(await self._session.delete(self._path))
+
+    async def fetch(self):
+        """Attempt to fetch the object from the Infoblox device. If successful
+        the object will be updated and the coroutine will return True.
+
+        :rtype: bool
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        LOGGER.debug('Fetching %s, %s', self._path, self._search_values)
+        response = await self._session.get(
+            self._path, self._search_values,
+            {'_return_fields': self._return_fields})
+        return self._fetched(response)
+
+    async def fetch_nested(self):
+        """Load the remaining fields of nested records built from this
+        record's payload, fetching them concurrently.
+
+        :rtype: bool
+
+        """
+        results = await asyncio.gather(
+            *[obj.fetch() for obj in self._nested_partial()],
+            return_exceptions=True)
+        return not any(isinstance(result, Exception) for result in results)
+
+    @classmethod
+    async def iterate(cls, session, page_size=record.PAGE_SIZE, **criteria):
+        """Asynchronously iterate over all of the records of this type that
+        match the search criteria, requesting them one page at a time.
+
+        :param infoblox.aio.AsyncSession session: The async session object
+        :param int page_size: The maximum number of records per request
+        :param dict criteria: The WAPI search arguments
+        :rtype: async generator
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        page_id = None
+        while True:
+            response = await session.get(cls._wapi_type,
+                                         None if page_id else criteria,
+                                         cls._page_args(page_size, page_id))
+            if response.status_code != 200:
+                raise cls._protocol_error(response)
+            result = response.json()
+            for values in result.get('result', []):
+                yield cls._from_values(session, values, True)
+            page_id = result.get('next_page_id')
+            if not page_id:
+                break
+
+    async def save(self, refetch=False):
+        """Update the infoblox with new values for the specified object, or add
+        the values if it's a new object all together.
+
+        :param bool refetch: Fetch the object again after saving it
+        :rtype: bool
+        :raises: AssertionError
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        method, values = self._save_request()
+        if method is None:
+            return True
+        response = await getattr(self._session, method)(
+            self._path, values, {'_return_fields': self._return_fields})
+        if self._saved(response):
+            if refetch:
+                await self.fetch()
+            return True
+
+    def _record_class(self, reference):
+        return get_class(reference)
+
+
+class Host(AsyncRecord, record.Host):
+    __doc__ = record.Host.__doc__
+
+
+class HostIPv4(AsyncRecord, record.HostIPv4):
+    __doc__ = record.HostIPv4.__doc__
+
+
+class HostIPv6(AsyncRecord, record.HostIPv6):
+    __doc__ = record.HostIPv6.__doc__
+
+
+class IPv4Address(AsyncRecord, record.IPv4Address):
+    __doc__ = record.IPv4Address.__doc__
+
+
+def get_class(reference):
+    blocking = record.get_class(reference)
+    return CLASS_MAP.get(blocking) if blocking else None
+
+
+CLASS_MAP = {record.Host: Host,
+             record.HostIPv4: HostIPv4,
+             record.HostIPv6: HostIPv6,
+             record.IPv4Address: IPv4Address}
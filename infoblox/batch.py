@@ -0,0 +1,191 @@
+"""
+Batched requests using the WAPI multi-object request endpoint.
+
+"""
+import logging
+
+from infoblox import exceptions
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SIZE = 100
+
+
+class Batch(object):
+    """Collects fetches, saves and deletes for many
+    :class:`infoblox.record.Record` instances and sends them to the Infoblox
+    appliance as a few WAPI multi-object requests instead of one HTTP request
+    per record.
+
+    Pending operations are sent once ``size`` of them have accumulated and
+    when :meth:`flush` is called or the context manager exits. New reference
+    ids are assigned to the originating records. If a multi-object request
+    fails, its operations are retried one at a time so that each error can be
+    attributed to the record that caused it. Errors are collected in
+    :attr:`errors` as ``(record, exception)`` tuples.
+
+    Example::
+
+        with session.batch() as batch:
+            for host in hosts:
+                batch.save(host)
+        for host, error in batch.errors:
+            print('%s failed: %s' % (host.name, error))
+
+    :param infoblox.Session session: The infoblox session object
+    :param int size: The maximum number of operations per request
+
+    """
+    PATH = 'request'
+
+    def __init__(self, session, size=None):
+        self.errors = []
+        self.size = size or DEFAULT_SIZE
+        self._pending = []
+        self._session = session
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            LOGGER.debug('Discarding %i pending operations', len(self))
+            self._pending = []
+
+    def __len__(self):
+        """Return the number of operations that have not been sent yet.
+
+        :rtype: int
+
+        """
+        return len(self._pending)
+
+    def delete(self, record):
+        """Add the removal of the record from the Infoblox appliance to the
+        batch.
+
+        :param infoblox.record.Record record: The record to delete
+        :raises: AssertionError
+        :raises: ValueError
+
+        """
+        if not record._ref:
+            raise ValueError('Object has no reference id for deletion')
+        if 'save' not in record._supports:
+            raise AssertionError('Can not save this object type')
+        self._append('DELETE', record, {'method': 'DELETE',
+                                        'object': record._ref})
+
+    def save(self, record):
+        """Add the creation or update of the record to the batch. Existing
+        records without changes are skipped.
+
+        :param infoblox.record.Record record: The record to save
+        :raises: AssertionError
+
+        """
+        method, values = record._save_request()
+        if method is None:
+            return
+        values.pop('_ref', None)
+        self._append(method.upper(), record, {
+            'method': method.upper(),
+            'object': record._ref or record._wapi_type,
+            'data': values,
+            'args': {'_return_fields': record._return_fields}})
+
+    def fetch(self, record):
+        """Add fetching the record by its reference id to the batch.
+
+        :param infoblox.record.Record record: The record to fetch
+        :raises: ValueError
+
+        """
+        if not record._ref:
+            raise ValueError('Object has no reference id to fetch')
+        self._append('GET', record, {
+            'method': 'GET',
+            'object': record._ref,
+            'args': {'_return_fields': record._return_fields}})
+
+    def flush(self):
+        """Send all pending operations to the Infoblox appliance, returning
+        False if any of them failed.
+
+        :rtype: bool
+
+        """
+        pending, self._pending = self._pending, []
+        success = True
+        for offset in range(0, len(pending), self.size):
+            if not self._send(pending[offset:offset + self.size]):
+                success = False
+        return success
+
+    def _append(self, method, record, operation):
+        self._pending.append((method, record, operation))
+        if len(self._pending) >= self.size:
+            self.flush()
+
+    def _send(self, operations):
+        """Send the operations as a single multi-object request, falling back
+        to individual requests if the appliance rejects it.
+
+        :param list operations: The operations to send
+        :rtype: bool
+
+        """
+        LOGGER.debug('Sending %i operations', len(operations))
+        response = self._session.post(self.PATH,
+                                      [op for _m, _r, op in operations])
+        if response.status_code in (200, 201):
+            for (method, record, _op), result in zip(operations,
+                                                     response.json()):
+                self._apply(method, record, result)
+            return True
+        LOGGER.warning('Multi-object request failed (%i), retrying %i '
+                       'operations individually', response.status_code,
+                       len(operations))
+        success = True
+        for method, record, _op in operations:
+            try:
+                if method == 'DELETE':
+                    record.delete()
+                elif method == 'GET':
+                    record.fetch()
+                else:
+                    record.save()
+            except exceptions.ProtocolError as error:
+                self.errors.append((record, error))
+                success = False
+        return success
+
+    @staticmethod
+    def _apply(method, record, result):
+        """Map the result of an operation back onto the originating record.
+
+        :param str method: The operation's HTTP method
+        :param infoblox.record.Record record: The originating record
+        :param str|dict result: The operation's result
+
+        """
+        if method == 'DELETE':
+            ref, record._ref = record._ref, None
+            record.clear()
+            record._mark_clean()
+            record._notify('record_deleted', ref)
+            return
+        ref = record._ref
+        if method == 'GET':
+            record._assign(result)
+            record._partial = False
+        elif isinstance(result, dict):
+            record._ref = result.get('_ref', record._ref)
+            record._assign(result)
+        else:
+            record._ref = result
+        record._mark_clean()
+        if method != 'GET':
+            record._notify('record_saved', ref)
@@ -0,0 +1,124 @@
+"""
+Bulk add and remove operations for the infoblox-host command line app, read
+from CSV or JSON-lines input and run concurrently.
+
+"""
+import collections
+import csv
+import json
+import logging
+import time
+from concurrent import futures
+
+LOGGER = logging.getLogger(__name__)
+
+CONCURRENCY = 10
+FIELDS = ['action', 'host', 'address', 'comment']
+FORMATS = ['csv', 'jsonl']
+
+
+def read_operations(handle, input_format='jsonl'):
+    """Read the operations from a CSV or JSON-lines file, yielding a
+    ``(line number, operation)`` tuple for each. CSV rows have the columns
+    action, host, address and comment, with an optional header row. A line
+    that can not be parsed is yielded as the exception raised parsing it.
+
+    :param file handle: The file to read from
+    :param str input_format: One of ``csv`` or ``jsonl``
+    :rtype: generator
+
+    """
+    if input_format == 'csv':
+        reader = csv.reader(handle)
+        for row in reader:
+            if not row or row == FIELDS[:len(row)]:
+                continue
+            yield reader.line_num, dict(zip(FIELDS, row))
+        return
+    for line_num, line in enumerate(handle, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except ValueError as error:
+            yield line_num, error
+
+
+def run(infoblox, operations, concurrency=CONCURRENCY):
+    """Run the operations with up to ``concurrency`` of them in flight,
+    yielding a result dict for each in input order as they complete.
+
+    :param infoblox.cli.InfobloxHost infoblox: The API to run them with
+    :param iterable operations: ``(line number, operation)`` tuples
+    :param int concurrency: The maximum number of concurrent operations
+    :rtype: generator
+
+    """
+    pending = collections.deque()
+    with futures.ThreadPoolExecutor(concurrency) as executor:
+        for line_num, operation in operations:
+            pending.append(executor.submit(execute, infoblox, line_num,
+                                           operation))
+            if len(pending) >= concurrency * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def execute(infoblox, line_num, operation):
+    """Run a single operation, returning its result.
+
+    :param infoblox.cli.InfobloxHost infoblox: The API to run it with
+    :param int line_num: The input line number
+    :param dict|Exception operation: The operation or its parsing error
+    :rtype: dict
+
+    """
+    result = {'line': line_num, 'success': False, 'error': None}
+    start = time.time()
+    try:
+        if isinstance(operation, Exception):
+            raise operation
+        result['action'] = operation.get('action')
+        result['host'] = operation.get('host')
+        if result['action'] == 'add':
+            result['success'] = bool(infoblox.add_new_host(
+                operation['host'], operation['address'],
+                operation.get('comment') or None))
+        elif result['action'] == 'remove':
+            result['success'] = bool(
+                infoblox.delete_old_host(operation['host']))
+        else:
+            raise ValueError('Invalid action: %r' % result['action'])
+    except Exception as error:
+        LOGGER.debug('Line %s failed: %r', line_num, error)
+        result['error'] = '%s: %s' % (error.__class__.__name__, error)
+    result['duration'] = round(time.time() - start, 6)
+    return result
+
+
+def process(infoblox, handle, output, input_format,
+            concurrency=CONCURRENCY):
+    """Run the operations read from ``handle``, writing each result to
+    ``output`` as a JSON line and returning the summary.
+
+    :param infoblox.cli.InfobloxHost infoblox: The API to run them with
+    :param file handle: The file to read the operations from
+    :param file output: The file to write the results to
+    :param str input_format: One of ``csv`` or ``jsonl``
+    :param int concurrency: The maximum number of concurrent operations
+    :rtype: dict
+
+    """
+    summary = {'total': 0, 'succeeded': 0, 'failed': 0}
+    start = time.time()
+    for result in run(infoblox, read_operations(handle, input_format),
+                      concurrency):
+        summary['total'] += 1
+        summary['succeeded' if result['success'] else 'failed'] += 1
+        output.write(json.dumps(result, sort_keys=True) + '\n')
+        output.flush()
+    summary['duration'] = time.time() - start
+    summary['rate'] = (summary['total'] / summary['duration']
+                       if summary['duration'] else 0.0)
+    return summary
@@ -0,0 +1,300 @@
+"""
+An in-process cache of the responses to Infoblox fetch requests.
+
+"""
+import collections
+import contextlib
+import json
+import logging
+import threading
+import time
+
+from infoblox import codec
+from infoblox import session
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_SIZE = 1024
+TTL = 60
+
+# Object types whose search results change when a related object is written
+RELATED_TYPES = [('record:host', 'record:host_ipv4addr',
+                  'record:host_ipv6addr', 'ipv4address')]
+
+try:
+    _clock = time.monotonic
+except AttributeError:
+    _clock = time.time
+
+
+class CachedResponse(object):
+    """The subset of :class:`requests.Response` that the record classes use,
+    for a response served from the cache. The body is decoded on each call to
+    :meth:`json` so callers never share mutable values.
+
+    """
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return codec.loads(self.content)
+
+
+class Cache(object):
+    """A thread-safe, size-bounded LRU cache with per object type TTLs.
+    Entries are indexed by the reference ids they contain so that writes to
+    an object invalidate every cached response that includes it.
+
+    :param int max_size: The maximum number of cached responses
+    :param int ttl: The default number of seconds a response is cached for
+    :param dict ttls: Object type specific TTLs, eg ``{'record:host': 300}``
+
+    """
+    def __init__(self, max_size=MAX_SIZE, ttl=TTL, ttls=None):
+        self.evictions = 0
+        self.hits = 0
+        self.max_size = max_size
+        self.misses = 0
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._refs = collections.defaultdict(set)
+        self._searches = collections.defaultdict(set)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._refs.clear()
+            self._searches.clear()
+
+    def get(self, key):
+        """Return the cached value for the key, or None if it is not cached
+        or has expired.
+
+        :param tuple key: The cache key
+        :rtype: mixed
+
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < _clock():
+                if entry is not None:
+                    self._discard(key, entry)
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def invalidate(self, path):
+        """Remove the cached responses for the object type or reference id
+        along with the cached search results of the object type and the
+        types related to it.
+
+        :param str path: The object type or reference id
+
+        """
+        wapi_type = object_type(path)
+        with self._lock:
+            keys = set(self._refs.get(path, ()))
+            for types in RELATED_TYPES:
+                if wapi_type in types:
+                    break
+            else:
+                types = (wapi_type,)
+            for related in types:
+                keys.update(self._searches.get(related, ()))
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._discard(key, entry)
+        LOGGER.debug('Invalidated %i entries for %s', len(keys), path)
+
+    def record_deleted(self, obj, ref):
+        """Invalidate the responses containing an object that was deleted,
+        as reported by a change feed.
+
+        :param infoblox.record.Record obj: The deleted record
+        :param str ref: The record's reference id
+
+        """
+        self.invalidate(ref)
+
+    def record_saved(self, obj, ref=None):
+        """Invalidate the responses containing an object that was saved,
+        as reported by a change feed.
+
+        :param infoblox.record.Record obj: The saved record
+        :param str ref: The record's reference id before it was saved
+
+        """
+        if ref and ref != obj._ref:
+            self.invalidate(ref)
+        self.invalidate(obj._ref or obj._wapi_type)
+
+    def set(self, key, value, refs=()):
+        """Cache the value for the key, indexing it by the reference ids it
+        contains.
+
+        :param tuple key: The cache key, starting with the request path
+        :param mixed value: The value to cache
+        :param set refs: The reference ids contained in the value
+
+        """
+        wapi_type = object_type(key[0])
+        expires = _clock() + self.ttls.get(wapi_type, self.ttl)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._discard(key, entry)
+            entry = expires, value, frozenset(refs)
+            self._entries[key] = entry
+            for ref in entry[2]:
+                self._refs[ref].add(key)
+            if key[0] == wapi_type:
+                self._searches[wapi_type].add(key)
+            while len(self._entries) > self.max_size:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self._discard(old_key, old_entry)
+                self.evictions += 1
+
+    def _discard(self, key, entry):
+        """Remove the indexes for an entry that was removed from the cache.
+
+        :param tuple key: The cache key
+        :param tuple entry: The removed entry
+
+        """
+        for ref in entry[2]:
+            self._refs[ref].discard(key)
+            if not self._refs[ref]:
+                del self._refs[ref]
+        self._searches[object_type(key[0])].discard(key)
+
+
+class CachingSession(session.Session):
+    """A :class:`infoblox.Session` that caches the responses to fetch
+    requests, keyed by reference id or by object type and search criteria.
+    Saving or deleting an object through the session invalidates the cached
+    responses that contain it and the cached search results for its type.
+
+    Example::
+
+        session = infoblox.CachingSession(host, user, password,
+                                          ttls={'record:host': 300})
+        host = infoblox.Host(session, name='foo.bar.net')
+        print(session.cache.hits, session.cache.misses)
+
+    :param str host: The Infoblox host to communicate with
+    :param str username: The user to authenticate with
+    :param str password: The password to authenticate with
+    :param bool https: Use HTTPS to communicate with the device
+    :param str wapi_version: Override the WAPI version, eg ``1.7``
+    :param int max_size: The maximum number of cached responses
+    :param int ttl: The default number of seconds a response is cached for
+    :param dict ttls: Object type specific TTLs
+    :param dict kwargs: Additional :class:`infoblox.Session` arguments
+
+    """
+    def __init__(self, host, username=None, password=None, https=True,
+                 wapi_version=None, max_size=MAX_SIZE, ttl=TTL, ttls=None,
+                 **kwargs):
+        super(CachingSession, self).__init__(host, username, password, https,
+                                             wapi_version, **kwargs)
+        self.cache = Cache(max_size, ttl, ttls)
+        self._local = threading.local()
+
+    def delete(self, path):
+        response = super(CachingSession, self).delete(path)
+        self.cache.invalidate(path)
+        return response
+
+    def get(self, path, data=None, return_fields=None, stream=False):
+        if stream or return_fields and ('_paging' in return_fields or
+                                        '_page_id' in return_fields):
+            return super(CachingSession, self).get(path, data, return_fields,
+                                                   stream)
+        key = (path, json.dumps(data, sort_keys=True),
+               json.dumps(return_fields, sort_keys=True))
+        response = None
+        if not getattr(self._local, 'uncached', False):
+            response = self.cache.get(key)
+        if response is not None:
+            LOGGER.debug('Cache hit for %r', key)
+            return response
+        response = super(CachingSession, self).get(path, data, return_fields)
+        if response.status_code == 200:
+            content = response.content
+            self.cache.set(key, CachedResponse(200, content),
+                           references(codec.loads(content)))
+        return response
+
+    @contextlib.contextmanager
+    def uncached(self):
+        """Send the fetch requests made by the current thread in the block
+        to the Infoblox device instead of answering them from the cache, for
+        reads that decide how an object is written. The responses are still
+        cached.
+
+        Example::
+
+            with session.uncached():
+                host = infoblox.Host(session, name='foo.bar.net')
+
+        """
+        self._local.uncached = True
+        try:
+            yield
+        finally:
+            self._local.uncached = False
+
+    def post(self, path, data, return_fields=None):
+        response = super(CachingSession, self).post(path, data, return_fields)
+        if path == 'request':
+            for operation in data:
+                if operation.get('method') != 'GET':
+                    self.cache.invalidate(operation['object'])
+        else:
+            self.cache.invalidate(path)
+        return response
+
+    def put(self, path, data, return_fields=None):
+        response = super(CachingSession, self).put(path, data, return_fields)
+        self.cache.invalidate(path)
+        return response
+
+
+def object_type(path):
+    """Return the WAPI object type for an object type or reference id.
+
+    :param str path: The object type or reference id
+    :rtype: str
+
+    """
+    return path.split('/', 1)[0]
+
+
+def references(value):
+    """Return all of the reference ids contained in a WAPI response value.
+
+    :param mixed value: The decoded response
+    :rtype: set
+
+    """
+    refs = set()
+    if isinstance(value, dict):
+        if '_ref' in value:
+            refs.add(value['_ref'])
+        for item in value.values():
+            if isinstance(item, (dict, list)):
+                refs.update(references(item))
+    elif isinstance(value, list):
+        for item in value:
+            refs.update(references(item))
+    return refs
@@ -0,0 +1,242 @@
+"""
+Keep local copies of the host records, such as a
+:class:`~infoblox.index.HostIndex`, a :class:`~infoblox.snapshot.Snapshot`
+or a :class:`~infoblox.cache.Cache`, up to date by polling the Infoblox
+appliance for the hosts that changed since the last poll instead of reading
+all of them again.
+
+Example::
+
+    feed = infoblox.changes.ChangeFeed(session, extattr='Modified')
+    feed.register(index)
+    feed.register(snapshot)
+    while True:
+        feed.poll()
+        time.sleep(30)
+
+"""
+import logging
+
+from infoblox import record
+
+LOGGER = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+
+SEQUENCE = 'sequence'
+EXTATTR = 'extattr'
+
+# The statuses of a db_objects request on appliances that do not support it
+UNSUPPORTED = (400, 404)
+
+
+class ChangeFeed(object):
+    """Polls the Infoblox appliance for changed host records and applies
+    them to the registered targets.
+
+    Where the appliance supports the WAPI ``db_objects`` object, the feed
+    requests the reference ids of the hosts changed after its cursor, the
+    sequence id of the last change it applied, and fetches them with
+    multi-object requests. Hosts that can no longer be fetched were deleted.
+
+    Otherwise, if ``extattr`` is set, the feed falls back to searching for
+    the hosts whose extensible attribute of that name, an integer such as a
+    UNIX timestamp maintained by the tools that write to the appliance, is
+    at least the largest value seen by the previous poll. This can not
+    detect deleted hosts, so a snapshot should still be refreshed from time
+    to time.
+
+    Targets implement the observer interface used by
+    :meth:`infoblox.Session.add_observer`: ``record_saved(obj)`` is called
+    with each changed host and ``record_deleted(obj, ref)`` with an empty
+    host and the reference id of each deleted one.
+
+    Persist :attr:`cursor` to resume polling after a restart. Without a
+    cursor, the first poll applies every host.
+
+    :param infoblox.Session session: The infoblox session object
+    :param str extattr: The extensible attribute to fall back to
+    :param cursor: The cursor returned by a previous feed
+    :param class record_class: The class of the records passed to targets
+    :param int page_size: The number of changes to request at a time
+
+    """
+    def __init__(self, session, extattr=None, cursor=None,
+                 record_class=record.Host, page_size=PAGE_SIZE):
+        self.cursor = cursor
+        self.extattr = extattr
+        self.mode = None
+        self.page_size = page_size
+        self.record_class = record_class
+        self.session = session
+        self._targets = []
+
+    def register(self, target):
+        """Apply the changes found by each poll to the target.
+
+        :param object target: The index, snapshot or cache to update
+
+        """
+        self._targets.append(target)
+
+    def unregister(self, target):
+        """Stop applying changes to the target.
+
+        :param object target: A registered target
+
+        """
+        self._targets.remove(target)
+
+    def poll(self):
+        """Request the hosts changed since the last poll and apply them to
+        the registered targets, advancing the cursor after each page of
+        changes has been applied. Returns the number of hosts that were
+        saved and deleted.
+
+        :rtype: dict
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        counts = {'saved': 0, 'deleted': 0}
+        response = None
+        if self.mode is None:
+            response = self._changes()
+            self.mode = self._detect(response)
+        if self.mode == SEQUENCE:
+            self._poll_sequence(counts, response)
+        else:
+            self._poll_extattr(counts)
+        LOGGER.debug('Polled %s changes up to %s: %r', self.mode,
+                     self.cursor, counts)
+        return counts
+
+    def _apply(self, saved, deleted, counts):
+        for target in self._targets:
+            for obj in saved:
+                target.record_saved(obj)
+            for ref in deleted:
+                target.record_deleted(
+                    self.record_class._from_values(self.session, {}), ref)
+        counts['saved'] += len(saved)
+        counts['deleted'] += len(deleted)
+
+    def _changes(self):
+        """Request the next page of changes after the cursor from the
+        ``db_objects`` object.
+
+        :rtype: requests.Response
+
+        """
+        return self.session.get('db_objects', None, {
+            'start_sequence_id': self.cursor or '0',
+            'object_types': self.record_class._wapi_type,
+            '_max_results': self.page_size,
+            '_return_fields': 'last_sequence_id,object,object_type'})
+
+    def _detect(self, response):
+        """Return the polling mode supported by the appliance, based on the
+        response to the first request for changes. Only a response showing
+        that ``db_objects`` is not supported falls back to the extensible
+        attribute, other errors are raised so that the poll can be retried.
+
+        :param requests.Response response: The ``db_objects`` response
+        :rtype: str
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        if response.status_code == 200:
+            return SEQUENCE
+        if not self.extattr or response.status_code not in UNSUPPORTED:
+            raise self.record_class._protocol_error(response)
+        LOGGER.info('db_objects is not available (%i), polling the %s '
+                    'extensible attribute', response.status_code,
+                    self.extattr)
+        self.cursor = None
+        return EXTATTR
+
+    def _fetch(self, refs):
+        """Fetch the hosts with the reference ids, returning the hosts that
+        exist and the reference ids of those that were deleted.
+
+        :param list refs: The reference ids
+        :rtype: tuple(list, list)
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        records = [self.record_class._from_values(self.session, {'_ref': ref})
+                   for ref in refs]
+        batch = self.session.batch()
+        for obj in records:
+            batch.fetch(obj)
+        batch.flush()
+        failed = dict((id(obj), error) for obj, error in batch.errors)
+        saved, deleted = [], []
+        for obj in records:
+            if id(obj) not in failed:
+                saved.append(obj)
+            elif failed[id(obj)].status_code == 404:
+                deleted.append(obj._ref)
+            else:
+                raise failed[id(obj)]
+        return saved, deleted
+
+    def _poll_extattr(self, counts):
+        """Apply the hosts whose extensible attribute is at least the
+        cursor, then move the cursor to the largest value seen.
+
+        """
+        criteria = {}
+        if self.cursor is not None:
+            criteria['*%s>' % self.extattr] = self.cursor
+        cursor = self.cursor
+        for page in self.record_class._pages(self.session, self.page_size,
+                                             criteria):
+            saved = [self.record_class._from_values(self.session, values)
+                     for values in page]
+            self._apply(saved, [], counts)
+            for obj in saved:
+                value = _extattr(obj, self.extattr)
+                if value is not None and (cursor is None or value > cursor):
+                    cursor = value
+        self.cursor = cursor
+
+    def _poll_sequence(self, counts, response=None):
+        """Apply the changes after the cursor from ``db_objects``, a page at
+        a time, starting with the response to the first request if it was
+        already sent.
+
+        """
+        while True:
+            if response is None:
+                response = self._changes()
+            if response.status_code != 200:
+                raise self.record_class._protocol_error(response)
+            changes = response.json()
+            refs, seen = [], set()
+            for change in changes:
+                ref = change['object']
+                if isinstance(ref, dict):
+                    ref = ref['_ref']
+                if ref not in seen:
+                    seen.add(ref)
+                    refs.append(ref)
+            if refs:
+                saved, deleted = self._fetch(refs)
+                self._apply(saved, deleted, counts)
+                self.cursor = changes[-1]['last_sequence_id']
+            if len(changes) < self.page_size:
+                break
+            response = None
+
+
+def _extattr(obj, name):
+    """Return the integer value of the host's extensible attribute, or
+    None if it is not set.
+
+    :rtype: int
+
+    """
+    try:
+        return int((obj.extattrs or {})[name]['value'])
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -1,12 +1,23 @@
 """
 API and command line app for working with Infoblox NIOS
 
+The modules used by each action are imported when the action runs, so that
+short lived invocations, such as those forwarded to the daemon, do not pay
+for importing requests and the record classes.
+
 """
 import argparse
+import errno
+import json
 import logging
+import os
+import signal
+import socket
 import sys
+import time
 
-from infoblox import Host, Session
+from infoblox import daemon
+from infoblox import exceptions
 
 LOGGER = logging.getLogger(__name__)
 
@@ -27,16 +38,25 @@ class InfobloxHost(object):
     """
     HEADERS = {'Content-type': 'application/json'}
 
-    def __init__(self, host, username=None, password=None):
+    def __init__(self, host, username=None, password=None, cookie_file=None,
+                 session_class=None, **kwargs):
         """Create a new instance of the Infoblox class
 
         :param str host: The Infoblox host to communicate with
         :param str username: The user to authenticate with
         :param str password: The password to authenticate with
+        :param str cookie_file: Persist the auth cookie to this file
+        :param class session_class: The session class to create, eg
+            :class:`infoblox.CachingSession`. Default:
+            :class:`infoblox.Session`
+        :param dict kwargs: Additional session arguments
 
         """
+        if session_class is None:
+            from infoblox.session import Session as session_class
 
-        self.session = Session(host, username, password)
+        self.session = session_class(host, username, password,
+                                     cookie_file=cookie_file, **kwargs)
 
     def delete_old_host(self, hostname):
         """Remove all records for the host.
@@ -45,51 +65,112 @@ class InfobloxHost(object):
         :rtype: bool
 
         """
-        host = Host(self.session, name=hostname)
-        return host.delete()
+        return self._current_host(hostname).delete()
 
     def add_new_host(self, hostname, ipv4addr, comment=None):
         """Add or update a host in the infoblox, overwriting any IP address
-        entries.
+        entries. Only the values that differ are sent, and an existing host
+        that already matches is not saved at all.
 
         :param str hostname: Hostname to add/set
         :param str ipv4addr: IP Address to add/set
         :param str comment: The comment for the record
 
         """
-        host = Host(self.session, name=hostname)
-        if host.ipv4addrs:
-            host.ipv4addrs = []
-        host.add_ipv4addr(ipv4addr)
-        host.comment = comment
+        host = self._current_host(hostname)
+        if host.addresses() != [ipv4addr]:
+            host.ipv4addrs = [{'ipv4addr': ipv4addr}]
+        if host.comment != comment:
+            host.comment = comment
         return host.save()
 
+    def lookup_host(self, hostname):
+        """Return the name, addresses and comment of the host, or None if
+        there is no host with the name.
+
+        :param str hostname: Hostname to look up
+        :rtype: dict
+
+        """
+        from infoblox import record
+
+        host = record.Host(self.session, name=hostname)
+        if not host._ref:
+            return None
+        return {'name': host.name,
+                'ipv4addrs': host.addresses(4),
+                'ipv6addrs': host.addresses(6),
+                'comment': host.comment}
+
+    def _current_host(self, hostname):
+        """Return the host about to be changed, fetched from the appliance
+        even when the session caches responses, since a cached copy may
+        predate changes made by other clients.
+
+        :param str hostname: The hostname
+        :rtype: infoblox.record.Host
+
+        """
+        from infoblox import record
+
+        uncached = getattr(self.session, 'uncached', None)
+        if uncached is None:
+            return record.Host(self.session, name=hostname)
+        with uncached():
+            return record.Host(self.session, name=hostname)
+
+
+def add_options(parser, suppress=False):
+    """Add the options shared by all actions to the parser. The action
+    parsers suppress their defaults so the options can be passed before or
+    after the action without the action overwriting them.
+
+    :param argparse.ArgumentParser parser: The parser to add them to
+    :param bool suppress: Suppress the option defaults
+
+    """
+    def default(value):
+        return argparse.SUPPRESS if suppress else value
 
-def main():
-    parser = argparse.ArgumentParser(description=__cli_description__)
-    parser.add_argument('--version',
-                        action='version',
-                        version='%(prog)s ' + __version__)
     parser.add_argument('--debug',
                         action='store_true',
+                        default=default(False),
                         help='Enable debug output')
-    parser.add_argument('infoblox',
-                        metavar='<Infoblox Address>',
-                        action='store',
-                        help='The Infoblox hostname')
     parser.add_argument('-u', '--username',
-                        default=USERNAME,
+                        default=default(USERNAME),
                         action='store',
                         help='The username to perform the work as. '
                              'Default: %s' % USERNAME)
     parser.add_argument('-p', '--password',
-                        default=PASSWORD,
+                        default=default(PASSWORD),
                         action='store',
                         help='The password to authenticate with. '
                              'Default: %s' % PASSWORD)
-    parser.add_argument('action',
-                        choices=['add', 'remove'],
-                        help='Specify if you are adding or removing a host')
+    parser.add_argument('-c', '--cookie-file',
+                        default=default(None),
+                        action='store',
+                        help='Reuse the auth cookie stored in this file '
+                             'between runs, skipping the login')
+    parser.add_argument('-w', '--wapi-version',
+                        default=default(None),
+                        action='store',
+                        help='The WAPI version to use, eg 1.7. Batched '
+                             'writes need 1.7 or later')
+    parser.add_argument('--socket',
+                        default=default(os.environ.get(daemon.SOCKET_ENV)),
+                        action='store',
+                        help='The Unix socket of the serve action. The add, '
+                             'remove and lookup actions are forwarded to it '
+                             'when it is set. Default: $%s' %
+                             daemon.SOCKET_ENV)
+
+
+def add_arguments(parser):
+    """Add the arguments of the add action to its parser.
+
+    :param argparse.ArgumentParser parser: The action parser
+
+    """
     parser.add_argument('host',
                         metavar='<FQDN>',
                         action='store',
@@ -100,26 +181,349 @@ def main():
                         help='The IPv4 address for the host')
     parser.add_argument('comment',
                         metavar='[COMMENT]',
+                        nargs='?',
                         default='',
                         action='store',
                         help='A comment set on the host when adding.')
+
+
+def remove_arguments(parser):
+    """Add the arguments of the remove action to its parser.
+
+    :param argparse.ArgumentParser parser: The action parser
+
+    """
+    parser.add_argument('host',
+                        metavar='<FQDN>',
+                        action='store',
+                        help='The FQDN for the host')
+    parser.add_argument('ignored',
+                        metavar='[IPv4 Address] [COMMENT]',
+                        nargs='*',
+                        help=argparse.SUPPRESS)
+
+
+def lookup_arguments(parser):
+    """Add the arguments of the lookup action to its parser.
+
+    :param argparse.ArgumentParser parser: The action parser
+
+    """
+    parser.add_argument('host',
+                        metavar='<FQDN>',
+                        action='store',
+                        help='The FQDN for the host')
+
+
+def serve_arguments(parser):
+    """Add the arguments of the serve action to its parser.
+
+    :param argparse.ArgumentParser parser: The action parser
+
+    """
+    from infoblox import cache
+
+    parser.add_argument('--cache-ttl',
+                        type=int,
+                        default=cache.TTL,
+                        help='The number of seconds lookups are cached for. '
+                             'Default: %i' % cache.TTL)
+
+
+def bulk_arguments(parser):
+    """Add the arguments of the bulk action to its parser.
+
+    :param argparse.ArgumentParser parser: The action parser
+
+    """
+    from infoblox import bulk
+
+    parser.add_argument('file',
+                        nargs='?',
+                        default='-',
+                        help='The file to read, - for stdin (default)')
+    parser.add_argument('-f', '--format',
+                        choices=bulk.FORMATS,
+                        help='The input format, csv or jsonl. Default: '
+                             'csv for .csv files, otherwise jsonl')
+    parser.add_argument('-n', '--concurrency',
+                        type=int,
+                        default=bulk.CONCURRENCY,
+                        help='The number of operations to run at once. '
+                             'Default: %i' % bulk.CONCURRENCY)
+
+
+def sync_arguments(parser):
+    """Add the arguments of the sync action to its parser.
+
+    :param argparse.ArgumentParser parser: The action parser
+
+    """
+    from infoblox import sync
+
+    parser.add_argument('file',
+                        help='The JSON-lines file with one desired '
+                             'host per line, - for stdin')
+    parser.add_argument('--prune',
+                        action='store_true',
+                        help='Delete hosts that are not in the file')
+    parser.add_argument('--dry-run',
+                        action='store_true',
+                        help='Only print the changes, do not make them')
+    parser.add_argument('--zone',
+                        help='Only reconcile the hosts in this zone')
+    parser.add_argument('-b', '--batch-size',
+                        type=int,
+                        default=sync.BATCH_SIZE,
+                        help='The number of writes per request. '
+                             'Default: %i' % sync.BATCH_SIZE)
+
+
+def snapshot_arguments(parser):
+    """Add the arguments of the snapshot action to its parser.
+
+    :param argparse.ArgumentParser parser: The action parser
+
+    """
+    from infoblox import snapshot
+
+    parser.add_argument('file',
+                        help='The snapshot database file')
+    parser.add_argument('--zone',
+                        help='Only refresh the hosts in this zone')
+    parser.add_argument('-s', '--page-size',
+                        type=int,
+                        default=snapshot.PAGE_SIZE,
+                        help='The number of hosts per request. '
+                             'Default: %i' % snapshot.PAGE_SIZE)
+
+
+# The name, help and argument function of each action, in help order
+ACTIONS = [('add', 'Add or update a host', add_arguments),
+           ('remove', 'Remove a host', remove_arguments),
+           ('lookup', 'Print a host as JSON, exiting with an error status if '
+                      'it does not exist', lookup_arguments),
+           ('serve', 'Keep a session to the appliance open and perform the '
+                     'add, remove and lookup actions forwarded to the '
+                     '--socket Unix socket', serve_arguments),
+           ('bulk', 'Add and remove hosts read from CSV or JSON-lines input, '
+                    'writing a JSON line with the result of each',
+            bulk_arguments),
+           ('sync', 'Create, update and delete hosts so the appliance '
+                    'matches the desired state read from a JSON-lines file',
+            sync_arguments),
+           ('snapshot', 'Create or refresh a local SQLite copy of the host '
+                        'records for offline queries', snapshot_arguments)]
+
+
+def build_parser(argv=None):
+    """Return the argument parser for the command line app. If the command
+    line is passed in, only the arguments of the actions named in it are
+    added, so that the modules of the other actions are not imported.
+
+    :param list argv: The command line arguments
+    :rtype: argparse.ArgumentParser
+
+    """
+    parser = argparse.ArgumentParser(description=__cli_description__)
+    parser.add_argument('--version',
+                        action='version',
+                        version='%(prog)s ' + __version__)
+    parser.add_argument('infoblox',
+                        metavar='<Infoblox Address>',
+                        action='store',
+                        help='The Infoblox hostname')
+    add_options(parser)
+    actions = parser.add_subparsers(dest='action', metavar='action',
+                                    help='The action to perform')
+    actions.required = True
+    for name, help_text, arguments in ACTIONS:
+        action = actions.add_parser(name, help=help_text)
+        add_options(action, True)
+        if argv is None or name in argv:
+            arguments(action)
+    return parser
+
+
+def connect(args, **kwargs):
+    """Return the API object for the parsed command line arguments.
+
+    :param dict args: The parsed command line arguments
+    :param dict kwargs: Additional :class:`infoblox.Session` arguments
+    :rtype: InfobloxHost
+
+    """
+    return InfobloxHost(args['infoblox'],
+                        args['username'],
+                        args['password'],
+                        args['cookie_file'],
+                        wapi_version=args['wapi_version'],
+                        **kwargs)
+
+
+def forward(args):
+    """Perform the add, remove or lookup action with the daemon listening
+    on the socket, falling back to connecting to the appliance directly if
+    there is no daemon. Once the request was sent to the daemon, errors are
+    raised instead, so that the action is never performed twice.
+
+    :param dict args: The parsed command line arguments
+    :rtype: mixed
+    :raises: infoblox.exceptions.DaemonError
+
+    """
+    payload = dict((key, args.get(key))
+                   for key in ('action', 'host', 'address', 'comment'))
+    payload['infoblox'] = args['infoblox']
+    try:
+        return daemon.request(args['socket'], payload)
+    except socket.error as error:
+        if error.errno not in (errno.ENOENT, errno.ECONNREFUSED):
+            raise exceptions.DaemonError(
+                'Could not connect to the daemon on %s: %s' %
+                (args['socket'], error or error.__class__.__name__))
+        LOGGER.warning('Could not connect to the daemon on %s (%s), '
+                       'connecting to %s directly', args['socket'], error,
+                       args['infoblox'])
+    return daemon.execute(connect(args), args)
+
+
+def run_serve(args):
+    """Run the serve action until interrupted, returning the exit status.
+
+    :param dict args: The parsed command line arguments
+    :rtype: int
+
+    """
+    from infoblox import cache
+
+    infoblox = connect(args, session_class=cache.CachingSession,
+                       ttl=args['cache_ttl'])
+    server = daemon.Daemon(args['socket'], infoblox, args['infoblox'])
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    sys.stderr.write('Serving %s on %s\n' % (args['infoblox'],
+                                             args['socket']))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def run_sync(args):
+    """Run the sync action, returning the exit status.
+
+    :param dict args: The parsed command line arguments
+    :rtype: int
+
+    """
+    from infoblox import sync
+
+    criteria = {'zone': args['zone']} if args['zone'] else {}
+    counts = {'create': 0, 'update': 0, 'delete': 0, 'error': 0}
+    start = time.time()
+    try:
+        if args['file'] == '-':
+            desired = sync.read_desired(sys.stdin)
+        else:
+            with open(args['file']) as handle:
+                desired = sync.read_desired(handle)
+        for change in sync.sync(connect(args).session, desired,
+                                args['prune'], args['dry_run'],
+                                args['batch_size'], **criteria):
+            counts[change['action']] += 1
+            sys.stdout.write(json.dumps(change, sort_keys=True) + '\n')
+            sys.stdout.flush()
+    except ValueError as error:
+        sys.stderr.write('%s\n' % error)
+        return 1
+    counts['duration'] = time.time() - start
+    sys.stderr.write('%(create)i created, %(update)i updated, %(delete)i '
+                     'deleted, %(error)i failed in %(duration).2f '
+                     'seconds\n' % counts)
+    return 1 if counts['error'] else 0
+
+
+def run_bulk(args):
+    """Run the bulk action, returning the exit status.
+
+    :param dict args: The parsed command line arguments
+    :rtype: int
+
+    """
+    from infoblox import bulk
+
+    input_format = args['format'] or ('csv' if args['file'].endswith('.csv')
+                                      else 'jsonl')
+    infoblox = connect(args, pool_maxsize=args['concurrency'])
+    if args['file'] == '-':
+        summary = bulk.process(infoblox, sys.stdin, sys.stdout, input_format,
+                               args['concurrency'])
+    else:
+        with open(args['file']) as handle:
+            summary = bulk.process(infoblox, handle, sys.stdout,
+                                   input_format, args['concurrency'])
+    sys.stderr.write('Processed %(total)i operations (%(succeeded)i '
+                     'succeeded, %(failed)i failed) in %(duration).2f '
+                     'seconds, %(rate).1f operations/second\n' % summary)
+    return 1 if summary['failed'] else 0
+
+
+def run_snapshot(args):
+    """Run the snapshot action, returning the exit status.
+
+    :param dict args: The parsed command line arguments
+    :rtype: int
+
+    """
+    from infoblox import snapshot
+
+    start = time.time()
+    with snapshot.Snapshot(args['file']) as local:
+        counts = local.refresh(connect(args).session, args['zone'],
+                               args['page_size'])
+        counts['total'] = len(local)
+    counts['duration'] = time.time() - start
+    sys.stderr.write('%(added)i added, %(updated)i updated, %(removed)i '
+                     'removed, %(unchanged)i unchanged, %(total)i hosts in '
+                     'the snapshot, in %(duration).2f seconds\n' % counts)
+    return 0
+
+
+def main():
+    parser = build_parser(sys.argv[1:])
     args = vars(parser.parse_args())
     if args['debug']:
         logging.basicConfig(level=logging.DEBUG)
-    infoblox = InfobloxHost(args['infoblox'],
-                            args['username'],
-                            args['password'])
-    if args['action'] == 'add':
-        if infoblox.add_new_host(args['host'], args['address'],
-                                 args['comment']):
-            sys.stdout.write('Host added\n')
-        else:  # Exit with an error status
+    if args['action'] == 'serve':
+        if not args['socket']:
+            parser.error('serve requires --socket or $%s' %
+                         daemon.SOCKET_ENV)
+        sys.exit(run_serve(args))
+    elif args['action'] == 'bulk':
+        sys.exit(run_bulk(args))
+    elif args['action'] == 'snapshot':
+        sys.exit(run_snapshot(args))
+    elif args['action'] == 'sync':
+        sys.exit(run_sync(args))
+    if args['socket']:
+        try:
+            result = forward(args)
+        except exceptions.DaemonError as error:
+            sys.stderr.write('%s\n' % error)
             sys.exit(1)
+    else:
+        result = daemon.execute(connect(args), args)
+    if not result:  # Exit with an error status
+        sys.exit(1)
+    elif args['action'] == 'add':
+        sys.stdout.write('Host added\n')
+    elif args['action'] == 'lookup':
+        sys.stdout.write(json.dumps(result, sort_keys=True) + '\n')
     elif args['action'] == 'remove':
-        if infoblox.delete_old_host(args['host']):
-            sys.stdout.write('Host removed\n')
-        else:  # Exit with an error status
-            sys.exit(1)
+        sys.stdout.write('Host removed\n')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,109 @@
+"""
+JSON encoding and decoding of WAPI payloads, using the fastest library that
+is installed: `orjson <https://pypi.org/project/orjson/>`_, then
+`ujson <https://pypi.org/project/ujson/>`_, falling back to the standard
+library :mod:`json` module. :func:`encode` returns UTF-8 encoded bytes for
+request bodies, and :func:`loads` decodes response bodies from the bytes
+received, without decoding them to text first where the library allows it.
+
+Example::
+
+    infoblox.codec.use('json')  # Select a library explicitly
+    print(infoblox.codec.name)
+
+"""
+import json
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# The libraries in order of preference
+PREFERENCE = ('orjson', 'ujson', 'json')
+
+# json.loads() only accepts bytes on Python 2 and from Python 3.6
+_LOADS_BYTES = sys.version_info < (3,) or sys.version_info >= (3, 6)
+
+# The library in use and its functions, set by use()
+name = None
+encode = None
+loads = None
+
+
+def _json_encode(value, default=None):
+    return json.dumps(value, default=default, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(data):
+    if isinstance(data, bytes) and not _LOADS_BYTES:
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+def _orjson_encode(value, default=None):
+    return orjson.dumps(value, default=default)
+
+
+def _ujson_encode(value, default=None):
+    kwargs = {'default': default} if default else {}
+    return ujson.dumps(value, ensure_ascii=False,
+                       escape_forward_slashes=False, **kwargs).encode('utf-8')
+
+
+# The encode and loads functions of each library
+_CODECS = {'json': (_json_encode, _json_loads),
+           'orjson': (_orjson_encode, getattr(orjson, 'loads', None)),
+           'ujson': (_ujson_encode, getattr(ujson, 'loads', None))}
+
+_MODULES = {'json': json, 'orjson': orjson, 'ujson': ujson}
+
+
+def available():
+    """Return the names of the installed libraries, in order of preference.
+
+    :rtype: list
+
+    """
+    return [library for library in PREFERENCE
+            if _MODULES[library] is not None]
+
+
+def use(library=None):
+    """Encode and decode with the library, or with the preferred installed
+    library if none is passed in.
+
+    :param str library: One of ``orjson``, ``ujson`` or ``json``
+    :raises: ValueError
+
+    """
+    global encode, loads, name
+    if library is None:
+        library = available()[0]
+    elif library not in available():
+        raise ValueError('JSON library %r is not available, choose from %s' %
+                         (library, ', '.join(available())))
+    encode, loads = _CODECS[library]
+    name = library
+
+
+def dumps(value, default=None):
+    """Return the value encoded as JSON text.
+
+    :param mixed value: The value to encode
+    :param callable default: Returns a serializable version of values that
+        can not be encoded
+    :rtype: str
+
+    """
+    return encode(value, default).decode('utf-8')
+
+
+use()
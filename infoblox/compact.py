@@ -0,0 +1,171 @@
+"""
+Compact counterparts of the record classes for holding large inventories in
+memory. The classes store their fields and private attributes in
+``__slots__``, so the ``__dict__`` that instances inherit from the regular
+classes stays empty. A host with two addresses takes about a third of the
+memory of a regular one, while keeping the
+:class:`infoblox.mapping.Mapping` interface and the behaviour of the classes
+they extend.
+
+Example::
+
+    for host in infoblox.compact.Host.iterate(session, zone='bar.net'):
+        inventory[host.name] = host
+
+Records built from WAPI responses, including the nested host addresses, are
+compact as well. See ``benchmarks/record_memory.py`` for a comparison with
+the regular classes.
+
+"""
+import types
+
+from infoblox import record
+
+# Private attributes set on record instances
+PRIVATE = ('_changed', '_dirty', '_extra', '_partial', '_persisted', '_ref',
+           '_search_values', '_session')
+
+# Class level defaults of the slots of each compact class
+_DEFAULTS = {}
+
+
+def slots(cls):
+    """Return the slots for a compact version of the record class: its
+    fields and the private attributes set on record instances.
+
+    :param class cls: The record class
+    :rtype: tuple
+
+    """
+    return tuple(cls._fields()[0]) + PRIVATE
+
+
+class CompactRecord(object):
+    """Mixin that stores the fields of a record class in slots. Fields that
+    have not been set on the instance fall back to the class defaults, as
+    they do for the regular classes. Values set for names that are not
+    fields are kept, and tracked so they remain mapping keys.
+
+    """
+    __slots__ = ()
+
+    _extra = ()
+
+    def __contains__(self, item):
+        return item in self._fields()[1] or item in self._extra
+
+    def __delattr__(self, key):
+        super(CompactRecord, self).__delattr__(key)
+        if key in self._extra:
+            self._extra = tuple(k for k in self._extra if k != key)
+
+    def __getattr__(self, name):
+        """Return the class default for a slot that has not been set.
+
+        :param str name: The attribute name
+        :rtype: mixed
+        :raises: AttributeError
+
+        """
+        try:
+            return _defaults(type(self))[name]
+        except KeyError:
+            raise AttributeError('%r object has no attribute %r' %
+                                 (type(self).__name__, name))
+
+    def __setattr__(self, key, value):
+        if (key[0] != '_' and key not in self._fields()[1] and
+                key not in self._extra):
+            super(CompactRecord, self).__setattr__(
+                '_extra', self._extra + (key,))
+        super(CompactRecord, self).__setattr__(key, value)
+
+    def clear(self):
+        for key in self.keys():
+            if self._is_set(key):
+                delattr(self, key)
+
+    def keys(self):
+        names = self._fields()[0]
+        if self._extra:
+            return sorted(names + list(self._extra))
+        return list(names)
+
+    def _is_instance_key(self, key):
+        return key in self._extra
+
+    def _is_set(self, key):
+        """Check if the attribute is set on the instance rather than falling
+        back to the class default.
+
+        :param str key: The attribute name
+        :rtype: bool
+
+        """
+        try:
+            object.__getattribute__(self, key)
+        except AttributeError:
+            return False
+        return key in self._extra or key in self.__slots__
+
+    def _record_class(self, reference):
+        return get_class(reference)
+
+
+class Host(CompactRecord, record.Host):
+    __doc__ = record.Host.__doc__
+    __slots__ = slots(record.Host)
+
+
+class HostIPv4(CompactRecord, record.HostIPv4):
+    __doc__ = record.HostIPv4.__doc__
+    __slots__ = slots(record.HostIPv4)
+
+
+class HostIPv6(CompactRecord, record.HostIPv6):
+    __doc__ = record.HostIPv6.__doc__
+    __slots__ = slots(record.HostIPv6)
+
+
+class IPv4Address(CompactRecord, record.IPv4Address):
+    __doc__ = record.IPv4Address.__doc__
+    __slots__ = slots(record.IPv4Address)
+
+
+def get_class(reference):
+    """Return the compact record class for the reference id.
+
+    :param str reference: The reference id
+    :rtype: class
+
+    """
+    return CLASS_MAP.get(record.get_class(reference))
+
+
+def _defaults(cls):
+    """Return the class level defaults for the slots of a compact class,
+    found on the regular record class it extends.
+
+    :param class cls: The compact record class
+    :rtype: dict
+
+    """
+    try:
+        return _DEFAULTS[cls]
+    except KeyError:
+        defaults = {}
+        for name in cls.__slots__:
+            for base in cls.__mro__:
+                value = base.__dict__.get(name, defaults)
+                if value is not defaults and not isinstance(
+                        value, types.MemberDescriptorType):
+                    defaults[name] = value
+                    break
+        _DEFAULTS[cls] = defaults
+        return defaults
+
+
+CLASS_MAP = {record.Host: Host,
+             record.HostIPv4: HostIPv4,
+             record.HostIPv6: HostIPv6,
+             record.IPv4Address: IPv4Address}
@@ -0,0 +1,193 @@
+"""
+A long running ``infoblox-host`` process that keeps a warm session, with its
+pooled connections, auth cookie and response cache, and performs the add,
+remove and lookup actions requested by thin clients over a Unix domain
+socket.
+
+Each request and response is a JSON object on a single line::
+
+    {"action": "add", "host": "foo.bar.net", "address": "10.0.0.1"}
+    {"result": true}
+
+"""
+import errno
+import json
+import logging
+import os
+import socket
+import stat
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+from infoblox import exceptions
+
+LOGGER = logging.getLogger(__name__)
+
+# The actions that can be forwarded to the daemon
+ACTIONS = ('add', 'lookup', 'remove')
+
+# The environment variable with the default socket path for the CLI
+SOCKET_ENV = 'INFOBLOX_HOST_SOCKET'
+
+TIMEOUT = 60
+
+
+def execute(infoblox, request):
+    """Perform an action with the API object, returning its result.
+
+    :param infoblox.cli.InfobloxHost infoblox: The API object
+    :param dict request: The ``action`` and its arguments
+    :rtype: mixed
+    :raises: ValueError
+
+    """
+    action = request.get('action')
+    if action == 'add':
+        return infoblox.add_new_host(request['host'], request['address'],
+                                     request.get('comment'))
+    elif action == 'lookup':
+        return infoblox.lookup_host(request['host'])
+    elif action == 'remove':
+        return infoblox.delete_old_host(request['host'])
+    raise ValueError('Unsupported action: %r' % action)
+
+
+def request(path, payload, timeout=TIMEOUT):
+    """Send a request to the daemon listening on the socket, returning the
+    result of the action. Only failing to connect raises
+    :exc:`socket.error`. Errors once the request may have been sent raise
+    :exc:`~infoblox.exceptions.DaemonError`, since the daemon may have
+    performed the action.
+
+    :param str path: The daemon's socket
+    :param dict payload: The request
+    :param float timeout: Seconds to wait for the connection and response
+    :rtype: mixed
+    :raises: socket.error
+    :raises: infoblox.exceptions.DaemonError
+
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(path)
+        try:
+            client.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+            line = client.makefile('rb').readline()
+        except socket.error as error:
+            raise exceptions.DaemonError(
+                'The request to the daemon failed and may have been '
+                'performed: %s' % (error or error.__class__.__name__))
+    finally:
+        client.close()
+    if not line:
+        raise exceptions.DaemonError('The daemon closed the connection')
+    response = json.loads(line.decode('utf-8'))
+    if 'error' in response:
+        raise exceptions.DaemonError(response['error'])
+    return response['result']
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Reads requests from a client connection, one per line, until the
+    client closes it.
+
+    """
+    def handle(self):
+        for line in self.rfile:
+            response = self.server.dispatch(line)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves the actions of an API object on a Unix domain socket. The
+    socket is only accessible to the user running the daemon, since requests
+    are made with the daemon's credentials. A stale socket file left behind
+    by a daemon that exited is replaced.
+
+    Example::
+
+        server = infoblox.daemon.Daemon('/run/infoblox.sock', infoblox,
+                                        '10.0.0.2')
+        server.serve_forever()
+
+    :param str path: The socket to listen on
+    :param infoblox.cli.InfobloxHost infoblox: The API object
+    :param str address: The Infoblox appliance the API object connects to,
+        requests for other appliances are rejected
+
+    """
+    daemon_threads = True
+
+    def __init__(self, path, infoblox, address):
+        self.address = address
+        self.infoblox = infoblox
+        self.path = path
+        _remove_stale(path)
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(self, path, Handler)
+        finally:
+            os.umask(umask)
+
+    def dispatch(self, line):
+        """Perform the request read from a client, returning the response.
+
+        :param bytes line: The JSON encoded request
+        :rtype: dict
+
+        """
+        try:
+            payload = json.loads(line.decode('utf-8'))
+            if payload.get('infoblox', self.address) != self.address:
+                raise ValueError('This daemon serves %s, not %s' %
+                                 (self.address, payload['infoblox']))
+            if payload.get('action') not in ACTIONS:
+                raise ValueError('Unsupported action: %r' %
+                                 payload.get('action'))
+            return {'result': execute(self.infoblox, payload)}
+        except Exception as error:
+            LOGGER.debug('Request %r failed: %r', line, error)
+            return {'error': '%s: %s' % (error.__class__.__name__, error)}
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def _remove_stale(path):
+    """Remove the socket file if no daemon is listening on it. Paths that
+    are not sockets are never removed.
+
+    :param str path: The socket
+    :raises: infoblox.exceptions.DaemonError
+
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except OSError as error:
+        if error.errno == errno.ENOENT:
+            return
+        raise exceptions.DaemonError('Could not check %s: %s' %
+                                     (path, error))
+    if not stat.S_ISSOCK(mode):
+        raise exceptions.DaemonError('%s exists and is not a socket' % path)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except socket.error as error:
+        if error.errno != errno.ECONNREFUSED:
+            raise exceptions.DaemonError('Could not check %s: %s' %
+                                         (path, error))
+        LOGGER.debug('Removing stale socket %s', path)
+        os.unlink(path)
+    else:
+        raise exceptions.DaemonError('A daemon is already listening on %s' %
+                                     path)
+    finally:
+        client.close()
@@ -1,6 +1,15 @@
 """Infoblox Exceptions"""
 
 class ProtocolError(Exception):
+    """An error response from the Infoblox device, with its HTTP status code
+    in ``status_code`` when it is known.
+
+    """
+    status_code = None
 
     def __repr__(self):
         return '<%s %s>' % (self.__class__.__name__, self.args[1])
+
+
+class DaemonError(Exception):
+    """An error reported by the ``infoblox-host serve`` daemon."""
@@ -0,0 +1,331 @@
+"""
+An in-memory index of host records for answering lookups without querying
+the Infoblox appliance.
+
+Example::
+
+    index = infoblox.index.HostIndex.load(session)
+    session.add_observer(index)
+
+    host = index.get('foo.bar.net')
+    hosts = index.in_network('10.0.0.0/24')
+
+"""
+import array
+import bisect
+import collections
+import logging
+import threading
+
+import ipaddress
+
+from infoblox import record
+
+LOGGER = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+
+
+class SortedKeys(object):
+    """Sorted keys, each with the reference id of the host it belongs to, for
+    range queries with :mod:`bisect`. The keys are kept in ``container``,
+    eg an unsigned integer :class:`array.array` for IPv4 addresses.
+
+    :param callable container: Returns a new, empty sequence for the keys
+
+    """
+    def __init__(self, container=list):
+        self.container = container
+        self.keys = container()
+        self.refs = []
+
+    def __len__(self):
+        return len(self.refs)
+
+    def add(self, key, ref):
+        offset = bisect.bisect_right(self.keys, key)
+        self.keys.insert(offset, key)
+        self.refs.insert(offset, ref)
+
+    def extend(self, pairs):
+        """Add many keys at once, sorting once instead of for each key.
+
+        :param list pairs: ``(key, reference id)`` tuples
+
+        """
+        pairs = sorted(list(zip(self.keys, self.refs)) + list(pairs),
+                       key=lambda pair: pair[0])
+        self.keys = self.container(pair[0] for pair in pairs)
+        self.refs = [pair[1] for pair in pairs]
+
+    def discard(self, key, ref):
+        offset = bisect.bisect_left(self.keys, key)
+        while offset < len(self.keys) and self.keys[offset] == key:
+            if self.refs[offset] == ref:
+                del self.keys[offset]
+                del self.refs[offset]
+                return
+            offset += 1
+
+    def range(self, low, high):
+        """Return the reference ids for the keys from ``low`` up to and
+        including ``high``, in key order.
+
+        :rtype: list
+
+        """
+        return self.refs[bisect.bisect_left(self.keys, low):
+                         bisect.bisect_right(self.keys, high)]
+
+
+class HostIndex(object):
+    """Indexes host records by name, MAC address, IPv4 and IPv6 address and
+    DNS zone. Names and MAC addresses are kept in hash maps, and addresses
+    and reversed names are kept sorted so that CIDR and zone lookups are
+    range queries.
+
+    Added to a session with :meth:`infoblox.Session.add_observer`, the index
+    is updated as hosts are saved and deleted through the session.
+
+    :param iterable hosts: The hosts to index
+
+    """
+    def __init__(self, hosts=()):
+        self._hosts = {}
+        self._keys = {}
+        self._lock = threading.RLock()
+        self._macs = collections.defaultdict(set)
+        self._names = {}
+        self._networks = {4: SortedKeys(lambda *args: array.array('L',
+                                                                    *args)),
+                          6: SortedKeys()}
+        self._zones = SortedKeys()
+        self.update(hosts)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._hosts.values()))
+
+    def __len__(self):
+        return len(self._hosts)
+
+    @classmethod
+    def load(cls, session, page_size=PAGE_SIZE, **criteria):
+        """Return an index of the hosts matching the search criteria, read
+        from the appliance page by page.
+
+        :param infoblox.Session session: The infoblox session object
+        :param int page_size: The number of hosts to request per page
+        :param dict criteria: WAPI search arguments
+        :rtype: HostIndex
+
+        """
+        return cls(record.Host.iterate(session, page_size, **criteria))
+
+    def add(self, host):
+        """Add the host to the index, replacing the entry with the same
+        reference id if there is one.
+
+        :param infoblox.record.Host host: The host to add
+
+        """
+        keys = _keys(host)
+        with self._lock:
+            self.discard(host._ref)
+            self._insert(host, keys)
+            for family, values in ((4, keys[2]), (6, keys[3])):
+                for value in values:
+                    self._networks[family].add(value, host._ref)
+            self._zones.add(keys[4], host._ref)
+
+    def discard(self, ref):
+        """Remove the host with the reference id from the index, if it is
+        in the index.
+
+        :param str ref: The host's reference id
+
+        """
+        with self._lock:
+            keys = self._keys.pop(ref, None)
+            if keys is None:
+                return
+            del self._hosts[ref]
+            name, macs, ipv4, ipv6, zone = keys
+            if self._names.get(name) == ref:
+                del self._names[name]
+            for mac in macs:
+                self._macs[mac].discard(ref)
+                if not self._macs[mac]:
+                    del self._macs[mac]
+            for family, values in ((4, ipv4), (6, ipv6)):
+                for value in values:
+                    self._networks[family].discard(value, ref)
+            self._zones.discard(zone, ref)
+
+    def update(self, hosts):
+        """Add many hosts at once, sorting the address and zone indexes once
+        for all of them.
+
+        :param iterable hosts: The hosts to add
+
+        """
+        pending = {4: [], 6: [], 'zones': []}
+        with self._lock:
+            for host in hosts:
+                if host._ref in self._hosts:
+                    self.add(host)
+                    continue
+                keys = _keys(host)
+                self._insert(host, keys)
+                pending[4] += [(value, host._ref) for value in keys[2]]
+                pending[6] += [(value, host._ref) for value in keys[3]]
+                pending['zones'].append((keys[4], host._ref))
+            for family in (4, 6):
+                if pending[family]:
+                    self._networks[family].extend(pending[family])
+            if pending['zones']:
+                self._zones.extend(pending['zones'])
+
+    def get(self, name):
+        """Return the host with the name, or None if it is not indexed.
+
+        :param str name: The host's FQDN
+        :rtype: infoblox.record.Host
+
+        """
+        with self._lock:
+            return self._hosts.get(self._names.get(name))
+
+    def by_address(self, address):
+        """Return the hosts with the IPv4 or IPv6 address.
+
+        :param str address: The address
+        :rtype: list
+        :raises: ValueError
+
+        """
+        value = ipaddress.ip_address(_text(address))
+        return self._range(value.version, int(value), int(value))
+
+    def by_mac(self, mac):
+        """Return the hosts with an address that has the MAC address.
+
+        :param str mac: The MAC address
+        :rtype: list
+
+        """
+        with self._lock:
+            return [self._hosts[ref]
+                    for ref in sorted(self._macs.get(mac.lower(), ()))]
+
+    def in_network(self, network):
+        """Return the hosts with an address in the network, ordered by
+        address.
+
+        :param str network: The network in CIDR notation, eg ``10.0.0.0/24``
+        :rtype: list
+        :raises: ValueError
+
+        """
+        value = ipaddress.ip_network(_text(network), strict=False)
+        return self._range(value.version, int(value.network_address),
+                           int(value.broadcast_address))
+
+    def in_zone(self, zone):
+        """Return the hosts in the DNS zone or its sub-zones, ordered by
+        reversed name.
+
+        :param str zone: The zone, eg ``bar.net``
+        :rtype: list
+
+        """
+        key = _reversed(zone)
+        with self._lock:
+            refs = self._zones.range(key + '.', key + '/')
+            if self._names.get(zone):
+                refs.insert(0, self._names[zone])
+            return [self._hosts[ref] for ref in refs]
+
+    def record_deleted(self, obj, ref):
+        """Remove a host that was deleted through an observed session.
+
+        :param infoblox.record.Record obj: The deleted record
+        :param str ref: The record's reference id
+
+        """
+        if isinstance(obj, record.Host):
+            self.discard(ref)
+
+    def record_saved(self, obj, ref=None):
+        """Index a host that was saved through an observed session, removing
+        it under the reference id it had before, which changes when a host
+        is renamed.
+
+        :param infoblox.record.Record obj: The saved record
+        :param str ref: The record's reference id before it was saved
+
+        """
+        if isinstance(obj, record.Host):
+            if ref and ref != obj._ref:
+                self.discard(ref)
+            if obj._ref:
+                self.add(obj)
+
+    def _insert(self, host, keys):
+        """Add the host to the hash maps, recording the keys it was indexed
+        with so that it can be removed after it changed.
+
+        """
+        self._hosts[host._ref] = host
+        self._keys[host._ref] = keys
+        if keys[0]:
+            self._names[keys[0]] = host._ref
+        for mac in keys[1]:
+            self._macs[mac].add(host._ref)
+
+    def _range(self, family, low, high):
+        with self._lock:
+            hosts, seen = [], set()
+            for ref in self._networks[family].range(low, high):
+                if ref not in seen:
+                    seen.add(ref)
+                    hosts.append(self._hosts[ref])
+            return hosts
+
+
+def _keys(host):
+    """Return the index keys of the host: its name, MAC addresses, IPv4 and
+    IPv6 addresses as integers and its reversed name.
+
+    :param infoblox.record.Host host: The host
+    :rtype: tuple
+
+    """
+    addresses = {4: set(), 6: set()}
+    for family in (4, 6):
+        for address in host.addresses(family):
+            try:
+                addresses[family].add(int(ipaddress.ip_address(
+                    _text(address))))
+            except ValueError:
+                LOGGER.debug('Not indexing address %r of %s', address,
+                             host.name)
+    macs = set()
+    for address in host.ipv4addrs or []:
+        mac = (address.get('mac') if isinstance(address, dict)
+               else getattr(address, 'mac', None))
+        if mac:
+            macs.add(mac.lower())
+    return (host.name, frozenset(macs), sorted(addresses[4]),
+            sorted(addresses[6]), _reversed(host.name or ''))
+
+
+def _reversed(name):
+    return '.'.join(reversed(name.rstrip('.').split('.')))
+
+
+def _text(value):
+    return value.decode('ascii') if isinstance(value, bytes) else value
@@ -3,12 +3,27 @@ A generic mapping object that allows access to attributes and via getters and
 setters.
 
 """
-import collections
-import inspect
-import json
+import types
 
+try:
+    from collections.abc import Mapping as _Mapping
+except ImportError:
+    from collections import Mapping as _Mapping
 
-class Mapping(collections.Mapping):
+from infoblox import codec
+
+# Public attribute names of each Mapping subclass, computed on first use
+_FIELDS = {}
+
+# Shared by clean mappings, frozenset() allocates a new set on each call
+_UNCHANGED = frozenset()
+
+# The types of functions and methods, checked without importing inspect
+_ROUTINES = (types.BuiltinFunctionType, types.FunctionType, types.MethodType,
+             type(str.join))
+
+
+class Mapping(_Mapping):
     """A generic data object that provides access to attributes via getters
     and setters, built in serialization via JSON, iterator methods
     and other Mapping methods.
@@ -17,6 +32,9 @@ class Mapping(collections.Mapping):
     # Flag indicating the mapping has changed attributes
     _dirty = False
 
+    # Names of the attributes changed since the mapping was last clean
+    _changed = _UNCHANGED
+
     def __init__(self, **kwargs):
         """Assign all kwargs passed in as attributes of the object."""
         self.from_dict(kwargs)
@@ -27,7 +45,7 @@ class Mapping(collections.Mapping):
         :param str item: The attribute name
 
         """
-        return item in self.keys()
+        return item in self._fields()[1] or self._is_instance_key(item)
 
     def __eq__(self, other):
         """Test another mapping for equality against this one
@@ -48,7 +66,7 @@ class Mapping(collections.Mapping):
         :raises: KeyError
 
         """
-        if key not in self.keys():
+        if key not in self:
             raise KeyError(key)
         delattr(self, key)
 
@@ -60,7 +78,7 @@ class Mapping(collections.Mapping):
         :raises: KeyError
 
         """
-        if item not in self.keys():
+        if item not in self:
             raise KeyError(item)
         return getattr(self, item)
 
@@ -113,8 +131,11 @@ class Mapping(collections.Mapping):
         :param mixed value: The value to set
 
         """
-        if key[0] != '_' and not self._dirty:
-            self._dirty = True
+        if key[0] != '_':
+            if not self._dirty:
+                self._dirty = True
+            if key not in self._changed:
+                self._changed = self._changed | frozenset([key])
         super(Mapping, self).__setattr__(key, value)
 
     def __setitem__(self, key, value):
@@ -145,11 +166,23 @@ class Mapping(collections.Mapping):
             setattr(self, k, values[k])
 
     def clear(self):
-        """Clear all set attributes in the mapping.
+        """Clear all set attributes in the mapping. Attributes that only
+        exist as class level defaults are left in place.
 
         """
         for key in self.keys():
-            delattr(self, key)
+            if key in self.__dict__:
+                delattr(self, key)
+
+    @property
+    def changed(self):
+        """Return the names of the attributes that have been set since the
+        mapping was last marked as clean.
+
+        :rtype: set
+
+        """
+        return set(self._changed)
 
     @property
     def dirty(self):
@@ -161,20 +194,21 @@ class Mapping(collections.Mapping):
         return self._dirty
 
     def dumps(self):
-        """Return a JSON serialized version of the mapping.
+        """Return a JSON serialized version of the mapping. Nested mappings
+        are serialized as objects.
 
         :rtype: str|unicode
 
         """
-        return json.dumps(self.as_dict(), encoding='utf-8', ensure_ascii=False)
+        return codec.dumps(self.as_dict(), _serializable)
 
     def loads(self, value):
         """Load in a serialized value, overwriting any previous values.
 
-        :param str|unicode value: The serialized value
+        :param bytes|str|unicode value: The serialized value
 
         """
-        self.from_dict(json.loads(value, encoding='utf-8'))
+        self.from_dict(codec.loads(value))
 
     def keys(self):
         """Return a list of attribute names for the mapping.
@@ -182,13 +216,12 @@ class Mapping(collections.Mapping):
         :rtype: list
 
         """
-        return sorted([k for k in dir(self) if
-                       k[0:1] != '_' and k != 'keys' and not k.isupper() and
-                       not inspect.ismethod(getattr(self, k)) and
-                       not (hasattr(self.__class__, k) and
-                            isinstance(getattr(self.__class__, k),
-                                       property)) and
-                       not isinstance(getattr(self, k), property)])
+        names, fields = self._fields()
+        extra = [k for k in self.__dict__ if k not in fields and
+                 self._is_instance_key(k)]
+        if extra:
+            return sorted(names + extra)
+        return list(names)
 
     def get(self, key, default=None):
         """Get the value of key, passing in a default value if it is not set.
@@ -242,6 +275,44 @@ class Mapping(collections.Mapping):
         """
         return setattr(self, key, value)
 
+    @classmethod
+    def _fields(cls):
+        """Return the sorted attribute names defined by the class along with
+        a set of them for membership tests. The names are computed once per
+        class instead of inspecting the object on every call.
+
+        :rtype: tuple(list, frozenset)
+
+        """
+        try:
+            return _FIELDS[cls]
+        except KeyError:
+            names = [k for k in dir(cls) if
+                     k[0:1] != '_' and k != 'keys' and not k.isupper() and
+                     not isinstance(getattr(cls, k), _ROUTINES) and
+                     not isinstance(getattr(cls, k), property)]
+            _FIELDS[cls] = names, frozenset(names)
+            return _FIELDS[cls]
+
+    def _mark_clean(self):
+        """Reset the change tracking, indicating the mapping matches its
+        persisted state.
+
+        """
+        self._dirty = False
+        self._changed = _UNCHANGED
+
+    def _is_instance_key(self, key):
+        """Check if the attribute set on the instance is part of the mapping.
+
+        :param str key: The attribute name
+        :rtype: bool
+
+        """
+        return (key in self.__dict__ and key[0:1] != '_' and
+                not key.isupper() and
+                not isinstance(self.__dict__[key], types.MethodType))
+
     def values(self):
         """Return a list of values for this mapping in attribute name order.
 
@@ -249,3 +320,16 @@ class Mapping(collections.Mapping):
 
         """
         return [getattr(self, k) for k in self.keys()]
+
+
+def _serializable(value):
+    """Return a JSON serializable version of a nested mapping.
+
+    :param mixed value: The value that could not be encoded
+    :rtype: dict
+    :raises: TypeError
+
+    """
+    if isinstance(value, Mapping):
+        return value.as_dict()
+    raise TypeError('%r is not JSON serializable' % value)
@@ -0,0 +1,183 @@
+"""
+Request instrumentation for :class:`infoblox.Session`, with in-memory
+counters and latency histograms that can be exported in the Prometheus text
+exposition format.
+
+"""
+import bisect
+import collections
+import threading
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+           2.5, 5.0, 10.0)
+
+PREFIX = 'infoblox_request'
+
+
+class RequestEvent(object):
+    """Describes a single HTTP request sent to the Infoblox appliance. It is
+    passed to each hook added with :meth:`infoblox.Session.add_hook`.
+
+    Times are in seconds. ``connect`` is the time spent opening a new
+    connection, including the TLS handshake, and is ``0.0`` when a pooled
+    connection was reused. ``wait`` is the time spent sending the request
+    and waiting for the response headers, and ``decode`` is the time spent
+    decoding the JSON body. ``status`` is None and ``error`` is set when no
+    response was received.
+
+    """
+    __slots__ = ['method', 'path', 'wapi_type', 'status', 'bytes_sent',
+                 'bytes_received', 'connect', 'wait', 'decode', 'duration',
+                 'error']
+
+    def __init__(self, method, path, status=None, bytes_sent=0,
+                 bytes_received=0, connect=0.0, wait=0.0, decode=0.0,
+                 duration=0.0, error=None):
+        self.method = method
+        self.path = path
+        self.wapi_type = path.split('/', 1)[0]
+        self.status = status
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.connect = connect
+        self.wait = wait
+        self.decode = decode
+        self.duration = duration
+        self.error = error
+
+    def __repr__(self):
+        return '<RequestEvent %s %s %s %.6fs>' % (
+            self.method, self.wapi_type, self.status, self.duration)
+
+
+class Histogram(object):
+    """A cumulative histogram of observed values.
+
+    :param tuple buckets: The sorted bucket upper bounds
+
+    """
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.count = 0
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Return ``(upper bound, cumulative count)`` tuples for each bucket,
+        ending with the ``+Inf`` bucket.
+
+        :rtype: list
+
+        """
+        total, values = 0, []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            values.append((bound, total))
+        return values
+
+
+class Metrics(object):
+    """A session hook that keeps request counters and latency histograms by
+    method and WAPI object type.
+
+    Example::
+
+        metrics = infoblox.metrics.Metrics()
+        session.add_hook(metrics)
+        ...
+        print(metrics.prometheus())
+
+    :param tuple buckets: The histogram bucket upper bounds, in seconds
+
+    """
+    TIMINGS = ['duration', 'connect', 'wait', 'decode']
+    HELP = {'duration': 'Total request time in seconds',
+            'connect': 'Time spent opening connections in seconds',
+            'wait': 'Time spent waiting for response headers in seconds',
+            'decode': 'Time spent decoding JSON responses in seconds'}
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __call__(self, event):
+        labels = event.method, event.wapi_type
+        with self._lock:
+            self.requests[labels + (event.status or 0,)] += 1
+            self.bytes_sent[labels] += event.bytes_sent
+            self.bytes_received[labels] += event.bytes_received
+            for name in self.TIMINGS:
+                histogram = self.histograms[name].get(labels)
+                if histogram is None:
+                    histogram = Histogram(self.buckets)
+                    self.histograms[name][labels] = histogram
+                histogram.observe(getattr(event, name))
+
+    def reset(self):
+        """Discard all of the collected values."""
+        with self._lock:
+            self.bytes_received = collections.Counter()
+            self.bytes_sent = collections.Counter()
+            self.histograms = dict((name, {}) for name in self.TIMINGS)
+            self.requests = collections.Counter()
+
+    def prometheus(self):
+        """Return the collected values in the Prometheus text exposition
+        format.
+
+        :rtype: str
+
+        """
+        lines = []
+        with self._lock:
+            lines += _header('%s_total' % PREFIX, 'counter',
+                             'Requests sent to the Infoblox appliance')
+            for (method, wapi_type, status), value in \
+                    sorted(self.requests.items()):
+                lines.append('%s_total{%s} %i' % (PREFIX, _labels(
+                    method=method, type=wapi_type, status=status), value))
+            for name, counter in [('sent', self.bytes_sent),
+                                  ('received', self.bytes_received)]:
+                metric = '%s_bytes_%s_total' % (PREFIX, name)
+                lines += _header(metric, 'counter', 'Body bytes %s' % name)
+                for (method, wapi_type), value in sorted(counter.items()):
+                    lines.append('%s{%s} %i' % (metric, _labels(
+                        method=method, type=wapi_type), value))
+            for name in self.TIMINGS:
+                metric = '%s_%s_seconds' % (PREFIX, name)
+                lines += _header(metric, 'histogram', self.HELP[name])
+                for (method, wapi_type), histogram in \
+                        sorted(self.histograms[name].items()):
+                    labels = _labels(method=method, type=wapi_type)
+                    for bound, count in histogram.cumulative():
+                        lines.append('%s_bucket{%s,le="%s"} %i' % (
+                            metric, labels, _float(bound), count))
+                    lines.append('%s_sum{%s} %s' % (metric, labels,
+                                                    _float(histogram.sum)))
+                    lines.append('%s_count{%s} %i' % (metric, labels,
+                                                      histogram.count))
+        return '\n'.join(lines) + '\n'
+
+
+def _float(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _header(metric, metric_type, text):
+    return ['# HELP %s %s' % (metric, text),
+            '# TYPE %s %s' % (metric, metric_type)]
+
+
+def _labels(**labels):
+    return ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\')
+                                 .replace('"', '\\"').replace('\n', '\\n'))
+                    for key, value in sorted(labels.items()))
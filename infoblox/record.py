@@ -3,12 +3,26 @@ Base Record Object
 
 """
 import logging
+import threading
+from concurrent import futures
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 from infoblox import exceptions
 from infoblox import mapping
+from infoblox import tracing
 
 LOGGER = logging.getLogger(__name__)
 
+PAGE_SIZE = 1000
+WORKERS = 10
+
+# The change tracking entries of empty list and dict attributes
+_EMPTY = {}
+
 
 class Record(mapping.Mapping):
     """This object is extended by specific Infoblox record types and implements
@@ -23,6 +37,9 @@ class Record(mapping.Mapping):
     """
     view = 'default'
 
+    _autoload = True
+    _partial = False
+    _persisted = None
     _ref = None
     _repr_keys = ['_ref']
     _return_ignore = ['view']
@@ -41,13 +58,14 @@ class Record(mapping.Mapping):
         self._session = session
         self._ref = reference_id
         self._search_values = self._build_search_values(kwargs)
-        if self._ref or self._search_values:
+        if self._autoload and (self._ref or self._search_values):
             self.fetch()
 
     def __repr__(self):
         return '<%s %s>' % (self.__class__.__name__,
                             ' '.join(['%s=%s' % (key, getattr(self, key))
                                       for key in self._repr_keys]))
+    @tracing.traced('delete')
     def delete(self):
         """Remove the item from the infoblox server.
 
@@ -57,21 +75,10 @@ class Record(mapping.Mapping):
         :raises: infoblox.exceptions.ProtocolError
 
         """
-        if not self._ref:
-            raise ValueError('Object has no reference id for deletion')
-        if 'save' not in self._supports:
-            raise AssertionError('Can not save this object type')
-        response = self._session.delete(self._path)
-        if response.status_code == 200:
-            self._ref = None
-            self.clear()
-            return True
-        try:
-            error = response.json()
-            raise exceptions.ProtocolError(error['text'])
-        except ValueError:
-            raise exceptions.ProtocolError(response.content)
+        self._check_delete()
+        return self._deleted(self._session.delete(self._path))
 
+    @tracing.traced('fetch')
     def fetch(self):
         """Attempt to fetch the object from the Infoblox device. If successful
         the object will be updated and the method will return True.
@@ -83,17 +90,112 @@ class Record(mapping.Mapping):
         LOGGER.debug('Fetching %s, %s', self._path, self._search_values)
         response = self._session.get(self._path, self._search_values,
                                      {'_return_fields': self._return_fields})
-        if response.status_code == 200:
-            values = response.json()
-            self._assign(values)
-            return bool(values)
-        elif response.status_code >= 400:
+        return self._fetched(response)
+
+    @classmethod
+    def fetch_many(cls, session, criteria, workers=WORKERS):
+        """Fetch a record for each of the search criteria, running the
+        lookups concurrently on a bounded pool of threads that share the
+        session. The session's ``pool_maxsize`` should be at least the
+        number of workers.
+
+        The results are returned in the order of the criteria. Each result
+        is the record, None if no record matched, or the exception raised by
+        its lookup, such as a ProtocolError or the ValueError for a response
+        that could not be decoded, so one failure does not abort the others.
+
+        Example::
+
+            hosts = infoblox.Host.fetch_many(session, [{'name': name}
+                                                       for name in names])
+
+        :param infoblox.Session session: The infoblox session object
+        :param list criteria: Dicts of constructor keyword arguments
+        :param int workers: The maximum number of concurrent lookups
+        :rtype: list
+
+        """
+        def lookup(kwargs):
             try:
-                error = response.json()
-                raise exceptions.ProtocolError(error['text'])
-            except ValueError:
-                raise exceptions.ProtocolError(response.content)
-        return False
+                record = cls(session, **kwargs)
+            except Exception as error:
+                LOGGER.debug('Error fetching %r: %s', kwargs, error)
+                return error
+            return record if record._ref else None
+
+        with futures.ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(lookup, criteria))
+
+    def fetch_nested(self):
+        """Nested records, such as the addresses of a host, are built from the
+        fields the Infoblox device embedded in this record's payload. Load the
+        remaining fields of all of them using a single multi-object request.
+        Returns False if any of the nested records could not be fetched.
+
+        :rtype: bool
+
+        """
+        nested = self._nested_partial()
+        if not nested:
+            return True
+        with self._session.batch() as batch:
+            for obj in nested:
+                batch.fetch(obj)
+        return not batch.errors
+
+    @classmethod
+    def iterate(cls, session, page_size=PAGE_SIZE, prefetch=False,
+                stream=False, **criteria):
+        """Iterate over all of the records of this type that match the search
+        criteria, requesting them from the Infoblox device one page at a time
+        so that only a single page is held in memory. With ``prefetch``, the
+        next page is requested in a background thread while the current page
+        is being processed. With ``stream``, each page is parsed as it is
+        received and only one record of it is held in memory at a time, so
+        large pages can be used without the memory growing with them.
+
+        Example::
+
+            for host in infoblox.Host.iterate(session, zone='bar.net'):
+                print(host.name)
+
+        :param infoblox.Session session: The infoblox session object
+        :param int page_size: The maximum number of records per request
+        :param bool prefetch: Request the next page in the background
+        :param bool stream: Parse each page incrementally
+        :param dict criteria: The WAPI search arguments
+        :rtype: generator
+        :raises: infoblox.exceptions.ProtocolError
+        :raises: ValueError
+
+        """
+        if prefetch and stream:
+            raise ValueError('prefetch and stream can not be combined')
+        pages = cls._pages(session, page_size, criteria, stream)
+        if prefetch:
+            pages = _prefetch(pages)
+        for page in pages:
+            for values in page:
+                yield cls._from_values(session, values, True)
+
+    @property
+    def changed(self):
+        """Return the names of the attributes that have been set or changed
+        in place since the record was last fetched or saved.
+
+        :rtype: set
+
+        """
+        return set(self._changed) | self._changed_in_place()
+
+    @property
+    def dirty(self):
+        """Indicate if the record has changes from its persisted state
+
+        :rtype: bool
+
+        """
+        return self._dirty or bool(self._changed_in_place())
 
     def reference_id(self):
         """Return a read-only handle for the reference_id of this object.
@@ -101,52 +203,30 @@ class Record(mapping.Mapping):
         """
         return str(self._ref)
 
-    def save(self):
+    @tracing.traced('save')
+    def save(self, refetch=False):
         """Update the infoblox with new values for the specified object, or add
-        the values if it's a new object all together.
+        the values if it's a new object all together. The Infoblox device
+        returns the saved object in the response, set ``refetch`` to fetch it
+        again with a separate request instead.
 
+        :param bool refetch: Fetch the object again after saving it
+        :rtype: bool
         :raises: AssertionError
         :raises: infoblox.exceptions.ProtocolError
 
         """
-        if 'save' not in self._supports:
-            raise AssertionError('Can not save this object type')
-
-        values = {}
-        for key in [key for key in self.keys() if key not in self._save_ignore]:
-            if not getattr(self, key) and getattr(self, key) != False:
-                continue
-
-            if isinstance(getattr(self, key, None), list):
-                value = list()
-                for item in getattr(self, key):
-                    if isinstance(item, dict):
-                        value.append(item)
-                    elif hasattr(item, '_save_as'):
-                        value.append(item._save_as())
-                    elif hasattr(item, '_ref') and getattr(item, '_ref'):
-                        value.append(getattr(item, '_ref'))
-                    else:
-                        LOGGER.warning('Cant assign %r', item)
-                values[key] = value
-            elif getattr(self, key, None):
-                values[key] = getattr(self, key)
-        if not self._ref:
-            response = self._session.post(self._path, values)
-        else:
-            values['_ref'] = self._ref
-            response = self._session.put(self._path, values)
-        LOGGER.debug('Response: %r, %r', response.status_code, response.content)
-        if 200 <= response.status_code <= 201:
-            self.fetch()
+        method, values = self._save_request()
+        if method is None:
+            return True
+        response = getattr(self._session, method)(
+            self._path, values, {'_return_fields': self._return_fields})
+        if self._saved(response):
+            if refetch:
+                self.fetch()
             return True
-        else:
-            try:
-                error = response.json()
-                raise exceptions.ProtocolError(error['text'])
-            except ValueError:
-                raise exceptions.ProtocolError(response.content)
 
+    @tracing.traced('assign')
     def _assign(self, values):
         """Assign the values passed as either a dict or list to the object if
         the key for each value matches an available attribute on the object.
@@ -155,6 +235,8 @@ class Record(mapping.Mapping):
 
         """
         LOGGER.debug('Assigning values: %r', values)
+        if isinstance(values, list):
+            values = values[0] if values else None
         if not values:
             return
         keys = self.keys()
@@ -168,20 +250,316 @@ class Record(mapping.Mapping):
                         for item in values[key]:
                             if isinstance(item, dict):
                                 if '_ref' in item:
-                                    obj_class = get_class(item['_ref'])
+                                    obj_class = self._record_class(
+                                        item['_ref'])
                                     if obj_class:
-                                        items.append(obj_class(self._session,
-                                                               **item))
+                                        items.append(obj_class._from_values(
+                                            self._session, item, True))
                             else:
                                 items.append(item)
                         setattr(self, key, items)
                     else:
                         setattr(self, key, values[key])
-        elif isinstance(values, list):
-            self._assign(values[0])
         else:
             LOGGER.critical('Unhandled return type: %r', values)
 
+    def _changed_in_place(self):
+        """Return the names of the list and dict attributes whose values
+        differ from the copies kept when the record was marked clean, such
+        as a list that was appended to or a nested record that was changed.
+
+        :rtype: set
+
+        """
+        changed = set()
+        for key, persisted in self._persisted or ():
+            if key in self._changed:
+                continue
+            value = getattr(self, key, None)
+            if _copy(value) != persisted or (
+                    isinstance(value, list) and
+                    any(getattr(item, 'dirty', False) for item in value)):
+                changed.add(key)
+        return changed
+
+    def _check_delete(self):
+        """Ensure the object can be removed from the Infoblox device.
+
+        :raises: AssertionError
+        :raises: ValueError
+
+        """
+        if not self._ref:
+            raise ValueError('Object has no reference id for deletion')
+        if 'save' not in self._supports:
+            raise AssertionError('Can not save this object type')
+
+    def _deleted(self, response):
+        """Process the response to a delete request.
+
+        :param requests.Response response: The delete response
+        :rtype: bool
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        if response.status_code == 200:
+            ref, self._ref = self._ref, None
+            self.clear()
+            self._notify('record_deleted', ref)
+            return True
+        raise self._protocol_error(response)
+
+    def _fetched(self, response):
+        """Process the response to a fetch request, assigning the values
+        returned by the Infoblox device.
+
+        :param requests.Response response: The fetch response
+        :rtype: bool
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        if response.status_code == 200:
+            values = response.json()
+            self._assign(values)
+            self._partial = False
+            self._mark_clean()
+            return bool(values)
+        elif response.status_code >= 400:
+            raise self._protocol_error(response)
+        return False
+
+    @staticmethod
+    def _protocol_error(response):
+        """Return the exception for an error response from the Infoblox
+        device.
+
+        :param requests.Response response: The error response
+        :rtype: infoblox.exceptions.ProtocolError
+
+        """
+        try:
+            value = response.json()
+        except ValueError:
+            value = None
+        if isinstance(value, dict) and 'text' in value:
+            error = exceptions.ProtocolError(value['text'])
+        else:
+            error = exceptions.ProtocolError(response.content)
+        error.status_code = response.status_code
+        return error
+
+    def _record_class(self, reference):
+        """Return the record class to use for a nested object reference.
+
+        :param str reference: The nested object's reference id
+        :rtype: class
+
+        """
+        return get_class(reference)
+
+    def _save_request(self):
+        """Return the session method name and payload for saving the object.
+        Existing objects only send the attributes that have changed, if none
+        have the method name and payload are both None.
+
+        :rtype: tuple(str, dict)
+        :raises: AssertionError
+
+        """
+        if 'save' not in self._supports:
+            raise AssertionError('Can not save this object type')
+        if not self._ref:
+            return 'post', self._save_values()
+        changed = self.changed
+        if not changed:
+            LOGGER.debug('No changes to save for %s', self._ref)
+            return None, None
+        values = self._save_values(changed)
+        values['_ref'] = self._ref
+        return 'put', values
+
+    def _saved(self, response):
+        """Process the response to a save request, assigning the saved object
+        if it was returned or otherwise its new reference id.
+
+        :param requests.Response response: The save response
+        :rtype: bool
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        LOGGER.debug('Response: %r, %r', response.status_code, response.content)
+        if not 200 <= response.status_code <= 201:
+            raise self._protocol_error(response)
+        try:
+            result = response.json()
+        except ValueError:
+            result = None
+        ref = self._ref
+        if isinstance(result, dict):
+            self._ref = result.get('_ref', self._ref)
+            self._assign(result)
+            self._partial = False
+        elif result:
+            self._ref = result
+        self._mark_clean()
+        self._notify('record_saved', ref)
+        return True
+
+    def _mark_clean(self):
+        """Reset the change tracking, keeping copies of the list and dict
+        attributes so that changes made to them in place are saved.
+
+        """
+        super(Record, self)._mark_clean()
+        persisted = []
+        for key, value in self.items():
+            if isinstance(value, list):
+                for item in value:
+                    if getattr(item, 'dirty', False):
+                        item._mark_clean()
+            elif not isinstance(value, dict):
+                continue
+            if value:
+                persisted.append((key, _copy(value)))
+            else:
+                # Share the entries of empty values between the records
+                persisted.append(_EMPTY.setdefault((key, type(value)),
+                                                   (key, _copy(value))))
+        self._persisted = tuple(persisted) or None
+
+    def _notify(self, event, *args):
+        """Call the method for the event on each observer of the session,
+        logging the exceptions they raise.
+
+        :param str event: ``record_saved`` or ``record_deleted``
+        :param list args: Additional arguments for the observers
+
+        """
+        for observer in getattr(self._session, '_observers', ()):
+            try:
+                getattr(observer, event)(self, *args)
+            except Exception:
+                LOGGER.exception('Observer %r failed handling %s', observer,
+                                 event)
+
+    def _save_values(self, changed=None):
+        """Build the payload sent to the Infoblox device when saving the
+        object. When the names of the changed attributes are passed in, only
+        those attributes are included, even if they have been emptied.
+
+        :param set changed: Only include these attributes
+        :rtype: dict
+
+        """
+        values = {}
+        for key in [key for key in self.keys() if key not in self._save_ignore]:
+            if changed is not None:
+                if key not in changed or getattr(self, key) is None:
+                    continue
+            elif not getattr(self, key) and getattr(self, key) != False:
+                continue
+
+            if isinstance(getattr(self, key, None), list):
+                value = list()
+                for item in getattr(self, key):
+                    if isinstance(item, dict):
+                        value.append(item)
+                    elif hasattr(item, '_save_as'):
+                        value.append(item._save_as())
+                    elif hasattr(item, '_ref') and getattr(item, '_ref'):
+                        value.append(getattr(item, '_ref'))
+                    elif not isinstance(item, mapping.Mapping):
+                        value.append(item)
+                    else:
+                        LOGGER.warning('Cant assign %r', item)
+                values[key] = value
+            elif changed is not None or getattr(self, key, None):
+                values[key] = getattr(self, key)
+        return values
+
+    @classmethod
+    def _from_values(cls, session, values, partial=False):
+        """Create an instance from values already returned by the Infoblox
+        device, without requesting the object again.
+
+        :param infoblox.Session session: The infoblox session object
+        :param dict values: The values returned by the Infoblox device
+        :param bool partial: The values do not include all return fields
+        :rtype: Record
+
+        """
+        obj = cls.__new__(cls)
+        obj._session = session
+        obj._search_values = {}
+        obj._assign(values)
+        obj._partial = partial
+        obj._mark_clean()
+        return obj
+
+    @classmethod
+    def _page_args(cls, page_size, page_id=None):
+        """Return the query arguments for requesting a page of records.
+
+        :param int page_size: The maximum number of records per request
+        :param str page_id: The page id returned by the previous request
+        :rtype: dict
+
+        """
+        if page_id:
+            return {'_page_id': page_id}
+        return {'_paging': 1,
+                '_max_results': page_size,
+                '_return_as_object': 1,
+                '_return_fields': ','.join(
+                    [key for key in cls._fields()[0]
+                     if key not in cls._return_ignore])}
+
+    @classmethod
+    def _pages(cls, session, page_size, criteria, stream=False):
+        """Request the records matching the search criteria page by page,
+        yielding the list of values in each page. With ``stream``, each page
+        is yielded as an iterator that parses the values as they are
+        received, which must be exhausted before the next page is requested.
+
+        :param infoblox.Session session: The infoblox session object
+        :param int page_size: The maximum number of records per request
+        :param dict criteria: The WAPI search arguments
+        :param bool stream: Parse each page incrementally
+        :rtype: generator
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        page_id = None
+        while True:
+            LOGGER.debug('Fetching %s page %s', cls._wapi_type, page_id)
+            kwargs = {'stream': True} if stream else {}
+            response = session.get(cls._wapi_type,
+                                   None if page_id else criteria,
+                                   cls._page_args(page_size, page_id),
+                                   **kwargs)
+            if response.status_code != 200:
+                raise cls._protocol_error(response)
+            if stream:
+                yield response.iter_objects()
+                result = response.members
+            else:
+                result = response.json()
+                yield result.get('result', [])
+            page_id = result.get('next_page_id')
+            if not page_id:
+                break
+
+    def _nested_partial(self):
+        """Return the nested records that were built from partial values.
+
+        :rtype: list
+
+        """
+        return [item for key in self.keys()
+                if isinstance(getattr(self, key), list)
+                for item in getattr(self, key)
+                if isinstance(item, Record) and item._partial]
+
     def _build_search_values(self, kwargs):
         """Build the search criteria dictionary. It will first try and build
         the values from already set attributes on the object, falling back
@@ -262,6 +640,18 @@ class Host(Record):
         self.name = name
         super(Host, self).__init__(session, reference_id, **kwargs)
 
+    def addresses(self, family=4):
+        """Return the host's IPv4 or IPv6 addresses as strings, whether they
+        are :class:`HostIPv4`/:class:`HostIPv6` objects or dicts.
+
+        :param int family: The address family, 4 or 6
+        :rtype: list
+
+        """
+        key = 'ipv%iaddr' % family
+        return [addr[key] if isinstance(addr, dict) else getattr(addr, key)
+                for addr in getattr(self, key + 's')]
+
     def add_ipv4addr(self, ipv4addr):
         """Add an IPv4 address to the host.
 
@@ -273,7 +663,7 @@ class Host(Record):
             if ((isinstance(addr, dict) and addr['ipv4addr'] == ipv4addr) or
                 (isinstance(addr, HostIPv4) and addr.ipv4addr == ipv4addr)):
                 raise ValueError('Already exists')
-        self.ipv4addrs.append({'ipv4addr': ipv4addr})
+        self.ipv4addrs = self.ipv4addrs + [{'ipv4addr': ipv4addr}]
 
     def remove_ipv4addr(self, ipv4addr):
         """Remove an IPv4 address from the host.
@@ -284,7 +674,8 @@ class Host(Record):
         for addr in self.ipv4addrs:
             if ((isinstance(addr, dict) and addr['ipv4addr'] == ipv4addr) or
                 (isinstance(addr, HostIPv4) and addr.ipv4addr == ipv4addr)):
-                self.ipv4addrs.remove(addr)
+                self.ipv4addrs = [item for item in self.ipv4addrs
+                                  if item is not addr]
                 break
 
     def add_ipv6addr(self, ipv6addr):
@@ -296,9 +687,9 @@ class Host(Record):
         """
         for addr in self.ipv6addrs:
             if ((isinstance(addr, dict) and addr['ipv6addr'] == ipv6addr) or
-                (isinstance(addr, HostIPv4) and addr.ipv6addr == ipv6addr)):
+                (isinstance(addr, HostIPv6) and addr.ipv6addr == ipv6addr)):
                 raise ValueError('Already exists')
-        self.ipv6addrs.append({'ipv6addr': ipv6addr})
+        self.ipv6addrs = self.ipv6addrs + [{'ipv6addr': ipv6addr}]
 
     def remove_ipv6addr(self, ipv6addr):
         """Remove an IPv6 address from the host.
@@ -308,8 +699,9 @@ class Host(Record):
         """
         for addr in self.ipv6addrs:
             if ((isinstance(addr, dict) and addr['ipv6addr'] == ipv6addr) or
-                (isinstance(addr, HostIPv4) and addr.ipv6addr == ipv6addr)):
-                self.ipv6addrs.remove(addr)
+                (isinstance(addr, HostIPv6) and addr.ipv6addr == ipv6addr)):
+                self.ipv6addrs = [item for item in self.ipv6addrs
+                                  if item is not addr]
                 break
 
 
@@ -447,27 +839,90 @@ class IPv4Address(Record):
     _repr_keys = ['ip_address']
     _search_by = ['ip_address']
     _supports = ['fetch', 'put']
-    _wapi_type = 'record:host_ipv4addr'
+    _wapi_type = 'ipv4address'
 
     def __init__(self, session, reference_id=None, ipv4addr=None, **kwargs):
-        """Create a new instance of a HostIPv4 object. If a reference_id or
-        valid search criteria are passed in, the object will attempt to load
-        the values for the host_ipv4addr from the Infoblox device.
+        """Create a new instance of an IPv4Address object. If a reference_id
+        or valid search criteria are passed in, the object will attempt to
+        load the values for the ipv4address from the Infoblox device.
 
-        Valid search criteria: ipv4addr
+        Valid search criteria: ip_address
 
         :param infobox.Session session: The established session object
-        :param str reference_id: The Infoblox reference id for the host
-        :param str ipv4addr: The ipv4 address
+        :param str reference_id: The Infoblox reference id for the address
+        :param str ipv4addr: The ipv4 address, an alias for ip_address
         :param dict kwargs: Optional keyword arguments
 
         """
-        self.ipv4addr = str(ipv4addr)
+        if ipv4addr:
+            kwargs.setdefault('ip_address', str(ipv4addr))
         super(IPv4Address, self).__init__(session, reference_id, **kwargs)
 
 
+def _copy(value):
+    """Return a copy of a list or dict attribute for detecting the changes
+    made to it in place, as tuples and dicts of the values. Nested records
+    are kept as they are, they track their own changes.
+
+    :param mixed value: The value to copy
+    :rtype: mixed
+
+    """
+    if isinstance(value, list):
+        return tuple(_copy(item) for item in value)
+    elif isinstance(value, dict):
+        return dict((key, _copy(item)) for key, item in value.items())
+    return value
+
+
+def _prefetch(iterable):
+    """Consume the iterable in a background thread, staying one item ahead
+    of the caller.
+
+    :param iterable iterable: The iterable to consume
+    :rtype: generator
+
+    """
+    items = queue.Queue(maxsize=1)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item, error=None):
+        while not stopped.is_set():
+            try:
+                items.put((item, error), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception as error:
+            put(done, error)
+        else:
+            put(done)
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error:
+                raise error
+            if item is done:
+                break
+            yield item
+    finally:
+        stopped.set()
+
+
 def get_class(reference):
-    class_name = reference.split('/')[0].split(':')[1]
+    class_name = reference.split('/')[0].split(':')[-1]
     LOGGER.debug('Class: %s', class_name)
     return CLASS_MAP.get(class_name)
 
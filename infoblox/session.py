@@ -4,13 +4,27 @@ with the Infoblox NIOS device.
 """
 import json
 import logging
+import os
 import requests
-import urllib
+import socket
+import threading
+import time
+
+from requests import adapters
+from requests.packages.urllib3 import connectionpool
+
+from infoblox import batch
+from infoblox import codec
+from infoblox import metrics
+from infoblox import stream
+from infoblox import tracing
 
 try:
     import urlparse
+    from urllib import urlencode
 except ImportError:
     import urllib.parse as urlparse
+    from urllib.parse import urlencode
 
 
 LOGGER = logging.getLogger(__name__)
@@ -18,33 +32,214 @@ LOGGER = logging.getLogger(__name__)
 USERNAME = 'admin'
 PASSWORD = 'infoblox'
 
+COOKIE = 'ibapauth'
+
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+
+try:
+    _clock = time.perf_counter
+except AttributeError:
+    _clock = time.time
+
+# Time spent opening connections for the current thread's request
+_timings = threading.local()
+
+
+class TimedHTTPConnection(connectionpool.HTTPConnectionPool.ConnectionCls):
+    """Records the time spent opening the connection for instrumentation."""
+    def connect(self):
+        start = _clock()
+        try:
+            super(TimedHTTPConnection, self).connect()
+        finally:
+            _timings.connect = _clock() - start
+
+
+class TimedHTTPSConnection(connectionpool.HTTPSConnectionPool.ConnectionCls):
+    """Records the time spent opening the connection, including the TLS
+    handshake, for instrumentation.
+
+    """
+    def connect(self):
+        start = _clock()
+        try:
+            super(TimedHTTPSConnection, self).connect()
+        finally:
+            _timings.connect = _clock() - start
+
+
+class TimedHTTPConnectionPool(connectionpool.HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PoolAdapter(adapters.HTTPAdapter):
+    """A :class:`requests.adapters.HTTPAdapter` that can enable TCP
+    keep-alive probes on pooled connections, so that idle connections to the
+    appliance are not silently dropped by firewalls or NAT devices.
+
+    :param int keepalive: Seconds a connection is idle before probing it
+
+    """
+    def __init__(self, keepalive=None, **kwargs):
+        self.keepalive = keepalive
+        super(PoolAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keepalive:
+            kwargs['socket_options'] = self._socket_options()
+        super(PoolAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool}
+
+    def _socket_options(self):
+        options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                   (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        for name in ('TCP_KEEPIDLE', 'TCP_KEEPINTVL'):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name),
+                                self.keepalive))
+        return options
+
 
 class Session(object):
-    """Central object for managing HTTP requests to the Infoblox appliance."""
+    """Central object for managing HTTP requests to the Infoblox appliance.
+
+    The session authenticates with HTTP Basic auth once and then reuses the
+    ``ibapauth`` cookie the appliance issues, authenticating again
+    transparently if the cookie is rejected. When a ``cookie_file`` is
+    passed in, the cookie is persisted to it so that later processes
+    connecting to the same host as the same user can skip the login.
+
+    Hooks added with :meth:`add_hook` are called with a
+    :class:`infoblox.metrics.RequestEvent` for every HTTP request sent.
+    Requests are only timed when a hook is installed.
+
+    """
     BASE_PATH = '/wapi/v1.2'
     HEADERS = {'Content-type': 'application/json'}
 
-    def __init__(self, host, username=None, password=None, https=True):
+    def __init__(self, host, username=None, password=None, https=True,
+                 wapi_version=None, cookie_file=None,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 pool_block=False, max_retries=0, keepalive=None,
+                 timeout=None, verify=False):
         """Create a new instance of the Infoblox Session object
 
+        When the session is shared by a pool of threads, set ``pool_maxsize``
+        to at least the number of threads, otherwise connections beyond the
+        pool size are closed after each request instead of being reused.
+        Set ``pool_block`` to make threads wait for a free connection instead
+        of opening extra ones.
+
         :param str host: The Infoblox host to communicate with
         :param str username: The user to authenticate with
         :param str password: The password to authenticate with
+        :param bool https: Use HTTPS to communicate with the device
+        :param str wapi_version: Override the WAPI version, eg ``1.7``
+        :param str cookie_file: Persist the auth cookie to this file
+        :param int pool_connections: The number of hosts to pool for
+        :param int pool_maxsize: The maximum connections kept per host
+        :param bool pool_block: Block when no pooled connection is free
+        :param int max_retries: Retries for failed connection attempts
+        :param int keepalive: Idle seconds before TCP keep-alive probes
+        :param float|tuple timeout: Connect and read timeouts in seconds
+        :param bool|str verify: Verify the TLS certificate, or the path to
+            a CA bundle to verify it with
 
         """
+        if wapi_version:
+            self.BASE_PATH = '/wapi/v%s' % wapi_version
         self.auth = (username or USERNAME, password or PASSWORD)
+        self.cookie_file = cookie_file
         self.host = host
         self.scheme = 'https' if https else 'http'
         self.session = requests.session()
+        self.timeout = timeout
+        self.verify = verify
+        adapter = PoolAdapter(keepalive=keepalive,
+                              pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block,
+                              max_retries=max_retries)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._hooks = []
+        self._lock = threading.Lock()
+        self._observers = []
+        if cookie_file:
+            self._load_cookie()
 
     def _request_url(self, path, query=None):
         return urlparse.urlunparse((self.scheme,
                                     self.host,
                                     '/'.join([self.BASE_PATH, path]),
                                     None,
-                                    urllib.urlencode(query) if query else None,
+                                    urlencode(query) if query else None,
                                     None))
 
+    def add_hook(self, hook):
+        """Add a callable that is passed a
+        :class:`infoblox.metrics.RequestEvent` after each request, such as
+        :class:`infoblox.metrics.Metrics`. Hooks are called in the thread
+        that sent the request, and exceptions they raise are logged.
+
+        :param callable hook: The hook to add
+
+        """
+        self._hooks = self._hooks + [hook]
+
+    def remove_hook(self, hook):
+        """Remove a hook added with :meth:`add_hook`.
+
+        :param callable hook: The hook to remove
+        :raises: ValueError
+
+        """
+        hooks = list(self._hooks)
+        hooks.remove(hook)
+        self._hooks = hooks
+
+    def add_observer(self, observer):
+        """Add an object that is notified when records are saved or deleted
+        through the session, such as :class:`infoblox.index.HostIndex`.
+        Observers implement ``record_saved(record, ref)``, where ``ref`` is
+        the record's reference id before it was saved, and
+        ``record_deleted(record, ref)``.
+
+        :param object observer: The observer to add
+
+        """
+        self._observers = self._observers + [observer]
+
+    def remove_observer(self, observer):
+        """Remove an observer added with :meth:`add_observer`.
+
+        :param object observer: The observer to remove
+        :raises: ValueError
+
+        """
+        observers = list(self._observers)
+        observers.remove(observer)
+        self._observers = observers
+
+    def batch(self, size=None):
+        """Return a :class:`infoblox.batch.Batch` that collects record saves
+        and deletes and sends them as WAPI multi-object requests. Note that
+        the multi-object request endpoint requires a newer WAPI version than
+        the default, see the ``wapi_version`` argument.
+
+        :param int size: The maximum number of operations per request
+        :rtype: infoblox.batch.Batch
+
+        """
+        return batch.Batch(self, size)
+
     def delete(self, path):
         """Call the Infoblox device to delete the ref
 
@@ -52,45 +247,256 @@ class Session(object):
         :rtype: requests.Response
 
         """
-        return self.session.delete(self._request_url(path),
-                                   auth=self.auth, verify=False)
+        return self._request('DELETE', path)
 
-    def get(self, path, data=None, return_fields=None):
-        """Call the Infoblox device to get the obj for the data passed in
+    def get(self, path, data=None, return_fields=None, stream=False):
+        """Call the Infoblox device to get the obj for the data passed in.
+        With ``stream``, the body is not read until it is iterated over with
+        :meth:`Response.iter_objects`.
 
         :param str obj_reference: The object reference data
         :param dict data: The data for the get request
+        :param bool stream: Defer reading the body
         :rtype: requests.Response
 
         """
-        return self.session.get(self._request_url(path, return_fields),
-                                data=json.dumps(data),
-                                auth=self.auth, verify=False)
+        return self._request('GET', path, return_fields,
+                             data=codec.encode(data), stream=stream)
 
-    def post(self, path, data):
+    def post(self, path, data, return_fields=None):
         """Call the Infoblox device to post the obj for the data passed in
 
         :param str obj: The object type
         :param dict data: The data for the post
+        :param dict return_fields: The query arguments for the request
         :rtype: requests.Response
 
         """
         LOGGER.debug('Posting data: %r', data)
-        return self.session.post(self._request_url(path),
-                                 data=json.dumps(data or {}),
-                                 headers=self.HEADERS, auth=self.auth,
-                                 verify=False)
+        return self._request('POST', path, return_fields,
+                             data=codec.encode(data or {}),
+                             headers=self.HEADERS)
 
-    def put(self, path, data):
+    def put(self, path, data, return_fields=None):
         """Call the Infoblox device to post the obj for the data passed in
 
         :param str obj: The object type
         :param dict data: The data for the post
+        :param dict return_fields: The query arguments for the request
         :rtype: requests.Response
 
         """
         LOGGER.debug('Putting data: %r', data)
-        return self.session.put(self._request_url(path),
-                                data=json.dumps(data or {}),
-                                headers=self.HEADERS, auth=self.auth,
-                                verify=False)
+        return self._request('PUT', path, return_fields,
+                             data=codec.encode(data or {}),
+                             headers=self.HEADERS)
+
+    @property
+    def authenticated(self):
+        """Indicate if the session holds an auth cookie from the appliance.
+
+        :rtype: bool
+
+        """
+        return COOKIE in self.session.cookies
+
+    def _load_cookie(self):
+        """Load the auth cookie persisted by a previous session, ignoring
+        missing or unreadable files.
+
+        """
+        try:
+            with open(self.cookie_file) as handle:
+                value = json.load(handle)
+        except (IOError, OSError, ValueError) as error:
+            LOGGER.debug('Not loading auth cookie: %s', error)
+            return
+        if not (isinstance(value, dict) and value.get(COOKIE) and
+                value.get('host') == self.host and
+                value.get('username') == self.auth[0]):
+            LOGGER.debug('Not loading auth cookie issued for another host '
+                         'or user')
+            return
+        self.session.cookies.set(COOKIE, value[COOKIE])
+
+    def _request(self, method, path, query=None, **kwargs):
+        """Send the request to the Infoblox device using the auth cookie if
+        the session holds one, falling back to HTTP Basic auth if it doesn't
+        or if the cookie was rejected.
+
+        :param str method: The HTTP method
+        :param str path: The object type or reference id
+        :param dict query: The query arguments for the request
+        :param dict kwargs: Additional arguments for the request
+        :rtype: requests.Response
+
+        """
+        url = self._request_url(path, query)
+        cookie = self.session.cookies.get(COOKIE)
+        if cookie:
+            response = self._send(method, path, url, **kwargs)
+            if response.status_code != 401:
+                return response
+            LOGGER.debug('Auth cookie rejected, authenticating')
+            with self._lock:
+                if self.session.cookies.get(COOKIE) == cookie:
+                    self.session.cookies.pop(COOKIE, None)
+        response = self._send(method, path, url, auth=self.auth, **kwargs)
+        if self.cookie_file and self.authenticated:
+            self._save_cookie()
+        return response
+
+    def _send(self, method, path, url, **kwargs):
+        """Send a single HTTP request, timing it if any hooks are installed
+        and sending it in a span if tracing is enabled.
+
+        :param str method: The HTTP method
+        :param str path: The object type or reference id
+        :param str url: The request URL
+        :param dict kwargs: Additional arguments for the request
+        :rtype: requests.Response
+
+        """
+        hooks = self._hooks
+        if not hooks and tracing.tracer is None:
+            return _decoded_by_codec(self.session.request(
+                method, url, timeout=self.timeout, verify=self.verify,
+                **kwargs))
+        attributes = {'http.request.method': method,
+                      'url.full': url,
+                      'wapi.type': path.split('/', 1)[0]}
+        with tracing.span(method, attributes) as span:
+            response = self._timed_send(hooks, method, path, url, **kwargs)
+            span.set_attribute('http.response.status_code',
+                               response.status_code)
+        return response
+
+    def _timed_send(self, hooks, method, path, url, **kwargs):
+        """Send a single HTTP request, passing its
+        :class:`infoblox.metrics.RequestEvent` to the hooks. Unless the
+        response is streamed, the JSON body is decoded here so the decode time
+        can be measured, and the first call to the response's ``json()``
+        method returns the decoded value.
+
+        :param list hooks: The hooks to pass the event to
+        :param str method: The HTTP method
+        :param str path: The object type or reference id
+        :param str url: The request URL
+        :param dict kwargs: Additional arguments for the request
+        :rtype: requests.Response
+
+        """
+        event = metrics.RequestEvent(method, path)
+        event.bytes_sent = len(kwargs.get('data') or '')
+        _timings.connect = 0.0
+        start = _clock()
+        try:
+            response = _decoded_by_codec(self.session.request(
+                method, url, timeout=self.timeout, verify=self.verify,
+                **kwargs))
+        except requests.RequestException as error:
+            event.connect = _timings.connect
+            event.duration = _clock() - start
+            event.error = error
+            self._emit(hooks, event)
+            raise
+        event.connect = _timings.connect
+        event.wait = max(response.elapsed.total_seconds() - event.connect,
+                         0.0)
+        event.status = response.status_code
+        if kwargs.get('stream'):
+            event.bytes_received = int(
+                response.headers.get('Content-Length') or 0)
+        else:
+            event.bytes_received = len(response.content)
+        if not kwargs.get('stream') and response.content:
+            decode_start = _clock()
+            try:
+                value = response.json()
+            except ValueError:
+                pass
+            else:
+                event.decode = _clock() - decode_start
+                response._decoded = value
+        event.duration = _clock() - start
+        self._emit(hooks, event)
+        return response
+
+    @staticmethod
+    def _emit(hooks, event):
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception:
+                LOGGER.exception('Request hook %r failed', hook)
+
+    def _save_cookie(self):
+        """Persist the auth cookie, readable only by the current user, along
+        with the host and user it was issued for.
+
+        """
+        with self._lock:
+            try:
+                handle = os.open(self.cookie_file,
+                                 os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(handle, 'w') as cookie_file:
+                    json.dump({'host': self.host,
+                               'username': self.auth[0],
+                               COOKIE: self.session.cookies.get(COOKIE)},
+                              cookie_file)
+            except (IOError, OSError) as error:
+                LOGGER.warning('Could not save the auth cookie: %s', error)
+
+
+class Response(requests.Response):
+    """A :class:`requests.Response` that decodes its JSON body with
+    :mod:`infoblox.codec`, straight from the bytes received. If the body was
+    already decoded for instrumentation, the first call to :meth:`json`
+    returns that value.
+
+    """
+    members = None
+
+    def json(self, **kwargs):
+        if '_decoded' in self.__dict__:
+            return self.__dict__.pop('_decoded')
+        if kwargs:
+            return super(Response, self).json(**kwargs)
+        return codec.loads(self.content)
+
+    def iter_objects(self, chunk_size=stream.CHUNK_SIZE):
+        """Yield the items of the JSON array in the body, or of the
+        ``result`` array of a page of results, decoding each one as soon as
+        it has been received. Use with ``stream=True`` so that the body is
+        never held in memory as a whole. The other members of a page, such
+        as ``next_page_id``, are set in :attr:`members` once all of the
+        items have been yielded. The connection is released when the
+        iteration ends.
+
+        :param int chunk_size: The number of bytes to read at a time
+        :rtype: generator
+        :raises: ValueError
+
+        """
+        parser = stream.Parser()
+        self.members = parser.members
+        try:
+            for chunk in self.iter_content(chunk_size):
+                for value in parser.feed(chunk):
+                    yield value
+            parser.close()
+        finally:
+            self.close()
+
+
+def _decoded_by_codec(response):
+    """Change the class of a response returned by requests to
+    :class:`Response`, which is cheaper than wrapping it.
+
+    :param requests.Response response: The response
+    :rtype: Response
+
+    """
+    if type(response) is requests.Response:
+        response.__class__ = Response
+    return response
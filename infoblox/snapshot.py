@@ -0,0 +1,338 @@
+"""
+A local, on-disk copy of the host records on the Infoblox appliance, for
+reporting and auditing tools that do not need live data.
+
+The snapshot is a SQLite database. Hosts are stored as the JSON returned by
+the WAPI, with indexed columns for their name, zone, addresses and MAC
+addresses. Records are only built from the rows that a query returns, so
+large snapshots are not loaded into memory, and the database file is
+memory-mapped for reading.
+
+Example::
+
+    with infoblox.snapshot.Snapshot('hosts.db') as snapshot:
+        snapshot.refresh(session)
+        for host in snapshot.search(zone='bar.net'):
+            print(host.name, host.addresses())
+
+"""
+import json
+import logging
+import sqlite3
+import time
+
+from infoblox import mapping
+from infoblox import record
+
+LOGGER = logging.getLogger(__name__)
+
+MMAP_SIZE = 256 * 1024 * 1024
+PAGE_SIZE = 1000
+
+# The number of reference ids per query when comparing with stored rows
+CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    ref TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    zone TEXT,
+    content TEXT NOT NULL,
+    generation INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS hosts_name ON hosts (name);
+CREATE INDEX IF NOT EXISTS hosts_zone ON hosts (zone);
+CREATE TABLE IF NOT EXISTS addresses (
+    host TEXT NOT NULL REFERENCES hosts (ref) ON DELETE CASCADE,
+    family INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    mac TEXT);
+CREATE INDEX IF NOT EXISTS addresses_host ON addresses (host);
+CREATE INDEX IF NOT EXISTS addresses_address ON addresses (address);
+CREATE INDEX IF NOT EXISTS addresses_mac ON addresses (mac);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT);
+"""
+
+
+class Snapshot(object):
+    """A local copy of the host records, stored in a SQLite database.
+
+    :meth:`refresh` streams the hosts from the appliance page by page and
+    only writes the rows that changed since the last refresh, removing the
+    hosts that no longer exist. :meth:`put` and :meth:`remove` apply single
+    changes, for example from a change feed.
+
+    Queries return instances of ``record_class`` that are not bound to a
+    session, so reading the snapshot never makes network calls.
+
+    :param str path: The database file
+    :param class record_class: The class of the records returned by queries,
+        eg :class:`infoblox.compact.Host`
+
+    """
+    def __init__(self, path, record_class=record.Host):
+        self.path = path
+        self.record_class = record_class
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.execute('PRAGMA mmap_size = %i' % MMAP_SIZE)
+        self._connection.executescript(SCHEMA)
+
+    def __contains__(self, name):
+        return self._query('SELECT 1 FROM hosts WHERE name = ?',
+                           (name,)).fetchone() is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self._records('SELECT content FROM hosts ORDER BY name')
+
+    def __len__(self):
+        return self._query('SELECT COUNT(*) FROM hosts').fetchone()[0]
+
+    def close(self):
+        """Close the database."""
+        self._connection.close()
+
+    @property
+    def refreshed(self):
+        """Return the time of the last completed refresh as a UNIX
+        timestamp, or None if the snapshot was never refreshed.
+
+        :rtype: float
+
+        """
+        value = self._metadata('refreshed')
+        return float(value) if value else None
+
+    def get(self, name):
+        """Return the host with the name, or None if there is none.
+
+        :param str name: The host's FQDN
+        :rtype: infoblox.record.Host
+
+        """
+        for host in self._records('SELECT content FROM hosts WHERE name = ?',
+                                  (name,)):
+            return host
+
+    def search(self, name=None, zone=None, ipv4addr=None, ipv6addr=None,
+               mac=None):
+        """Yield the hosts matching all of the criteria that are passed in,
+        ordered by name.
+
+        :param str name: The host's FQDN
+        :param str zone: The host's DNS zone
+        :param str ipv4addr: One of the host's IPv4 addresses
+        :param str ipv6addr: One of the host's IPv6 addresses
+        :param str mac: The MAC address of one of the host's addresses
+        :rtype: generator
+
+        """
+        clauses, params = [], []
+        for column, value in [('name', name), ('zone', zone)]:
+            if value is not None:
+                clauses.append('%s = ?' % column)
+                params.append(value)
+        for family, column, value in [(4, 'address', ipv4addr),
+                                      (6, 'address', ipv6addr),
+                                      (None, 'mac', mac)]:
+            if value is not None:
+                clauses.append('ref IN (SELECT host FROM addresses WHERE '
+                               '%s = ?%s)' % (column, ' AND family = ?'
+                                              if family else ''))
+                params += [value, family] if family else [value]
+        query = 'SELECT content FROM hosts'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        return self._records(query + ' ORDER BY name', params)
+
+    def put(self, values):
+        """Add or replace a host using the values returned by the WAPI.
+
+        :param dict values: The host's values, including its ``_ref``
+
+        """
+        with self._connection:
+            self._write(values, self._generation())
+
+    def remove(self, ref):
+        """Remove the host with the reference id, if it is in the snapshot.
+
+        :param str ref: The host's reference id
+
+        """
+        with self._connection:
+            self._connection.execute('DELETE FROM hosts WHERE ref = ?',
+                                     (ref,))
+
+    def record_deleted(self, obj, ref):
+        """Remove a host that was deleted, as reported by an observed session
+        or a change feed.
+
+        :param infoblox.record.Record obj: The deleted record
+        :param str ref: The record's reference id
+
+        """
+        if isinstance(obj, record.Host):
+            self.remove(ref)
+
+    def record_saved(self, obj, ref=None):
+        """Add or replace a host that was saved, as reported by an observed
+        session or a change feed, removing the row of the reference id it
+        had before, which changes when a host is renamed.
+
+        :param infoblox.record.Record obj: The saved record
+        :param str ref: The record's reference id before it was saved
+
+        """
+        if isinstance(obj, record.Host):
+            if ref and ref != obj._ref:
+                self.remove(ref)
+            if obj._ref:
+                self.put(_values(obj))
+
+    def refresh(self, session, zone=None, page_size=PAGE_SIZE):
+        """Update the snapshot with the hosts on the appliance, or only with
+        those in the zone. The hosts are requested page by page and only
+        the rows for new and changed hosts are written. Hosts that are no
+        longer on the appliance are removed. The snapshot is updated in a
+        single transaction, so readers never see a partial refresh.
+
+        Returns the number of hosts that were added, updated, removed and
+        left unchanged.
+
+        :param infoblox.Session session: The infoblox session object
+        :param str zone: Only refresh the hosts in this zone
+        :param int page_size: The number of hosts to request per page
+        :rtype: dict
+        :raises: infoblox.exceptions.ProtocolError
+
+        """
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        criteria = {'zone': zone} if zone else {}
+        with self._connection:
+            generation = self._generation() + 1
+            for page in self.record_class._pages(session, page_size,
+                                                 criteria):
+                self._refresh_page(page, generation, counts)
+            query = 'DELETE FROM hosts WHERE generation < ?'
+            params = [generation]
+            if zone:
+                query += ' AND zone = ?'
+                params.append(zone)
+            counts['removed'] = self._connection.execute(
+                query, params).rowcount
+            self._set_metadata('generation', generation)
+            self._set_metadata('refreshed', time.time())
+        LOGGER.debug('Refreshed %s: %r', self.path, counts)
+        return counts
+
+    def _generation(self):
+        return int(self._metadata('generation') or 0)
+
+    def _metadata(self, key):
+        row = self._query('SELECT value FROM metadata WHERE key = ?',
+                          (key,)).fetchone()
+        return row[0] if row else None
+
+    def _query(self, query, params=()):
+        return self._connection.execute(query, params)
+
+    def _records(self, query, params=()):
+        """Yield a record for each row returned by the query, building each
+        one only when it is reached.
+
+        :param str query: The query selecting the content column
+        :param list params: The query parameters
+        :rtype: generator
+
+        """
+        for row in self._query(query, params):
+            yield self.record_class._from_values(None, json.loads(row[0]))
+
+    def _refresh_page(self, page, generation, counts):
+        """Write the new and changed hosts in a page of results, marking all
+        of them as seen by this refresh.
+
+        :param list page: The host values in the page
+        :param int generation: The refresh generation
+        :param dict counts: The counts to update
+
+        """
+        stored = {}
+        refs = [values['_ref'] for values in page]
+        for offset in range(0, len(refs), CHUNK_SIZE):
+            chunk = refs[offset:offset + CHUNK_SIZE]
+            stored.update(self._query(
+                'SELECT ref, content FROM hosts WHERE ref IN (%s)' %
+                ','.join('?' * len(chunk)), chunk))
+        unchanged = []
+        for values in page:
+            content = _content(values)
+            previous = stored.get(values['_ref'])
+            if previous == content:
+                counts['unchanged'] += 1
+                unchanged.append((generation, values['_ref']))
+                continue
+            counts['updated' if previous else 'added'] += 1
+            self._write(values, generation, content)
+        self._connection.executemany(
+            'UPDATE hosts SET generation = ? WHERE ref = ?', unchanged)
+
+    def _set_metadata(self, key, value):
+        self._connection.execute(
+            'INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)',
+            (key, str(value)))
+
+    def _write(self, values, generation, content=None):
+        """Insert or replace the row for the host and its addresses.
+
+        :param dict values: The host's values
+        :param int generation: The refresh generation
+        :param str content: The values encoded as JSON
+
+        """
+        ref = values['_ref']
+        self._connection.execute('DELETE FROM hosts WHERE ref = ?', (ref,))
+        self._connection.execute(
+            'INSERT INTO hosts (ref, name, zone, content, generation) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (ref, values.get('name'), values.get('zone'),
+             content or _content(values), generation))
+        self._connection.executemany(
+            'INSERT INTO addresses (host, family, address, mac) '
+            'VALUES (?, ?, ?, ?)',
+            [(ref, family, address.get('ipv%iaddr' % family),
+              address.get('mac'))
+             for family in (4, 6)
+             for address in values.get('ipv%iaddrs' % family) or []
+             if isinstance(address, dict)])
+
+
+def _content(values):
+    return json.dumps(values, sort_keys=True, separators=(',', ':'))
+
+
+def _values(obj):
+    """Return the values of a record as they would be returned by the WAPI,
+    leaving out unset fields.
+
+    :param infoblox.record.Record obj: The record
+    :rtype: dict
+
+    """
+    values = {'_ref': obj._ref}
+    for key, value in obj.items():
+        if isinstance(value, list):
+            value = [_values(item) if isinstance(item, mapping.Mapping)
+                     else item for item in value]
+        if value is not None:
+            values[key] = value
+    return values
@@ -0,0 +1,178 @@
+"""
+Incremental parsing of WAPI response bodies. The objects of a result array
+are decoded one at a time as soon as all of their bytes have been received,
+so only the object being parsed and the last chunk of the body are held in
+memory, however large the result is.
+
+Example::
+
+    parser = infoblox.stream.Parser()
+    for chunk in chunks:
+        for value in parser.feed(chunk):
+            print(value['name'])
+    parser.close()
+    print(parser.members.get('next_page_id'))
+
+"""
+import re
+
+from infoblox import codec
+
+CHUNK_SIZE = 65536
+RESULT = 'result'
+
+_SCALAR_END = re.compile(br'[\s,\]}]')
+_STRING = re.compile(br'["\\]')
+_STRUCTURE = re.compile(br'["\[\]{}]')
+_WHITESPACE = re.compile(br'\s*')
+
+# The parser states
+_BEGIN, _KEY, _COLON, _VALUE, _ITEMS, _END = range(6)
+
+
+class Parser(object):
+    """Incrementally parse a JSON array, or the array in the ``result``
+    member of a JSON object such as a page of WAPI results, returning each
+    item of the array once it has been fed completely. The other members of
+    an enclosing object, such as ``next_page_id``, are decoded into
+    :attr:`members`.
+
+    :param str key: The member of an enclosing object that holds the array
+
+    """
+    def __init__(self, key=RESULT):
+        self.key = key
+        self.members = {}
+        self._buffer = bytearray()
+        self._pos = 0
+        self._state = _BEGIN
+        self._after = _END
+        self._member = None
+        self._cursor = 0
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, data):
+        """Parse the next chunk of the body, returning the items of the array
+        that it completed.
+
+        :param bytes data: The next chunk of the body
+        :rtype: list
+        :raises: ValueError
+
+        """
+        self._buffer += data
+        items = []
+        self._parse(items)
+        del self._buffer[:self._pos]
+        self._cursor -= self._pos
+        self._pos = 0
+        return items
+
+    def close(self):
+        """Check that the whole body was parsed.
+
+        :raises: ValueError
+
+        """
+        if self._state != _END:
+            raise ValueError('Incomplete JSON document')
+
+    def _parse(self, items):
+        """Parse as much of the buffer as possible, appending the items of the
+        array that are complete.
+
+        :param list items: The list to append the decoded items to
+        :raises: ValueError
+
+        """
+        buffer = self._buffer
+        while True:
+            pos = _WHITESPACE.match(buffer, self._pos).end()
+            self._pos = pos
+            if pos == len(buffer):
+                return
+            char = buffer[pos:pos + 1]
+            state = self._state
+            if state == _BEGIN:
+                if char == b'[':
+                    self._state = _ITEMS
+                elif char == b'{':
+                    self._state, self._after = _KEY, _KEY
+                else:
+                    raise ValueError('Expected a JSON array or object')
+                self._pos = pos + 1
+            elif state == _END:
+                raise ValueError('Unexpected data after the JSON document')
+            elif state == _COLON:
+                if char != b':':
+                    raise ValueError('Expected ":" at %r' % bytes(char))
+                self._state = _VALUE
+                self._pos = pos + 1
+            elif char in (b',', b'}', b']'):
+                self._pos = pos + 1
+                if char == b'}' and state == _KEY:
+                    self._state = _END
+                elif char == b']' and state == _ITEMS:
+                    self._state = self._after
+                elif char != b',' or state == _VALUE:
+                    raise ValueError('Unexpected %r' % bytes(char))
+            elif state == _VALUE and char == b'[' and \
+                    self._member == self.key:
+                self._state = _ITEMS
+                self._pos = pos + 1
+            else:
+                end = self._value_end(pos)
+                if end is None:
+                    return
+                value = codec.loads(bytes(buffer[pos:end]))
+                self._pos = end
+                if state == _ITEMS:
+                    items.append(value)
+                elif state == _KEY:
+                    self._member, self._state = value, _COLON
+                else:
+                    self.members[self._member] = value
+                    self._state = _KEY
+
+    def _value_end(self, start):
+        """Return the end of the JSON value that starts at the position in the
+        buffer, or None if the buffer does not hold all of it yet. The scan
+        resumes where it stopped when more of the value is fed.
+
+        :param int start: The position of the first byte of the value
+        :rtype: int|None
+
+        """
+        buffer = self._buffer
+        if not (self._depth or self._in_string):
+            char = buffer[start:start + 1]
+            if char == b'"':
+                self._in_string = True
+            elif char in (b'{', b'['):
+                self._depth = 1
+            else:
+                match = _SCALAR_END.search(buffer, start)
+                return match.start() if match else None
+            self._cursor = start + 1
+        pos = self._cursor
+        while True:
+            pattern = _STRING if self._in_string else _STRUCTURE
+            match = pattern.search(buffer, pos)
+            if match is None:
+                self._cursor = len(buffer)
+                return None
+            char, pos = match.group(), match.end()
+            if char == b'\\':
+                if pos == len(buffer):
+                    self._cursor = match.start()
+                    return None
+                pos += 1
+            elif char == b'"':
+                self._in_string = not self._in_string
+            elif char in (b'{', b'['):
+                self._depth += 1
+            else:
+                self._depth -= 1
+            if not (self._depth or self._in_string):
+                return pos
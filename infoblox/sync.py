@@ -0,0 +1,215 @@
+"""
+Reconcile the host records on the Infoblox appliance with a desired state,
+sending only the creates, updates and deletes needed to converge.
+
+"""
+import json
+import logging
+
+from infoblox import record
+
+LOGGER = logging.getLogger(__name__)
+
+ADDRESS_FIELDS = {'ipv4addrs': 4, 'ipv6addrs': 6}
+BATCH_SIZE = 100
+PAGE_SIZE = 1000
+
+# Address record fields that are not written as part of a host
+READ_ONLY = frozenset(['_ref', 'discovered_data', 'host', 'last_queried',
+                       'network', 'view'])
+
+
+def read_desired(handle):
+    """Read the desired hosts from a JSON-lines file, keyed by name. Each
+    line is an object with the host's ``name`` and any other host fields to
+    manage. Addresses may be given as strings or as dicts such as
+    ``{"ipv4addr": ..., "mac": ...}``, and are read as dicts sorted by
+    address. Fields that are left out are not changed on existing hosts,
+    including the fields of their addresses.
+
+    :param file handle: The file to read from
+    :rtype: dict
+    :raises: ValueError
+
+    """
+    fields = record.Host._fields()[1]
+    desired = {}
+    for line_num, line in enumerate(handle, 1):
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+        except ValueError as error:
+            raise ValueError('Line %i is not valid JSON: %s' %
+                             (line_num, error))
+        if not isinstance(values, dict):
+            raise ValueError('Line %i is not a JSON object' % line_num)
+        if not values.get('name'):
+            raise ValueError('Line %i is missing the host name' % line_num)
+        unknown = set(values) - fields
+        if unknown:
+            raise ValueError('Line %i has unknown host fields: %s' %
+                             (line_num, ', '.join(sorted(unknown))))
+        for key in ADDRESS_FIELDS:
+            if key in values:
+                try:
+                    values[key] = normalize(key, values[key])
+                except ValueError as error:
+                    raise ValueError('Line %i: %s' % (line_num, error))
+        desired[values['name']] = values
+    return desired
+
+
+def diff(host, values):
+    """Return the fields of the host that differ from the desired values.
+    Empty values such as None, ``''`` and ``[]`` are treated as equal.
+    Addresses differ if the host has other addresses, or if a field given
+    for an address has another value on the host.
+
+    :param infoblox.record.Host host: The current host
+    :param dict values: The desired values
+    :rtype: dict
+
+    """
+    changes = {}
+    for key, value in values.items():
+        if key in ADDRESS_FIELDS:
+            current = addresses(host, key)
+            field = 'ipv%iaddr' % ADDRESS_FIELDS[key]
+            value = normalize(key, value)
+            if (set(current) != set(addr[field] for addr in value) or
+                    any(current[addr[field]].get(name) != item
+                        for addr in value for name, item in addr.items())):
+                changes[key] = value
+            continue
+        current = getattr(host, key)
+        if current != value and (current or value):
+            changes[key] = value
+    return changes
+
+
+def normalize(key, value):
+    """Return desired addresses given as strings or dicts as dicts, sorted
+    by address.
+
+    :param str key: ``ipv4addrs`` or ``ipv6addrs``
+    :param list value: The desired addresses
+    :rtype: list
+    :raises: ValueError
+
+    """
+    field = 'ipv%iaddr' % ADDRESS_FIELDS[key]
+    value = [dict(addr) if isinstance(addr, dict) else {field: addr}
+             for addr in value]
+    if not all(addr.get(field) for addr in value):
+        raise ValueError('%s has an entry without an %s' % (key, field))
+    return sorted(value, key=lambda addr: addr[field])
+
+
+def addresses(host, key):
+    """Return the writable fields of the host's addresses, keyed by
+    address.
+
+    :param infoblox.record.Host host: The host
+    :param str key: ``ipv4addrs`` or ``ipv6addrs``
+    :rtype: dict
+
+    """
+    field = 'ipv%iaddr' % ADDRESS_FIELDS[key]
+    result = {}
+    for addr in getattr(host, key) or []:
+        items = addr.items() if isinstance(addr, dict) else [
+            (name, getattr(addr, name)) for name in addr.keys()]
+        values = dict((name, value) for name, value in items
+                      if name not in READ_ONLY and value is not None)
+        result[values[field]] = values
+    return result
+
+
+def apply(host, changes):
+    """Set the changed values on the host. Addresses are written with the
+    fields the host already has, updated with the desired ones, so that
+    fields such as ``mac`` that are not managed are kept.
+
+    :param infoblox.record.Host host: The host to change
+    :param dict changes: The values to set
+
+    """
+    for key, value in changes.items():
+        if key in ADDRESS_FIELDS:
+            current = addresses(host, key)
+            field = 'ipv%iaddr' % ADDRESS_FIELDS[key]
+            merged = []
+            for addr in normalize(key, value):
+                values = dict(current.get(addr[field], {}))
+                values.update(addr)
+                merged.append(values)
+            value = merged
+        setattr(host, key, value)
+
+
+def in_zone(name, zone):
+    """Check if the host name is in the DNS zone.
+
+    :param str name: The host's FQDN
+    :param str zone: The zone
+    :rtype: bool
+
+    """
+    name, zone = name.lower().rstrip('.'), zone.lower().rstrip('.')
+    return name == zone or name.endswith('.' + zone)
+
+
+def sync(session, desired, prune=False, dry_run=False,
+         batch_size=BATCH_SIZE, page_size=PAGE_SIZE, **criteria):
+    """Converge the hosts matching the search criteria with the desired
+    state. The current hosts are streamed from the appliance page by page
+    and compared with the desired state in memory. Only the hosts that
+    differ are written, using batched multi-object requests.
+
+    Yields a dict describing each change as it is planned, followed by one
+    for each change that failed when its batch was sent.
+
+    :param infoblox.Session session: The infoblox session object
+    :param dict desired: The desired host values keyed by name
+    :param bool prune: Delete hosts that are not in the desired state
+    :param bool dry_run: Only report the changes, without making them
+    :param int batch_size: The maximum number of writes per request
+    :param int page_size: The number of hosts to request per page
+    :param dict criteria: WAPI search arguments limiting the current hosts
+    :rtype: generator
+    :raises: ValueError
+
+    """
+    zone = criteria.get('zone')
+    if zone:
+        outside = sorted(name for name in desired if not in_zone(name, zone))
+        if outside:
+            raise ValueError('Hosts outside of the %s zone: %s' %
+                             (zone, ', '.join(outside)))
+    remaining = dict(desired)
+    batch = session.batch(batch_size)
+    for host in record.Host.iterate(session, page_size, **criteria):
+        values = remaining.pop(host.name, None)
+        if values is None:
+            if prune:
+                yield {'action': 'delete', 'host': host.name}
+                if not dry_run:
+                    batch.delete(host)
+            continue
+        changes = diff(host, values)
+        if changes:
+            yield {'action': 'update', 'host': host.name,
+                   'changes': sorted(changes)}
+            if not dry_run:
+                apply(host, changes)
+                batch.save(host)
+    for name in sorted(remaining):
+        yield {'action': 'create', 'host': name}
+        if not dry_run:
+            host = record.Host(session)
+            apply(host, remaining[name])
+            batch.save(host)
+    batch.flush()
+    for host, error in batch.errors:
+        yield {'action': 'error', 'host': host.name, 'error': str(error)}
@@ -0,0 +1,634 @@
+"""
+A stateful, in-process stand-in for the Infoblox WAPI, for testing and
+benchmarking code that uses this library without an appliance.
+
+It understands the ``record:host``, ``record:host_ipv4addr``,
+``record:host_ipv6addr`` and ``ipv4address`` object types. It supports
+``_ref`` generation, searching by fields and extensible attributes,
+``_return_fields``, paging, multi-object requests, ``db_objects`` change
+sequence ids and cookie authentication. Latency and error injection can be
+configured.
+
+Example::
+
+    with infoblox.testing.FakeWAPI(latency=0.01) as wapi:
+        wapi.add_host('foo.bar.net', ['10.0.0.1'])
+        session = wapi.session()
+        host = infoblox.Host(session, name='foo.bar.net')
+
+"""
+import base64
+import collections
+import copy
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+
+try:
+    from http import server
+    import socketserver
+except ImportError:
+    import BaseHTTPServer as server
+    import SocketServer as socketserver
+
+try:
+    import urlparse
+except ImportError:
+    import urllib.parse as urlparse
+
+from infoblox import session
+
+LOGGER = logging.getLogger(__name__)
+
+HOST = 'record:host'
+HOST_IPV4 = 'record:host_ipv4addr'
+HOST_IPV6 = 'record:host_ipv6addr'
+IPV4_ADDRESS = 'ipv4address'
+DB_OBJECTS = 'db_objects'
+
+# Fields returned when a request does not pass _return_fields
+DEFAULT_FIELDS = {HOST: ['ipv4addrs', 'ipv6addrs', 'name', 'view'],
+                  HOST_IPV4: ['configure_for_dhcp', 'host', 'ipv4addr'],
+                  HOST_IPV6: ['configure_for_dhcp', 'host', 'ipv6addr'],
+                  IPV4_ADDRESS: ['ip_address', 'names', 'network_view',
+                                 'objects', 'status', 'types']}
+
+# The address field of each host address type and the host list it is in
+ADDRESS_TYPES = {HOST_IPV4: ('ipv4addr', 'ipv4addrs'),
+                 HOST_IPV6: ('ipv6addr', 'ipv6addrs')}
+
+
+class WAPIError(Exception):
+    """An error returned to the client as a WAPI error response.
+
+    :param int status: The HTTP status code
+    :param str text: The error text
+
+    """
+    CODES = {400: 'Client.Ibap.Proto',
+             401: 'Client.Ibap.Auth',
+             404: 'Client.Ibap.Data.NotFound',
+             500: 'Server.Ibap.Error'}
+
+    def __init__(self, status, text):
+        super(WAPIError, self).__init__(status, text)
+        self.status = status
+        self.text = text
+
+    def as_dict(self):
+        return {'Error': 'AdmConProtoError: %s' % self.text,
+                'code': self.CODES.get(self.status, 'Server.Ibap.Error'),
+                'text': self.text}
+
+
+class FakeWAPI(object):
+    """An in-process WAPI stand-in served over HTTP on a local port.
+
+    :param str username: The user clients authenticate as
+    :param str password: The password clients authenticate with
+    :param float latency: Seconds to wait before each response
+    :param float error_rate: The probability of failing a request with a
+        server error
+    :param int seed: Seed for the error injection random number generator
+    :param bool db_objects: Serve the ``db_objects`` change feed, as newer
+        WAPI versions do
+
+    """
+    def __init__(self, username=session.USERNAME, password=session.PASSWORD,
+                 latency=0, error_rate=0, seed=None, db_objects=True):
+        self.db_objects = db_objects
+        self.error_rate = error_rate
+        self.latency = latency
+        self.password = password
+        self.username = username
+        self.connections = 0
+        self.requests = collections.Counter()
+        self.sequence_id = 0
+        self._changes = collections.OrderedDict()
+        self._failures = collections.deque()
+        self._hosts = collections.OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._pages = {}
+        self._random = random.Random(seed)
+        self._server = None
+        self._tokens = set()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def host(self):
+        """The ``host:port`` address clients connect to.
+
+        :rtype: str
+
+        """
+        return '%s:%i' % self._server.server_address[:2]
+
+    def session(self, session_class=session.Session, **kwargs):
+        """Return a session connected to the server.
+
+        :param class session_class: The session class to create
+        :param dict kwargs: Additional session arguments
+        :rtype: infoblox.Session
+
+        """
+        return session_class(self.host, self.username, self.password,
+                             https=False, **kwargs)
+
+    def start(self):
+        """Start serving requests in a background thread."""
+        handler = type('Handler', (Handler,), {'wapi': self})
+        self._server = Server(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        """Stop serving requests."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def add_host(self, name, ipv4addrs=(), ipv6addrs=(), **fields):
+        """Add a host record directly, returning its reference id.
+
+        :param str name: The host's FQDN
+        :param list ipv4addrs: The host's IPv4 addresses
+        :param list ipv6addrs: The host's IPv6 addresses
+        :param dict fields: Other host fields
+        :rtype: str
+
+        """
+        fields.update({'name': name,
+                       'ipv4addrs': [{'ipv4addr': addr}
+                                     for addr in ipv4addrs],
+                       'ipv6addrs': [{'ipv6addr': addr}
+                                     for addr in ipv6addrs]})
+        with self._lock:
+            return self._create(HOST, fields)
+
+    def fail_next(self, count=1, status=500, text='Injected failure'):
+        """Fail the next ``count`` requests with the error.
+
+        :param int count: The number of requests to fail
+        :param int status: The HTTP status code to fail them with
+        :param str text: The error text
+
+        """
+        with self._lock:
+            self._failures.extend([WAPIError(status, text)] * count)
+
+    def hosts(self):
+        """Return copies of all of the stored host records.
+
+        :rtype: list
+
+        """
+        with self._lock:
+            return copy.deepcopy(list(self._hosts.values()))
+
+    def handle(self, method, path, args, data, headers):
+        """Handle a WAPI request, returning the response status, body and
+        additional headers.
+
+        :param str method: The HTTP method
+        :param str path: The object type or reference id
+        :param dict args: The query string arguments
+        :param mixed data: The decoded request body
+        :param dict headers: The request headers
+        :rtype: tuple(int, mixed, dict)
+
+        """
+        self.requests[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        response_headers = {}
+        try:
+            response_headers = self._authenticate(headers)
+            with self._lock:
+                if self._failures:
+                    raise self._failures.popleft()
+                if self._random.random() < self.error_rate:
+                    raise WAPIError(500, 'Injected failure')
+                status, body = self._dispatch(method, path, args, data)
+        except WAPIError as error:
+            return error.status, error.as_dict(), response_headers
+        return status, body, response_headers
+
+    def _authenticate(self, headers):
+        cookie = headers.get('Cookie') or ''
+        for value in cookie.split(';'):
+            name, _sep, token = value.strip().partition('=')
+            if name == session.COOKIE and token.strip('"') in self._tokens:
+                return {}
+        authorization = headers.get('Authorization') or ''
+        if authorization.startswith('Basic '):
+            credentials = base64.b64decode(
+                authorization[6:].encode('ascii')).decode('utf-8')
+            if credentials == '%s:%s' % (self.username, self.password):
+                token = uuid.uuid4().hex
+                self._tokens.add(token)
+                return {'Set-Cookie': '%s="%s"; httponly; Path=/' %
+                                      (session.COOKIE, token)}
+        raise WAPIError(401, 'Authorization Required')
+
+    def _dispatch(self, method, path, args, data):
+        if path == 'request' and method == 'POST':
+            return 200, self._multi(data)
+        if method == 'GET':
+            return 200, self._get(path, args, data)
+        elif method == 'POST':
+            ref = self._create(path, data or {})
+            return 201, self._written(ref, args)
+        elif method == 'PUT':
+            ref = self._update(path, data or {})
+            return 200, self._written(ref, args)
+        elif method == 'DELETE':
+            return 200, self._delete(path)
+        raise WAPIError(400, 'Unsupported method %s' % method)
+
+    def _multi(self, operations):
+        if not isinstance(operations, list):
+            raise WAPIError(400, 'Multi-object request must be a list')
+        state = copy.deepcopy((self._hosts, self._changes,
+                               self.sequence_id))
+        results = []
+        try:
+            for operation in operations:
+                method = operation.get('method', 'GET')
+                args = operation.get('args') or {}
+                data = operation.get('data')
+                status, body = self._dispatch(method, operation['object'],
+                                              args, data)
+                results.append(body)
+        except WAPIError:
+            self._hosts, self._changes, self.sequence_id = state
+            raise
+        return results
+
+    # Object storage
+
+    def _changed(self, ref):
+        """Record a change to the object for the ``db_objects`` feed,
+        keeping only its latest sequence id.
+
+        """
+        self.sequence_id += 1
+        self._changes.pop(ref, None)
+        self._changes[ref] = self.sequence_id
+
+    def _new_ref(self, wapi_type, label):
+        key = base64.b64encode(('%s$%i' % (wapi_type, next(self._ids)))
+                               .encode('ascii')).decode('ascii').rstrip('=')
+        return '%s/%s:%s/default' % (wapi_type, key, label)
+
+    def _create(self, wapi_type, data):
+        if wapi_type != HOST:
+            raise WAPIError(400, 'Object type %s can not be created' %
+                            wapi_type)
+        if not data.get('name'):
+            raise WAPIError(400, 'field for create missing: name')
+        if any(host['name'] == data['name'] for host in self._hosts.values()):
+            raise WAPIError(400, 'The record \'%s\' already exists.' %
+                            data['name'])
+        host = {'configure_for_dns': True, 'view': 'default'}
+        host.update(dict((k, v) for k, v in data.items() if k[0] != '_'))
+        host['_ref'] = self._new_ref(HOST, host['name'])
+        self._set_addresses(host, host, {})
+        self._hosts[host['_ref']] = host
+        self._changed(host['_ref'])
+        return host['_ref']
+
+    def _set_addresses(self, host, data, existing):
+        for wapi_type, (field, key) in ADDRESS_TYPES.items():
+            if key not in data:
+                host.setdefault(key, [])
+                continue
+            addresses = []
+            for value in data[key] or []:
+                if not isinstance(value, dict) or not value.get(field):
+                    raise WAPIError(400, 'Invalid value for %s' % key)
+                address = existing.get(value[field]) or {
+                    '_ref': self._new_ref(wapi_type, '%s/%s' %
+                                          (value[field], host['name'])),
+                    'configure_for_dhcp': False}
+                address.update(dict((k, v) for k, v in value.items()
+                                    if k[0] != '_'))
+                address['host'] = host['name']
+                addresses.append(address)
+            host[key] = addresses
+
+    def _update(self, ref, data):
+        host, address = self._lookup(ref)
+        if address is not None:
+            address.update(dict((k, v) for k, v in data.items()
+                                if k[0] != '_' and k != 'host'))
+            self._changed(host['_ref'])
+            return address['_ref']
+        if 'name' in data and data['name'] != host['name']:
+            if any(other['name'] == data['name']
+                   for other in self._hosts.values()):
+                raise WAPIError(400, 'The record \'%s\' already exists.' %
+                                data['name'])
+        existing = {}
+        for field, key in ADDRESS_TYPES.values():
+            existing.update((addr[field], addr) for addr in host[key])
+        host.update(dict((k, v) for k, v in data.items()
+                         if k[0] != '_' and k not in ('ipv4addrs',
+                                                      'ipv6addrs')))
+        self._set_addresses(host, data, existing)
+        for field, key in ADDRESS_TYPES.values():
+            for address in host[key]:
+                address['host'] = host['name']
+        self._changed(ref)
+        # The reference id embeds the name, so renaming the host changes it
+        host['_ref'] = '%s/%s:%s/default' % (
+            HOST, ref.split('/')[1].split(':')[0], host['name'])
+        if host['_ref'] != ref:
+            del self._hosts[ref]
+            self._hosts[host['_ref']] = host
+            self._changed(host['_ref'])
+        return host['_ref']
+
+    def _delete(self, ref):
+        host, address = self._lookup(ref)
+        if address is None:
+            del self._hosts[host['_ref']]
+        else:
+            key = ADDRESS_TYPES[ref.split('/')[0]][1]
+            host[key] = [addr for addr in host[key] if addr is not address]
+        self._changed(host['_ref'])
+        return ref
+
+    def _lookup(self, ref):
+        """Return the host for the reference id, and the address if the
+        reference is for one of the host's addresses.
+
+        :rtype: tuple(dict, dict|None)
+        :raises: WAPIError
+
+        """
+        wapi_type = ref.split('/')[0]
+        if wapi_type == HOST and ref in self._hosts:
+            return self._hosts[ref], None
+        if wapi_type in ADDRESS_TYPES:
+            key = ADDRESS_TYPES[wapi_type][1]
+            for host in self._hosts.values():
+                for address in host[key]:
+                    if address['_ref'] == ref:
+                        return host, address
+        raise WAPIError(404, 'Reference %s not found' % ref)
+
+    # Searching and output
+
+    def _db_objects(self, args):
+        """Return the objects changed after the start sequence id, oldest
+        change first. Deleted objects are included with the sequence id of
+        their deletion, and requesting them by reference id returns a 404.
+
+        :rtype: list
+
+        """
+        start = _sequence_id(args.get('start_sequence_id'))
+        types = (args.get('object_types') or HOST).split(',')
+        results = [{'_ref': '%s/%s:%i' % (DB_OBJECTS, ref.split('/')[1]
+                                          .split(':')[0], sequence_id),
+                    'last_sequence_id': '0:%i' % sequence_id,
+                    'object': ref,
+                    'object_type': ref.split('/')[0],
+                    'unique_id': ref.split('/')[1].split(':')[0]}
+                   for ref, sequence_id in self._changes.items()
+                   if sequence_id > start and ref.split('/')[0] in types]
+        if '_max_results' in args:
+            results = results[:abs(int(args['_max_results']))]
+        return results
+
+    def _objects(self, wapi_type):
+        """Return the searchable values of all objects of the type, including
+        the fields derived from the stored host records.
+
+        :rtype: list
+
+        """
+        if wapi_type == HOST:
+            return [_derived(host) for host in self._hosts.values()]
+        if wapi_type in ADDRESS_TYPES:
+            key = ADDRESS_TYPES[wapi_type][1]
+            return [address for host in self._hosts.values()
+                    for address in host[key]]
+        if wapi_type == IPV4_ADDRESS:
+            return [{'_ref': 'ipv4address/%s:%s' % (
+                        base64.b64encode(address['ipv4addr'].encode('ascii'))
+                        .decode('ascii').rstrip('='), address['ipv4addr']),
+                     'ip_address': address['ipv4addr'],
+                     'mac_address': address.get('mac'),
+                     'names': [host['name']],
+                     'network_view': 'default',
+                     'objects': [host['_ref']],
+                     'status': 'USED',
+                     'types': ['HOST']}
+                    for host in self._hosts.values()
+                    for address in host['ipv4addrs']]
+        raise WAPIError(400, 'Unknown object type: %s' % wapi_type)
+
+    def _get(self, path, args, data):
+        if path == DB_OBJECTS and self.db_objects:
+            return self._db_objects(args)
+        return_fields = self._return_fields(path.split('/')[0], args)
+        if '/' in path:
+            host, address = self._lookup(path)
+            return self._output(address or _derived(host), return_fields)
+        if '_page_id' in args:
+            return self._page(args['_page_id'])
+        criteria = dict((k, v) for k, v in args.items() if k[0] != '_')
+        criteria.update(data or {})
+        results = [self._output(value, return_fields)
+                   for value in self._objects(path)
+                   if self._matches(value, criteria)]
+        if _flag(args.get('_paging')):
+            if not _flag(args.get('_return_as_object')):
+                raise WAPIError(400, '_return_as_object is required for '
+                                     'paging')
+            page_id = uuid.uuid4().hex
+            self._pages[page_id] = (results,
+                                    int(args.get('_max_results', 1000)))
+            return self._page(page_id)
+        if '_max_results' in args:
+            results = results[:abs(int(args['_max_results']))]
+        if _flag(args.get('_return_as_object')):
+            return {'result': results}
+        return results
+
+    def _page(self, page_id):
+        if page_id not in self._pages:
+            raise WAPIError(400, 'Page id %s is invalid' % page_id)
+        results, size = self._pages.pop(page_id)
+        page = {'result': results[:size]}
+        if len(results) > size:
+            page['next_page_id'] = uuid.uuid4().hex
+            self._pages[page['next_page_id']] = results[size:], size
+        return page
+
+    @staticmethod
+    def _matches(value, criteria):
+        for key, expected in criteria.items():
+            if key.startswith('*'):
+                if not _extattr_matches(value.get('extattrs') or {}, key[1:],
+                                        expected):
+                    return False
+                continue
+            regex = key.endswith('~')
+            actual = value.get(key.rstrip('~'))
+            candidates = actual if isinstance(actual, list) else [actual]
+            if regex:
+                if not any(candidate is not None and
+                           re.search(expected, str(candidate))
+                           for candidate in candidates):
+                    return False
+            elif expected not in candidates:
+                return False
+        return True
+
+    @staticmethod
+    def _return_fields(wapi_type, args):
+        fields = list(DEFAULT_FIELDS.get(wapi_type, []))
+        if args.get('_return_fields'):
+            fields = args['_return_fields'].split(',')
+        elif args.get('_return_fields+'):
+            fields += args['_return_fields+'].split(',')
+        return fields
+
+    def _output(self, value, fields):
+        result = {'_ref': value['_ref']}
+        for field in fields:
+            if field in ('ipv4addrs', 'ipv6addrs') and field in value:
+                wapi_type = HOST_IPV4 if field == 'ipv4addrs' else HOST_IPV6
+                result[field] = [self._output(address,
+                                              DEFAULT_FIELDS[wapi_type])
+                                 for address in value[field]]
+            elif field in value:
+                result[field] = copy.deepcopy(value[field])
+        return result
+
+    def _written(self, ref, args):
+        if not args.get('_return_fields'):
+            return ref
+        return self._get(ref, args, None)
+
+
+class Handler(server.BaseHTTPRequestHandler):
+    """Translates HTTP requests into calls to :meth:`FakeWAPI.handle`."""
+    disable_nagle_algorithm = True
+    protocol_version = 'HTTP/1.1'
+    wapi = None
+
+    def setup(self):
+        with self.wapi._lock:
+            self.wapi.connections += 1
+        server.BaseHTTPRequestHandler.setup(self)
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def log_message(self, format, *args):
+        LOGGER.debug(format, *args)
+
+    def _handle(self, method):
+        url = urlparse.urlparse(self.path)
+        args = dict(urlparse.parse_qsl(url.query))
+        path = re.sub(r'^/wapi/v[\d.]+/', '', urlparse.unquote(url.path))
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try:
+            data = json.loads(body.decode('utf-8')) if body else None
+        except ValueError:
+            status, result, headers = 400, WAPIError(
+                400, 'Invalid JSON').as_dict(), {}
+        else:
+            status, result, headers = self.wapi.handle(
+                method, path, args, data, self.headers)
+        content = json.dumps(result).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class Server(socketserver.ThreadingMixIn, server.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def _derived(host):
+    """Return the values of a stored host with the fields the WAPI derives
+    from it.
+
+    :rtype: dict
+
+    """
+    value = dict(host)
+    value['dns_name'] = host['name']
+    value['zone'] = host['name'].partition('.')[2]
+    value['ipv4addr'] = [a['ipv4addr'] for a in host['ipv4addrs']]
+    value['ipv6addr'] = [a['ipv6addr'] for a in host['ipv6addrs']]
+    value['mac'] = [a.get('mac') for a in host['ipv4addrs']]
+    return value
+
+
+def _extattr_matches(extattrs, key, expected):
+    """Check an extensible attribute search argument, where ``key`` is the
+    attribute name followed by an optional ``~``, ``<`` or ``>`` modifier.
+    The ``<`` and ``>`` modifiers are inclusive, as they are in the WAPI.
+
+    """
+    modifier = key[-1] if key[-1:] in ('~', '<', '>') else ''
+    name = key[:-1] if modifier else key
+    if name not in extattrs:
+        return False
+    actual = extattrs[name].get('value')
+    if modifier == '~':
+        return re.search(expected, str(actual)) is not None
+    elif modifier:
+        try:
+            actual, expected = float(actual), float(expected)
+        except (TypeError, ValueError):
+            return False
+        return actual <= expected if modifier == '<' else actual >= expected
+    return str(actual) == str(expected)
+
+
+def _flag(value):
+    return str(value).lower() in ('1', 'true')
+
+
+def _sequence_id(value):
+    """Return the counter of a ``db_objects`` sequence id, eg ``0:42``.
+
+    :rtype: int
+
+    """
+    return int(str(value or 0).rpartition(':')[2] or 0)
@@ -0,0 +1,115 @@
+"""
+Optional OpenTelemetry tracing of record operations and the HTTP requests
+they send. Tracing is disabled until :func:`configure` is called, and the
+instrumented methods only check a module attribute while it is disabled.
+
+Example::
+
+    import infoblox.tracing
+
+    infoblox.tracing.configure()
+    host = infoblox.Host(session, name='foo.bar.net')
+
+Each :meth:`~infoblox.record.Record.fetch`,
+:meth:`~infoblox.record.Record.save` and
+:meth:`~infoblox.record.Record.delete` call is a span, for example
+``Host.fetch``, with child spans for each HTTP request and for assigning the
+response values. Spans have the ``wapi.type`` and, once known, the
+``wapi.ref`` attributes.
+
+"""
+import functools
+
+# opentelemetry.trace, imported by configure() so that the instrumented
+# modules do not import it while tracing is disabled
+trace = None
+
+TRACER_NAME = 'infoblox'
+
+tracer = None
+
+
+class NoopSpan(object):
+    """Stands in for a span when tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = NoopSpan()
+
+
+def configure(new_tracer=None):
+    """Enable tracing with the tracer, or with the tracer from the global
+    OpenTelemetry tracer provider if none is passed in. Any object that
+    implements the OpenTelemetry ``Tracer.start_as_current_span`` method
+    can be used.
+
+    :param opentelemetry.trace.Tracer new_tracer: The tracer to use
+    :raises: RuntimeError
+
+    """
+    global trace, tracer
+    if new_tracer is None:
+        if trace is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise RuntimeError('opentelemetry-api is required for '
+                                   'tracing')
+        new_tracer = trace.get_tracer(TRACER_NAME)
+    tracer = new_tracer
+
+
+def disable():
+    """Stop creating spans."""
+    global tracer
+    tracer = None
+
+
+def span(name, attributes=None):
+    """Return a context manager for a span that is a child of the current
+    span, or a span that does nothing if tracing is disabled.
+
+    :param str name: The span name
+    :param dict attributes: The span attributes
+    :rtype: contextmanager
+
+    """
+    if tracer is None:
+        return _NOOP_SPAN
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced(operation):
+    """Decorate a :class:`~infoblox.record.Record` method so that each call
+    is a span named after the record class and the operation.
+
+    :param str operation: The operation name
+    :rtype: callable
+
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if tracer is None:
+                return method(self, *args, **kwargs)
+            attributes = {'wapi.type': self._wapi_type}
+            ref = getattr(self, '_ref', None)
+            if ref:
+                attributes['wapi.ref'] = ref
+            with tracer.start_as_current_span(
+                    '%s.%s' % (self.__class__.__name__, operation),
+                    attributes=attributes) as current:
+                result = method(self, *args, **kwargs)
+                if self._ref and self._ref != ref:
+                    current.set_attribute('wapi.ref', self._ref)
+                return result
+        return wrapper
+    return decorator
@@ -7,6 +7,14 @@ try:
 except ImportError:
     requirements.append('argparse')
     tests_require.append('unittest2')
+try:
+    import concurrent.futures
+except ImportError:
+    requirements.append('futures')
+try:
+    import ipaddress
+except ImportError:
+    requirements.append('ipaddress')
 
 classifiers = ['Intended Audience :: Developers',
                'Intended Audience :: System Administrators',
@@ -36,6 +44,9 @@ setup(name='infoblox',
       package_data={'': ['LICENSE', 'README.md']},
       include_package_data=True,
       install_requires=requirements,
+      extras_require={'asyncio': ['aiohttp'],
+                      'fast-json': ['orjson'],
+                      'tracing': ['opentelemetry-api']},
       license=open('LICENSE').read(),
       entry_points={'console_scripts': ['infoblox-host=infoblox.cli:main']},
       classifiers=classifiers,
@@ -0,0 +1,133 @@
+"""
+asyncio Session and Record Tests
+
+"""
+import asyncio
+import json
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import mock
+
+from infoblox import aio
+from infoblox import exceptions
+
+
+def response(status_code, value):
+    return aio.Response(status_code, json.dumps(value).encode('utf-8'))
+
+
+class AsyncTestCase(unittest.TestCase):
+
+    HOST = '127.0.0.1'
+    REF = 'record:host/ZG5zLmhvc3Q:foo.bar.net/default'
+    IPV4_REF = 'record:host_ipv4addr/ZG5zLmhvc3RfYWRkcmVzcw:10.0.0.1/default'
+
+    def setUp(self):
+        self.session = aio.AsyncSession(self.HOST)
+        self.session._request = mock.AsyncMock()
+
+    def run_async(self, coroutine):
+        return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+class AsyncSessionTests(AsyncTestCase):
+
+    def test_default_auth(self):
+        self.assertEqual(self.session.auth.login, 'admin')
+        self.assertEqual(self.session.auth.password, 'infoblox')
+
+    def test_get_url(self):
+        self.session._request.return_value = response(200, [])
+        self.run_async(self.session.get('record:host', {'name': 'foo'}))
+        method, url, data = self.session._request.call_args[0]
+        self.assertEqual(method, 'GET')
+        self.assertEqual(url, 'https://127.0.0.1/wapi/v1.2/record:host')
+        self.assertEqual(json.loads(data), {'name': 'foo'})
+
+    def test_verify_is_disabled_by_default(self):
+        self.assertIs(self.session._ssl(), False)
+
+    def test_verify_uses_default_checks(self):
+        session = aio.AsyncSession(self.HOST, verify=True)
+        self.assertIsNone(session._ssl())
+
+    def test_verify_with_ca_bundle(self):
+        session = aio.AsyncSession(self.HOST, verify='/etc/ca.pem')
+        with mock.patch('ssl.create_default_context') as create:
+            self.assertIs(session._ssl(), create.return_value)
+        create.assert_called_once_with(cafile='/etc/ca.pem')
+
+    def test_verify_is_passed_to_connector(self):
+        session = aio.AsyncSession(self.HOST, verify=True)
+        request = mock.MagicMock()
+        request.return_value.__aenter__.return_value.status = 200
+        request.return_value.__aenter__.return_value.read = \
+            mock.AsyncMock(return_value=b'[]')
+        with mock.patch('aiohttp.TCPConnector') as connector, \
+                mock.patch('aiohttp.ClientSession') as client:
+            client.return_value.request = request
+            self.run_async(session.get('record:host'))
+        connector.assert_called_once_with(limit=aio.POOL_SIZE, ssl=None)
+
+
+class AsyncHostTests(AsyncTestCase):
+
+    def test_constructor_does_not_fetch(self):
+        aio.Host(self.session, name='foo.bar.net')
+        self.assertFalse(self.session._request.called)
+
+    def test_fetch_assigns_values(self):
+        self.session._request.return_value = response(200, [
+            {'_ref': self.REF, 'name': 'foo.bar.net', 'comment': 'test'}])
+        host = aio.Host(self.session, name='foo.bar.net')
+        self.assertTrue(self.run_async(host.fetch()))
+        self.assertEqual(host._ref, self.REF)
+        self.assertEqual(host.comment, 'test')
+
+    def test_fetch_nested_uses_async_classes(self):
+        self.session._request.side_effect = [
+            response(200, [{'_ref': self.REF, 'name': 'foo.bar.net',
+                            'ipv4addrs': [{'_ref': self.IPV4_REF,
+                                           'ipv4addr': '10.0.0.1'}]}])]
+        host = aio.Host(self.session, name='foo.bar.net')
+        self.run_async(host.fetch())
+        self.assertIsInstance(host.ipv4addrs[0], aio.HostIPv4)
+
+    def test_fetch_error_raises(self):
+        self.session._request.return_value = response(400, {'text': 'Bad'})
+        host = aio.Host(self.session, name='foo.bar.net')
+        self.assertRaises(exceptions.ProtocolError,
+                          self.run_async, host.fetch())
+
+    def test_save_posts_then_fetches(self):
+        self.session._request.side_effect = [
+            response(201, self.REF),
+            response(200, [{'_ref': self.REF, 'name': 'foo.bar.net'}])]
+        host = aio.Host(self.session)
+        host.name = 'foo.bar.net'
+        self.assertTrue(self.run_async(host.save()))
+        self.assertEqual(self.session._request.call_args_list[0][0][0],
+                         'POST')
+        self.assertEqual(host._ref, self.REF)
+
+    def test_delete(self):
+        self.session._request.return_value = response(200, self.REF)
+        host = aio.Host(self.session, self.REF)
+        self.assertTrue(self.run_async(host.delete()))
+        self.assertIsNone(host._ref)
+
+    def test_iterate(self):
+        self.session._request.side_effect = [
+            response(200, {'result': [{'_ref': self.REF, 'name': 'a'}],
+                           'next_page_id': 'page1'}),
+            response(200, {'result': [{'_ref': self.REF, 'name': 'b'}]})]
+
+        async def collect():
+            return [host async for host in aio.Host.iterate(self.session)]
+
+        hosts = self.run_async(collect())
+        self.assertEqual([host.name for host in hosts], ['a', 'b'])
+        self.assertIsInstance(hosts[0], aio.Host)
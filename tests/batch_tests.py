@@ -0,0 +1,117 @@
+"""
+Batch Tests
+
+"""
+import json
+
+import httmock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import exceptions
+from infoblox import record
+from infoblox import session
+
+
+class BatchTests(unittest.TestCase):
+
+    HOST = '127.0.0.1'
+    REF = 'record:host/ZG5zLmhvc3Q:foo.bar.net/default'
+
+    def setUp(self):
+        self.session = session.Session(self.HOST)
+        self.requests = []
+
+    def new_host(self, name):
+        host = record.Host(self.session)
+        host.name = name
+        host.ipv4addrs = [{'ipv4addr': '10.0.0.1'}]
+        return host
+
+    @httmock.all_requests
+    def multi_mock(self, url, request):
+        self.requests.append((url.path, json.loads(request.body)))
+        body = json.loads(request.body)
+        return {'content': json.dumps(['%s/%i' % (self.REF, i)
+                                       for i in range(len(body))]),
+                'headers': {'content-type': 'application/json'},
+                'status_code': 200}
+
+    def test_save_posts_multi_request(self):
+        host = self.new_host('foo.bar.net')
+        with httmock.HTTMock(self.multi_mock):
+            with self.session.batch() as batch:
+                batch.save(host)
+                self.assertEqual(len(batch), 1)
+        path, body = self.requests[0]
+        self.assertEqual(path, '/wapi/v1.2/request')
+        self.assertEqual(body[0]['method'], 'POST')
+        self.assertEqual(body[0]['object'], 'record:host')
+        self.assertEqual(body[0]['data']['name'], 'foo.bar.net')
+
+    def test_save_assigns_reference_ids(self):
+        hosts = [self.new_host('host%i.bar.net' % i) for i in range(3)]
+        with httmock.HTTMock(self.multi_mock):
+            with self.session.batch() as batch:
+                for host in hosts:
+                    batch.save(host)
+        self.assertEqual([host._ref for host in hosts],
+                         ['%s/%i' % (self.REF, i) for i in range(3)])
+        self.assertListEqual(batch.errors, [])
+
+    def test_flushes_at_size(self):
+        with httmock.HTTMock(self.multi_mock):
+            with self.session.batch(size=2) as batch:
+                for i in range(5):
+                    batch.save(self.new_host('host%i.bar.net' % i))
+        self.assertEqual([len(body) for _path, body in self.requests],
+                         [2, 2, 1])
+
+    def test_delete_uses_reference(self):
+        host = self.new_host('foo.bar.net')
+        host._ref = self.REF
+        with httmock.HTTMock(self.multi_mock):
+            with self.session.batch() as batch:
+                batch.delete(host)
+        self.assertEqual(self.requests[0][1],
+                         [{'method': 'DELETE', 'object': self.REF}])
+        self.assertIsNone(host._ref)
+
+    def test_delete_without_reference_raises(self):
+        batch = self.session.batch()
+        self.assertRaises(ValueError, batch.delete, self.new_host('foo'))
+
+    def test_exception_discards_pending(self):
+        with httmock.HTTMock(self.multi_mock):
+            try:
+                with self.session.batch() as batch:
+                    batch.save(self.new_host('foo.bar.net'))
+                    raise RuntimeError()
+            except RuntimeError:
+                pass
+        self.assertListEqual(self.requests, [])
+
+    @httmock.all_requests
+    def failing_mock(self, url, request):
+        body = json.loads(request.body)
+        self.requests.append((url.path, body))
+        if url.path.endswith('/request') or body.get('name') == 'bad':
+            return {'content': json.dumps({'text': 'Invalid host'}),
+                    'headers': {'content-type': 'application/json'},
+                    'status_code': 400}
+        return {'content': json.dumps(self.REF),
+                'headers': {'content-type': 'application/json'},
+                'status_code': 201}
+
+    def test_failure_is_mapped_to_record(self):
+        good, bad = self.new_host('good'), self.new_host('bad')
+        with httmock.HTTMock(self.failing_mock):
+            batch = self.session.batch()
+            batch.save(good)
+            batch.save(bad)
+            self.assertFalse(batch.flush())
+        self.assertEqual(len(batch.errors), 1)
+        self.assertIs(batch.errors[0][0], bad)
+        self.assertIsInstance(batch.errors[0][1], exceptions.ProtocolError)
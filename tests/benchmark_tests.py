@@ -0,0 +1,88 @@
+"""
+Benchmark Suite Tests
+
+"""
+import json
+import os
+import shutil
+import tempfile
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import mock
+
+from benchmarks import suite
+
+
+def results(**seconds):
+    return dict((name, {'seconds_per_op': value,
+                        'ops_per_second': 1 / value})
+                for name, value in seconds.items())
+
+
+class CompareTests(unittest.TestCase):
+
+    BASELINE = results(fast=1.0, slow=2.0)
+
+    def test_within_threshold(self):
+        self.assertEqual(suite.compare(results(fast=1.1, slow=1.5),
+                                       self.BASELINE, 20), [])
+
+    def test_at_threshold(self):
+        self.assertEqual(suite.compare(results(fast=1.25, slow=2.5),
+                                       self.BASELINE, 25), [])
+
+    def test_beyond_threshold(self):
+        regressions = suite.compare(results(fast=1.3, slow=2.0),
+                                    self.BASELINE, 25)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('fast is 30.0% slower'))
+
+    def test_missing_from_baseline(self):
+        self.assertEqual(suite.compare(results(new=100.0), self.BASELINE),
+                         [])
+
+
+class MainTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.baseline = os.path.join(self.directory, 'baseline.json')
+        with open(self.baseline, 'w') as handle:
+            json.dump({'results': results(fast=1.0)}, handle)
+        self.output = os.path.join(self.directory, 'results.json')
+
+    def main(self, seconds, *args):
+        with mock.patch('benchmarks.suite.run',
+                        return_value=results(fast=seconds)):
+            with mock.patch('sys.stderr') as stderr:
+                status = suite.main(['-o', self.output] + list(args))
+        return status, ''.join(call[0][0] for call in
+                               stderr.write.call_args_list)
+
+    def test_no_regression(self):
+        status, _stderr = self.main(1.1, '-b', self.baseline)
+        self.assertEqual(status, 0)
+        with open(self.output) as handle:
+            self.assertEqual(json.load(handle)['results'],
+                             results(fast=1.1))
+
+    def test_regression_exits_non_zero(self):
+        status, stderr = self.main(1.5, '-b', self.baseline)
+        self.assertEqual(status, 1)
+        self.assertIn('REGRESSION: fast is 50.0% slower', stderr)
+
+    def test_threshold(self):
+        self.assertEqual(self.main(1.5, '-b', self.baseline, '-t', '60')[0],
+                         0)
+
+    def test_missing_baseline(self):
+        status, stderr = self.main(1.0, '-b', self.baseline + '.missing')
+        self.assertEqual(status, 2)
+        self.assertIn('Could not read the baseline', stderr)
+
+    def test_without_baseline(self):
+        self.assertEqual(self.main(100.0)[0], 0)
@@ -0,0 +1,108 @@
+"""
+Bulk Command Tests
+
+"""
+import io
+import json
+import time
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import mock
+
+from infoblox import bulk
+from infoblox import cli
+from infoblox import exceptions
+
+
+class ReadOperationsTests(unittest.TestCase):
+
+    def test_jsonl(self):
+        handle = io.StringIO(u'{"action": "add", "host": "a"}\n\n'
+                             u'{"action": "remove", "host": "b"}\n')
+        self.assertEqual(list(bulk.read_operations(handle, 'jsonl')),
+                         [(1, {'action': 'add', 'host': 'a'}),
+                          (3, {'action': 'remove', 'host': 'b'})])
+
+    def test_jsonl_invalid_line(self):
+        handle = io.StringIO(u'{"action": \n')
+        line_num, error = next(bulk.read_operations(handle, 'jsonl'))
+        self.assertIsInstance(error, ValueError)
+
+    def test_csv_with_header(self):
+        handle = io.StringIO(u'action,host,address,comment\n'
+                             u'add,a.bar.net,10.0.0.1,test\n'
+                             u'remove,b.bar.net\n')
+        self.assertEqual(list(bulk.read_operations(handle, 'csv')), [
+            (2, {'action': 'add', 'host': 'a.bar.net',
+                 'address': '10.0.0.1', 'comment': 'test'}),
+            (3, {'action': 'remove', 'host': 'b.bar.net'})])
+
+
+class RunTests(unittest.TestCase):
+
+    def setUp(self):
+        self.infoblox = mock.Mock()
+        self.infoblox.add_new_host.return_value = True
+        self.infoblox.delete_old_host.side_effect = \
+            exceptions.ProtocolError('Not found')
+
+    def test_results_in_input_order(self):
+        def add(host, address, comment):
+            time.sleep(0.01 if host == 'slow' else 0)
+            return True
+        self.infoblox.add_new_host.side_effect = add
+        operations = [(i, {'action': 'add', 'host': host, 'address': '1'})
+                      for i, host in enumerate(['slow', 'a', 'b', 'c'])]
+        results = list(bulk.run(self.infoblox, operations, 2))
+        self.assertEqual([r['host'] for r in results],
+                         ['slow', 'a', 'b', 'c'])
+
+    def test_errors_are_reported_per_line(self):
+        operations = [(1, {'action': 'remove', 'host': 'a'}),
+                      (2, {'action': 'explode', 'host': 'b'}),
+                      (3, ValueError('Bad JSON')),
+                      (4, {'action': 'add', 'host': 'c', 'address': '1'})]
+        results = list(bulk.run(self.infoblox, operations))
+        self.assertEqual([r['success'] for r in results],
+                         [False, False, False, True])
+        self.assertEqual(results[0]['error'], 'ProtocolError: Not found')
+        self.assertIn('explode', results[1]['error'])
+
+    def test_process_writes_json_lines_and_summary(self):
+        handle = io.StringIO(u'{"action": "add", "host": "a", '
+                             u'"address": "10.0.0.1"}\n'
+                             u'{"action": "remove", "host": "b"}\n')
+        output = io.StringIO()
+        summary = bulk.process(self.infoblox, handle, output, 'jsonl')
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([line['line'] for line in lines], [1, 2])
+        self.assertEqual((summary['total'], summary['succeeded'],
+                          summary['failed']), (2, 1, 1))
+        self.infoblox.add_new_host.assert_called_once_with(
+            'a', '10.0.0.1', None)
+
+
+class ParserTests(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = cli.build_parser()
+
+    def test_options_after_action(self):
+        args = self.parser.parse_args(['grid', 'add', 'a.bar.net',
+                                       '10.0.0.1', '-u', 'user'])
+        self.assertEqual(args.username, 'user')
+        self.assertEqual(args.comment, '')
+
+    def test_options_before_action(self):
+        args = self.parser.parse_args(['-u', 'user', 'grid', 'remove',
+                                       'a.bar.net'])
+        self.assertEqual(args.username, 'user')
+        self.assertFalse(args.debug)
+
+    def test_bulk(self):
+        args = self.parser.parse_args(['grid', 'bulk', 'hosts.csv', '-n',
+                                       '32'])
+        self.assertEqual((args.file, args.concurrency), ('hosts.csv', 32))
@@ -0,0 +1,116 @@
+"""
+Cache Tests
+
+"""
+import json
+
+import httmock
+import mock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import cache
+from infoblox import record
+
+
+class CacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cache.Cache(max_size=2, ttl=10, ttls={'ipv4address': 1})
+
+    def test_miss_then_hit(self):
+        key = ('record:host', '{}', '{}')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, 'value')
+        self.assertEqual(self.cache.get(key), 'value')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        for name in ('a', 'b'):
+            self.cache.set(('record:host', name, '{}'), name)
+        self.cache.get(('record:host', 'a', '{}'))
+        self.cache.set(('record:host', 'c', '{}'), 'c')
+        self.assertIsNone(self.cache.get(('record:host', 'b', '{}')))
+        self.assertEqual(self.cache.get(('record:host', 'a', '{}')), 'a')
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_per_type_ttl(self):
+        with mock.patch('infoblox.cache._clock', return_value=100):
+            self.cache.set(('ipv4address', '{}', '{}'), 'short')
+            self.cache.set(('record:host', '{}', '{}'), 'long')
+        with mock.patch('infoblox.cache._clock', return_value=105):
+            self.assertIsNone(self.cache.get(('ipv4address', '{}', '{}')))
+            self.assertEqual(self.cache.get(('record:host', '{}', '{}')),
+                             'long')
+
+    def test_invalidate_by_contained_reference(self):
+        key = ('record:host', '{"name": "a"}', '{}')
+        self.cache.set(key, 'value', {'record:host/abc:a/default'})
+        self.cache.invalidate('record:host/abc:a/default')
+        self.assertIsNone(self.cache.get(key))
+
+    def test_invalidate_related_searches(self):
+        key = ('record:host_ipv4addr', '{"ipv4addr": "10.0.0.1"}', '{}')
+        self.cache.set(key, 'value')
+        self.cache.invalidate('record:host')
+        self.assertIsNone(self.cache.get(key))
+
+    def test_references(self):
+        self.assertEqual(cache.references([{'_ref': 'a', 'ipv4addrs': [
+            {'_ref': 'b'}, {'_ref': 'c'}]}]), {'a', 'b', 'c'})
+
+
+class CachingSessionTests(unittest.TestCase):
+
+    REF = 'record:host/ZG5zLmhvc3Q:foo.bar.net/default'
+
+    def setUp(self):
+        self.session = cache.CachingSession('127.0.0.1')
+        self.requests = []
+
+    @httmock.all_requests
+    def host_mock(self, url, request):
+        self.requests.append(request.method)
+        if request.method == 'GET':
+            content = [{'_ref': self.REF, 'name': 'foo.bar.net',
+                        'comment': 'v%i' % len(self.requests)}]
+        else:
+            content = self.REF
+        return {'content': json.dumps(content),
+                'headers': {'content-type': 'application/json'},
+                'status_code': 200}
+
+    def test_repeated_fetch_is_cached(self):
+        with httmock.HTTMock(self.host_mock):
+            first = record.Host(self.session, name='foo.bar.net')
+            second = record.Host(self.session, name='foo.bar.net')
+        self.assertEqual(self.requests, ['GET'])
+        self.assertEqual(first.comment, second.comment)
+        self.assertEqual(self.session.cache.hits, 1)
+
+    def test_uncached_fetch_refreshes_cache(self):
+        with httmock.HTTMock(self.host_mock):
+            record.Host(self.session, name='foo.bar.net')
+            with self.session.uncached():
+                fresh = record.Host(self.session, name='foo.bar.net')
+            cached = record.Host(self.session, name='foo.bar.net')
+        self.assertEqual(self.requests, ['GET', 'GET'])
+        self.assertEqual(fresh.comment, 'v2')
+        self.assertEqual(cached.comment, 'v2')
+
+    def test_save_invalidates(self):
+        with httmock.HTTMock(self.host_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            host.comment = 'changed'
+            host.save()
+            record.Host(self.session, name='foo.bar.net')
+        self.assertEqual(self.requests, ['GET', 'PUT', 'GET'])
+
+    def test_delete_invalidates(self):
+        with httmock.HTTMock(self.host_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            host.delete()
+            record.Host(self.session, name='foo.bar.net')
+        self.assertEqual(self.requests, ['GET', 'DELETE', 'GET'])
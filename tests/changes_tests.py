@@ -0,0 +1,168 @@
+"""
+Change Feed Tests
+
+"""
+import os
+import shutil
+import tempfile
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import cache
+from infoblox import changes
+from infoblox import exceptions
+from infoblox import index
+from infoblox import record
+from infoblox import snapshot
+from infoblox import testing
+
+
+class SequenceFeedTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.addCleanup(self.wapi.stop)
+        self.wapi.add_host('a.bar.net', ['10.0.0.1'])
+        self.wapi.add_host('b.bar.net', ['10.0.0.2'])
+        self.session = self.wapi.session()
+        self.index = index.HostIndex()
+        self.feed = changes.ChangeFeed(self.session)
+        self.feed.register(self.index)
+
+    def test_first_poll_applies_all_hosts(self):
+        self.assertEqual(self.feed.poll(), {'saved': 2, 'deleted': 0})
+        self.assertEqual(self.feed.mode, changes.SEQUENCE)
+        self.assertEqual(self.feed.cursor, '0:2')
+        self.assertEqual(self.index.by_address('10.0.0.2')[0].name,
+                         'b.bar.net')
+
+    def test_poll_applies_changes_since_cursor(self):
+        self.feed.poll()
+        host = record.Host(self.session, name='a.bar.net')
+        host.comment = 'Changed'
+        host.save()
+        record.Host(self.session, name='b.bar.net').delete()
+        self.wapi.add_host('c.bar.net', ['10.0.0.3'])
+        self.assertEqual(self.feed.poll(), {'saved': 2, 'deleted': 1})
+        self.assertEqual(self.index.get('a.bar.net').comment, 'Changed')
+        self.assertIsNone(self.index.get('b.bar.net'))
+        self.assertEqual(self.index.get('c.bar.net').addresses(),
+                         ['10.0.0.3'])
+
+    def test_deleted_hosts_are_not_fetched_again(self):
+        self.feed.poll()
+        record.Host(self.session, name='b.bar.net').delete()
+        self.wapi.requests.clear()
+        self.assertEqual(self.feed.poll(), {'saved': 0, 'deleted': 1})
+        # The changes, the batch and the fallback fetch of the host
+        self.assertEqual(self.wapi.requests['GET'], 2)
+        self.assertEqual(self.wapi.requests['POST'], 1)
+
+    def test_poll_without_changes(self):
+        self.feed.poll()
+        self.wapi.requests.clear()
+        self.assertEqual(self.feed.poll(), {'saved': 0, 'deleted': 0})
+        self.assertEqual(self.wapi.requests['GET'], 1)
+        self.assertEqual(self.wapi.requests['POST'], 0)
+
+    def test_poll_pages(self):
+        for offset in range(5):
+            self.wapi.add_host('host%i.bar.net' % offset)
+        self.feed.page_size = 2
+        self.assertEqual(self.feed.poll(), {'saved': 7, 'deleted': 0})
+        self.assertEqual(self.feed.cursor, '0:7')
+        self.assertEqual(len(self.index), 7)
+
+    def test_resume_from_cursor(self):
+        self.feed.poll()
+        self.wapi.add_host('c.bar.net')
+        feed = changes.ChangeFeed(self.session, cursor=self.feed.cursor)
+        targets = index.HostIndex()
+        feed.register(targets)
+        self.assertEqual(feed.poll(), {'saved': 1, 'deleted': 0})
+        self.assertEqual([host.name for host in targets], ['c.bar.net'])
+
+    def test_transient_errors_do_not_fall_back(self):
+        feed = changes.ChangeFeed(self.session, extattr='Modified',
+                                  cursor='0:1')
+        for status in (503, 500):
+            self.wapi.fail_next(status=status)
+            self.assertRaises(exceptions.ProtocolError, feed.poll)
+            self.assertIsNone(feed.mode)
+            self.assertEqual(feed.cursor, '0:1')
+        feed.poll()
+        self.assertEqual(feed.mode, changes.SEQUENCE)
+
+    def test_unregister(self):
+        self.feed.unregister(self.index)
+        self.feed.poll()
+        self.assertEqual(len(self.index), 0)
+
+    def test_snapshot_target(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        with snapshot.Snapshot(os.path.join(path, 'hosts.db')) as hosts:
+            self.feed.register(hosts)
+            self.feed.poll()
+            self.assertEqual(hosts.get('a.bar.net').addresses(),
+                             ['10.0.0.1'])
+            self.assertEqual([h.name for h in hosts.search(zone='bar.net')],
+                             ['a.bar.net', 'b.bar.net'])
+            record.Host(self.session, name='a.bar.net').delete()
+            self.feed.poll()
+            self.assertNotIn('a.bar.net', hosts)
+            self.assertEqual(len(hosts), 1)
+
+    def test_cache_target(self):
+        session = self.wapi.session(cache.CachingSession)
+        self.feed.register(session.cache)
+        self.feed.poll()
+        self.assertIsNone(record.Host(session, name='a.bar.net').comment)
+        host = record.Host(self.session, name='a.bar.net')
+        host.comment = 'Changed'
+        host.save()
+        self.assertIsNone(record.Host(session, name='a.bar.net').comment)
+        self.feed.poll()
+        self.assertEqual(record.Host(session, name='a.bar.net').comment,
+                         'Changed')
+
+
+class ExtattrFeedTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI(db_objects=False)
+        self.wapi.start()
+        self.addCleanup(self.wapi.stop)
+        self.wapi.add_host('a.bar.net',
+                           extattrs={'Modified': {'value': 100}})
+        self.wapi.add_host('b.bar.net',
+                           extattrs={'Modified': {'value': 200}})
+        self.wapi.add_host('c.bar.net')
+        self.session = self.wapi.session()
+        self.index = index.HostIndex()
+        self.feed = changes.ChangeFeed(self.session, extattr='Modified')
+        self.feed.register(self.index)
+
+    def test_first_poll_applies_all_hosts(self):
+        self.assertEqual(self.feed.poll(), {'saved': 3, 'deleted': 0})
+        self.assertEqual(self.feed.mode, changes.EXTATTR)
+        self.assertEqual(self.feed.cursor, 200)
+        self.assertEqual(len(self.index), 3)
+
+    def test_poll_applies_changes_since_cursor(self):
+        self.feed.poll()
+        host = record.Host(self.session, name='a.bar.net')
+        host.comment = 'Changed'
+        host.extattrs = {'Modified': {'value': 300}}
+        host.save()
+        self.assertEqual(self.feed.poll(), {'saved': 2, 'deleted': 0})
+        self.assertEqual(self.feed.cursor, 300)
+        self.assertEqual(self.index.get('a.bar.net').comment, 'Changed')
+
+    def test_no_fallback(self):
+        feed = changes.ChangeFeed(self.session)
+        self.assertRaises(exceptions.ProtocolError, feed.poll)
+        self.assertIsNone(feed.mode)
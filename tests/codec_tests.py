@@ -0,0 +1,83 @@
+"""
+JSON Codec Tests
+
+"""
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import codec
+from infoblox import record
+from infoblox import session
+from infoblox import testing
+
+
+class CodecTests(unittest.TestCase):
+
+    VALUE = {'name': u'höst.bar.net', 'comment': 'a/b',
+             'ipv4addrs': [{'ipv4addr': '10.0.0.1'}], 'ttl': 3600,
+             'configure_for_dns': True, 'view': None}
+
+    def tearDown(self):
+        codec.use()
+
+    def test_preferred_library_is_used(self):
+        self.assertEqual(codec.name, codec.available()[0])
+        self.assertEqual(codec.available()[-1], 'json')
+
+    def test_round_trip(self):
+        for library in codec.available():
+            codec.use(library)
+            data = codec.encode(self.VALUE)
+            self.assertIsInstance(data, bytes, library)
+            self.assertEqual(codec.loads(data), self.VALUE, library)
+            self.assertEqual(codec.loads(data.decode('utf-8')), self.VALUE,
+                             library)
+
+    def test_non_ascii_is_utf8_encoded(self):
+        for library in codec.available():
+            codec.use(library)
+            self.assertIn(u'höst'.encode('utf-8'),
+                          codec.encode(self.VALUE), library)
+
+    def test_default(self):
+        for library in codec.available():
+            codec.use(library)
+            self.assertEqual(codec.loads(codec.encode({'a': {1, 2}},
+                                                      sorted)),
+                             {'a': [1, 2]}, library)
+            self.assertRaises(TypeError, codec.encode, {'a': {1, 2}})
+
+    def test_dumps_returns_text(self):
+        self.assertEqual(codec.dumps([u'ö']), u'["ö"]')
+
+    def test_unavailable_library(self):
+        self.assertRaises(ValueError, codec.use, 'missing')
+        self.assertEqual(codec.name, codec.available()[0])
+
+
+class SessionCodecTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.addCleanup(self.wapi.stop)
+        self.wapi.add_host(u'höst.bar.net', ['10.0.0.1'])
+        self.session = self.wapi.session()
+
+    def tearDown(self):
+        codec.use()
+
+    def test_response_is_decoded_by_codec(self):
+        response = self.session.get('record:host')
+        self.assertIsInstance(response, session.Response)
+        self.assertEqual(response.json()[0]['name'], u'höst.bar.net')
+
+    def test_records_with_each_library(self):
+        for library in codec.available():
+            codec.use(library)
+            host = record.Host(self.session, name=u'höst.bar.net')
+            host.comment = library
+            host.save()
+            self.assertEqual(self.wapi.hosts()[0]['comment'], library)
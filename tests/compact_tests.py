@@ -0,0 +1,108 @@
+"""
+Compact Record Tests
+
+"""
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import compact
+from infoblox import record
+from infoblox import testing
+
+HOST = {'_ref': 'record:host/ZG5z:foo.bar.net/default',
+        'name': 'foo.bar.net',
+        'comment': 'Test',
+        'ipv4addrs': [{'_ref': 'record:host_ipv4addr/ZG5z:10.0.0.1/'
+                               'foo.bar.net/default',
+                       'ipv4addr': '10.0.0.1',
+                       'host': 'foo.bar.net'}],
+        'ipv6addrs': [{'_ref': 'record:host_ipv6addr/ZG5z:fd00::1/'
+                               'foo.bar.net/default',
+                       'ipv6addr': 'fd00::1'}]}
+
+
+class CompactHostTests(unittest.TestCase):
+
+    def setUp(self):
+        self.host = compact.Host._from_values(None, HOST)
+
+    def test_is_a_host(self):
+        self.assertIsInstance(self.host, record.Host)
+
+    def test_mapping_matches_regular_class(self):
+        regular = record.Host._from_values(None, HOST)
+        self.assertEqual(self.host.keys(), regular.keys())
+        self.assertEqual(self.host['comment'], 'Test')
+        self.assertEqual(self.host.rrset_order, 'cyclic')
+        self.assertEqual(self.host.addresses(6), ['fd00::1'])
+        self.assertIn('ttl', self.host)
+
+    def test_nested_records_are_compact(self):
+        self.assertIsInstance(self.host.ipv4addrs[0], compact.HostIPv4)
+        self.assertIsInstance(self.host.ipv6addrs[0], compact.HostIPv6)
+        self.assertTrue(self.host.ipv4addrs[0]._partial)
+
+    def test_change_tracking(self):
+        self.assertFalse(self.host.dirty)
+        self.host.comment = 'Changed'
+        self.assertEqual(self.host._save_request(),
+                         ('put', {'_ref': HOST['_ref'],
+                                  'comment': 'Changed'}))
+
+    def test_fields_are_slots(self):
+        self.assertNotIn('__dict__', compact.Host.__slots__)
+        self.assertEqual(set(compact.Host._fields()[0]) -
+                         set(compact.Host.__slots__), set())
+
+    def test_instance_dict_stays_empty(self):
+        self.assertEqual(self.host.ipv4addrs[0].__dict__, {})
+        self.assertEqual(self.host.ipv6addrs[0].__dict__, {})
+        self.host.comment = 'Changed'
+        self.host.add_ipv4addr('10.0.0.2')
+        self.host._mark_clean()
+        self.assertEqual(self.host.__dict__, {})
+
+    def test_extra_keys(self):
+        self.host.ipv4addr = '10.0.0.1'
+        self.assertIn('ipv4addr', self.host.keys())
+        del self.host['ipv4addr']
+        self.assertNotIn('ipv4addr', self.host)
+
+    def test_clear_restores_defaults(self):
+        self.host.clear()
+        self.assertIsNone(self.host.name)
+        self.assertEqual(self.host.rrset_order, 'cyclic')
+
+    def test_missing_attribute(self):
+        self.assertRaises(AttributeError, getattr, self.host, 'missing')
+
+    def test_get_class(self):
+        self.assertIs(compact.get_class('ipv4address/Li5:10.0.0.1'),
+                      compact.IPv4Address)
+        self.assertIsNone(compact.get_class('record:a/ZG5z:a/default'))
+
+
+class CompactSessionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.session = self.wapi.session()
+
+    def tearDown(self):
+        self.wapi.stop()
+
+    def test_save_fetch_iterate(self):
+        host = compact.Host(self.session)
+        host.name = 'foo.bar.net'
+        host.add_ipv4addr('10.0.0.1')
+        self.assertTrue(host.save())
+        host = compact.Host(self.session, name='foo.bar.net')
+        self.assertEqual(host.addresses(), ['10.0.0.1'])
+        hosts = list(compact.Host.iterate(self.session))
+        self.assertIsInstance(hosts[0], compact.Host)
+        self.assertIsInstance(hosts[0].ipv4addrs[0], compact.HostIPv4)
+        self.assertEqual(hosts[0].__dict__, {})
+        self.assertEqual(hosts[0].ipv4addrs[0].__dict__, {})
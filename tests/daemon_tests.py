@@ -0,0 +1,209 @@
+"""
+Daemon Tests
+
+"""
+import errno
+import json
+import os
+import shutil
+import socket
+import stat
+import sys
+import tempfile
+import threading
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import mock
+
+from infoblox import cache
+from infoblox import cli
+from infoblox import daemon
+from infoblox import exceptions
+from infoblox import record
+from infoblox import testing
+
+
+class DaemonTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.addCleanup(self.wapi.stop)
+        self.wapi.add_host('a.bar.net', ['10.0.0.1'], comment='A')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'infoblox.sock')
+        self.infoblox = cli.InfobloxHost(self.wapi.host, self.wapi.username,
+                                         self.wapi.password, https=False,
+                                         session_class=cache.CachingSession)
+        self.server = self.serve(self.path)
+
+    def serve(self, path):
+        server = daemon.Daemon(path, self.infoblox, self.wapi.host)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def request(self, action, **kwargs):
+        kwargs.update({'action': action, 'infoblox': self.wapi.host})
+        return daemon.request(self.path, kwargs)
+
+
+class DaemonTests(DaemonTestCase):
+
+    def test_lookup(self):
+        self.assertEqual(self.request('lookup', host='a.bar.net'),
+                         {'name': 'a.bar.net', 'ipv4addrs': ['10.0.0.1'],
+                          'ipv6addrs': [], 'comment': 'A'})
+        self.assertIsNone(self.request('lookup', host='b.bar.net'))
+
+    def test_add_and_remove(self):
+        self.assertTrue(self.request('add', host='b.bar.net',
+                                     address='10.0.0.2', comment='B'))
+        self.assertEqual(self.request('lookup', host='b.bar.net')['comment'],
+                         'B')
+        self.assertTrue(self.request('remove', host='b.bar.net'))
+        self.assertIsNone(self.request('lookup', host='b.bar.net'))
+        self.assertEqual([h['name'] for h in self.wapi.hosts()],
+                         ['a.bar.net'])
+
+    def test_session_is_reused(self):
+        for _attempt in range(3):
+            self.request('lookup', host='a.bar.net')
+        self.assertEqual(self.wapi.connections, 1)
+        self.assertEqual(self.wapi.requests['GET'], 1)
+
+    def test_writes_read_current_state(self):
+        self.request('lookup', host='a.bar.net')
+        other = record.Host(self.wapi.session(), name='a.bar.net')
+        other.comment = 'Changed'
+        other.save()
+        self.assertTrue(self.request('add', host='a.bar.net',
+                                     address='10.0.0.1', comment='A'))
+        self.assertEqual(self.wapi.hosts()[0]['comment'], 'A')
+        self.assertEqual(self.request('lookup', host='a.bar.net')['comment'],
+                         'A')
+
+    def test_other_appliance(self):
+        with self.assertRaises(exceptions.DaemonError) as context:
+            daemon.request(self.path, {'action': 'lookup', 'host': 'a.bar.net',
+                                       'infoblox': '10.0.0.99'})
+        self.assertIn('10.0.0.99', str(context.exception))
+
+    def test_invalid_requests(self):
+        self.assertRaises(exceptions.DaemonError, self.request, 'sync')
+        self.assertRaises(exceptions.DaemonError, self.request, 'add',
+                          host='b.bar.net')
+
+    def test_socket_permissions(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    def test_already_running(self):
+        self.assertRaises(exceptions.DaemonError, daemon.Daemon, self.path,
+                          self.infoblox, self.wapi.host)
+
+    def test_stale_socket(self):
+        path = self.path + '.stale'
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        self.serve(path)
+        self.assertTrue(daemon.request(path, {'action': 'lookup',
+                                              'host': 'a.bar.net'}))
+
+    def test_other_files_are_not_removed(self):
+        path = self.path + '.txt'
+        with open(path, 'w') as handle:
+            handle.write('data')
+        self.assertRaises(exceptions.DaemonError, daemon.Daemon, path,
+                          self.infoblox, self.wapi.host)
+        with open(path) as handle:
+            self.assertEqual(handle.read(), 'data')
+
+    def test_request_timeout(self):
+        path = self.path + '.silent'
+        silent = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        silent.bind(path)
+        silent.listen(1)
+        self.addCleanup(silent.close)
+        self.assertRaises(exceptions.DaemonError, daemon.request, path,
+                          {'action': 'lookup', 'host': 'a.bar.net'}, 0.1)
+
+    def test_server_close_removes_socket(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class CLITests(DaemonTestCase):
+
+    def main(self, *args):
+        argv = ['infoblox-host', '--socket', self.path, self.wapi.host]
+        argv.extend(args)
+        with mock.patch.object(sys, 'argv', argv):
+            with mock.patch('sys.stdout') as stdout:
+                try:
+                    cli.main()
+                except SystemExit as error:
+                    return error.code, stdout
+        return 0, stdout
+
+    def test_forward_lookup(self):
+        with mock.patch('infoblox.cli.connect') as connect:
+            status, stdout = self.main('lookup', 'a.bar.net')
+        self.assertEqual(status, 0)
+        self.assertFalse(connect.called)
+        self.assertEqual(json.loads(stdout.write.call_args[0][0])['comment'],
+                         'A')
+
+    def test_forward_add(self):
+        status, stdout = self.main('add', 'b.bar.net', '10.0.0.2')
+        self.assertEqual(status, 0)
+        stdout.write.assert_called_once_with('Host added\n')
+
+    def test_forward_missing_host(self):
+        with mock.patch('sys.stderr'):
+            status, _stdout = self.main('lookup', 'b.bar.net')
+        self.assertEqual(status, 1)
+
+    def test_fallback_without_daemon(self):
+        self.path += '.missing'
+        with mock.patch('infoblox.cli.connect') as connect:
+            connect.return_value = self.infoblox
+            status, stdout = self.main('remove', 'a.bar.net')
+        self.assertEqual(status, 0)
+        stdout.write.assert_called_once_with('Host removed\n')
+
+    def test_no_fallback_once_sent(self):
+        with mock.patch('infoblox.cli.connect') as connect:
+            with mock.patch('infoblox.daemon.request',
+                            side_effect=exceptions.DaemonError('timed out')):
+                with mock.patch('sys.stderr'):
+                    status, _stdout = self.main('add', 'b.bar.net',
+                                                '10.0.0.2')
+        self.assertEqual(status, 1)
+        self.assertFalse(connect.called)
+
+    def test_no_fallback_for_other_connect_errors(self):
+        error = socket.error(errno.EACCES, 'Permission denied')
+        with mock.patch('infoblox.cli.connect') as connect:
+            with mock.patch('infoblox.daemon.request', side_effect=error):
+                with mock.patch('sys.stderr'):
+                    status, _stdout = self.main('remove', 'a.bar.net')
+        self.assertEqual(status, 1)
+        self.assertFalse(connect.called)
+
+    def test_serve_requires_socket(self):
+        argv = ['infoblox-host', self.wapi.host, 'serve']
+        with mock.patch.dict(os.environ, clear=True):
+            with mock.patch.object(sys, 'argv', argv):
+                with mock.patch('sys.stderr'):
+                    with self.assertRaises(SystemExit) as context:
+                        cli.main()
+        self.assertEqual(context.exception.code, 2)
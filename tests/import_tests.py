@@ -0,0 +1,55 @@
+"""
+Import Time Tests
+
+"""
+import sys
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from benchmarks import import_time
+
+# Modules that the lightweight entry points must not import
+HEAVY = ('requests', 'infoblox.record', 'infoblox.session', 'inspect',
+         'sqlite3', 'concurrent.futures', 'opentelemetry')
+
+# Modules only imported by the command line actions that use them
+ACTION_MODULES = ('infoblox.bulk', 'infoblox.cache', 'infoblox.snapshot',
+                  'infoblox.sync')
+
+
+@unittest.skipIf(sys.version_info < (3, 7), '-X importtime requires 3.7')
+class ImportTimeTests(unittest.TestCase):
+
+    def assertNotImported(self, statement, excluded=HEAVY):
+        cumulative, modules = import_time.imports(statement)
+        imported = sorted(modules.intersection(excluded))
+        self.assertEqual(imported, [], '%r imported %s (%i us)' %
+                         (statement, ', '.join(imported),
+                          sum(cumulative.values())))
+        return cumulative
+
+    def test_package(self):
+        self.assertNotImported('import infoblox')
+
+    def test_package_names(self):
+        cumulative = self.assertNotImported(
+            'import infoblox; infoblox.Host', ('requests',))
+        self.assertIn('infoblox.record', cumulative)
+
+    def test_record(self):
+        self.assertNotImported('import infoblox.record',
+                               ('requests', 'inspect', 'opentelemetry'))
+
+    def test_cli_forwarded_action(self):
+        self.assertNotImported(
+            "import infoblox.cli; "
+            "infoblox.cli.build_parser(['10.0.0.2', 'add']).parse_args("
+            "['10.0.0.2', 'add', 'foo.bar.net', '10.0.0.1'])")
+
+    def test_cli_action_modules(self):
+        self.assertNotImported(
+            "import infoblox.cli; "
+            "infoblox.cli.build_parser(['10.0.0.2', 'lookup'])",
+            HEAVY + ACTION_MODULES)
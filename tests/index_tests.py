@@ -0,0 +1,167 @@
+"""
+Host Index Tests
+
+"""
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import index
+from infoblox import record
+from infoblox import testing
+
+
+def host(name, ipv4addrs=(), ipv6addrs=(), mac=None):
+    values = {'_ref': 'record:host/ZG5z:%s/default' % name,
+              'name': name,
+              'ipv4addrs': [{'_ref': 'record:host_ipv4addr/ZG5z:%s/%s' %
+                                     (addr, name),
+                             'ipv4addr': addr, 'mac': mac}
+                            for addr in ipv4addrs],
+              'ipv6addrs': [{'_ref': 'record:host_ipv6addr/ZG5z:%s/%s' %
+                                     (addr, name),
+                             'ipv6addr': addr} for addr in ipv6addrs]}
+    return record.Host._from_values(None, values)
+
+
+class SortedKeysTests(unittest.TestCase):
+
+    def test_range(self):
+        keys = index.SortedKeys()
+        keys.extend([(5, 'e'), (1, 'a')])
+        keys.add(3, 'c')
+        keys.add(3, 'd')
+        self.assertEqual(keys.range(2, 4), ['c', 'd'])
+        keys.discard(3, 'c')
+        self.assertEqual(keys.range(0, 10), ['a', 'd', 'e'])
+
+
+class HostIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = index.HostIndex([
+            host('a.bar.net', ['10.0.0.1', '10.0.0.2'], ['fd00::1'],
+                 '00:11:22:33:44:55'),
+            host('b.bar.net', ['10.0.0.130']),
+            host('c.sub.bar.net', ['10.0.1.1']),
+            host('d.baz.net', ['192.168.0.1'], ['fd00::2'])])
+
+    def test_get(self):
+        self.assertEqual(self.index.get('b.bar.net').name, 'b.bar.net')
+        self.assertIsNone(self.index.get('missing.bar.net'))
+        self.assertEqual(len(self.index), 4)
+        self.assertIn('a.bar.net', self.index)
+
+    def test_by_mac(self):
+        self.assertEqual([h.name for h in
+                          self.index.by_mac('00:11:22:33:44:55'.upper())],
+                         ['a.bar.net'])
+
+    def test_by_address(self):
+        self.assertEqual([h.name for h in self.index.by_address('10.0.0.2')],
+                         ['a.bar.net'])
+        self.assertEqual([h.name for h in self.index.by_address('fd00::2')],
+                         ['d.baz.net'])
+        self.assertEqual(self.index.by_address('10.9.9.9'), [])
+
+    def test_in_network(self):
+        self.assertEqual([h.name for h in
+                          self.index.in_network('10.0.0.0/24')],
+                         ['a.bar.net', 'b.bar.net'])
+        self.assertEqual([h.name for h in
+                          self.index.in_network('10.0.0.128/25')],
+                         ['b.bar.net'])
+        self.assertEqual([h.name for h in
+                          self.index.in_network('fd00::/64')],
+                         ['a.bar.net', 'd.baz.net'])
+        self.assertRaises(ValueError, self.index.in_network, 'invalid')
+
+    def test_in_zone(self):
+        self.assertEqual(sorted(h.name for h in self.index.in_zone('bar.net')),
+                         ['a.bar.net', 'b.bar.net', 'c.sub.bar.net'])
+        self.assertEqual([h.name for h in self.index.in_zone('sub.bar.net')],
+                         ['c.sub.bar.net'])
+        self.assertEqual(self.index.in_zone('ar.net'), [])
+
+    def test_replace(self):
+        self.index.add(host('a.bar.net', ['10.0.2.1']))
+        self.assertEqual(self.index.by_address('10.0.0.1'), [])
+        self.assertEqual(self.index.by_mac('00:11:22:33:44:55'), [])
+        self.assertEqual([h.name for h in self.index.by_address('10.0.2.1')],
+                         ['a.bar.net'])
+        self.assertEqual(len(self.index), 4)
+
+    def test_discard(self):
+        self.index.discard('record:host/ZG5z:d.baz.net/default')
+        self.assertEqual(self.index.in_zone('baz.net'), [])
+        self.assertEqual(self.index.by_address('fd00::2'), [])
+        self.index.discard('record:host/ZG5z:missing/default')
+
+    def test_invalid_addresses_are_skipped(self):
+        self.index.add(host('e.bar.net', ['func:nextavailableip:10.0.0.0/24']))
+        self.assertIn('e.bar.net', self.index)
+
+
+class HostIndexObserverTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.wapi.add_host('a.bar.net', ['10.0.0.1'])
+        self.session = self.wapi.session()
+        self.index = index.HostIndex.load(self.session)
+        self.session.add_observer(self.index)
+
+    def tearDown(self):
+        self.wapi.stop()
+
+    def test_load(self):
+        self.assertEqual([h.name for h in self.index.by_address('10.0.0.1')],
+                         ['a.bar.net'])
+
+    def test_save_and_delete(self):
+        host = record.Host(self.session)
+        host.name = 'b.bar.net'
+        host.add_ipv4addr('10.0.0.2')
+        host.save()
+        self.assertIs(self.index.get('b.bar.net'), host)
+        host.add_ipv4addr('10.0.0.3')
+        host.save()
+        self.assertEqual([h.name for h in
+                          self.index.in_network('10.0.0.0/30')],
+                         ['a.bar.net', 'b.bar.net'])
+        host.delete()
+        self.assertNotIn('b.bar.net', self.index)
+        self.assertEqual(self.index.by_address('10.0.0.2'), [])
+
+    def test_rename(self):
+        host = record.Host(self.session, name='a.bar.net')
+        ref = host._ref
+        host.name = 'b.bar.net'
+        host.save()
+        self.assertNotEqual(host._ref, ref)
+        self.assertIsNone(self.index.get('a.bar.net'))
+        self.assertIs(self.index.get('b.bar.net'), host)
+        self.assertEqual(len(self.index), 1)
+
+    def test_batch_rename(self):
+        host = record.Host(self.session, name='a.bar.net')
+        host.name = 'b.bar.net'
+        with self.session.batch() as batch:
+            batch.save(host)
+        self.assertEqual([h.name for h in self.index], ['b.bar.net'])
+
+    def test_batch(self):
+        host = record.Host(self.session, name='a.bar.net')
+        new = record.Host(self.session)
+        new.name = 'c.bar.net'
+        with self.session.batch() as batch:
+            batch.delete(host)
+            batch.save(new)
+        self.assertEqual([h.name for h in self.index], ['c.bar.net'])
+
+    def test_remove_observer(self):
+        self.session.remove_observer(self.index)
+        record.Host(self.session, name='a.bar.net').delete()
+        self.assertIn('a.bar.net', self.index)
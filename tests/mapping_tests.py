@@ -0,0 +1,109 @@
+"""
+Mapping Tests
+
+"""
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import mapping
+
+
+class Example(mapping.Mapping):
+    CONSTANT = 1
+    bar = None
+    foo = 'foo'
+
+    _private = None
+
+    @property
+    def computed(self):
+        return self.foo
+
+    def method(self):
+        return self.bar
+
+
+class MappingKeysTests(unittest.TestCase):
+
+    def test_class_fields(self):
+        self.assertListEqual(Example().keys(), ['bar', 'foo'])
+
+    def test_instance_only_keys_are_included_and_sorted(self):
+        value = Example(zed=1, abc=2)
+        self.assertListEqual(value.keys(), ['abc', 'bar', 'foo', 'zed'])
+
+    def test_private_instance_keys_are_excluded(self):
+        value = Example()
+        value._other = 1
+        self.assertNotIn('_other', value.keys())
+
+    def test_keys_returns_a_copy(self):
+        value = Example()
+        value.keys().append('baz')
+        self.assertListEqual(value.keys(), ['bar', 'foo'])
+
+    def test_contains(self):
+        value = Example(zed=1)
+        self.assertIn('foo', value)
+        self.assertIn('zed', value)
+        self.assertNotIn('method', value)
+        self.assertNotIn('computed', value)
+        self.assertNotIn('CONSTANT', value)
+
+    def test_getitem_instance_key(self):
+        self.assertEqual(Example(zed=1)['zed'], 1)
+
+    def test_getitem_missing_raises(self):
+        self.assertRaises(KeyError, lambda: Example()['method'])
+
+    def test_subclasses_have_their_own_fields(self):
+        class Child(Example):
+            baz = None
+        self.assertListEqual(Child().keys(), ['bar', 'baz', 'foo'])
+        self.assertListEqual(Example().keys(), ['bar', 'foo'])
+
+
+class MappingChangeTests(unittest.TestCase):
+
+    def test_set_tracks_changed(self):
+        value = Example()
+        value.foo = 'bar'
+        value['zed'] = 1
+        self.assertSetEqual(value.changed, {'foo', 'zed'})
+        self.assertTrue(value.dirty)
+
+    def test_private_attributes_are_not_tracked(self):
+        value = Example()
+        value._private = 1
+        self.assertSetEqual(value.changed, set())
+        self.assertFalse(value.dirty)
+
+    def test_mark_clean(self):
+        value = Example(foo='bar')
+        value._mark_clean()
+        self.assertSetEqual(value.changed, set())
+        self.assertFalse(value.dirty)
+
+
+class MappingJSONTests(unittest.TestCase):
+
+    def test_round_trip(self):
+        value = Example()
+        value.loads(Example(foo=u'föö', bar=[1, 2]).dumps())
+        self.assertEqual(value.as_dict(), {'bar': [1, 2], 'foo': u'föö'})
+
+    def test_dumps_returns_text(self):
+        self.assertEqual(Example(foo=u'föö').dumps(),
+                         u'{"bar":null,"foo":"föö"}')
+
+    def test_nested_mapping(self):
+        value = Example()
+        value.loads(Example(bar=Example(foo='nested')).dumps())
+        self.assertEqual(value.bar, {'bar': None, 'foo': 'nested'})
+
+    def test_loads_bytes(self):
+        value = Example()
+        value.loads(b'{"foo":"bar"}')
+        self.assertEqual(value.foo, 'bar')
@@ -0,0 +1,129 @@
+"""
+Metrics Tests
+
+"""
+import mock
+import requests
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import metrics
+from infoblox import record
+from infoblox import session
+from infoblox import testing
+
+
+class HistogramTests(unittest.TestCase):
+
+    def test_cumulative(self):
+        histogram = metrics.Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(),
+                         [(0.1, 2), (1.0, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 2.65)
+
+
+class MetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = metrics.Metrics((0.1, 1.0))
+        self.metrics(metrics.RequestEvent(
+            'GET', 'record:host/ZG5z:foo.bar.net/default', 200, 10, 200,
+            wait=0.05, decode=0.001, duration=0.06))
+        self.metrics(metrics.RequestEvent('GET', 'record:host', 404,
+                                          duration=0.5))
+
+    def test_counters(self):
+        self.assertEqual(self.metrics.requests,
+                         {('GET', 'record:host', 200): 1,
+                          ('GET', 'record:host', 404): 1})
+        self.assertEqual(self.metrics.bytes_received,
+                         {('GET', 'record:host'): 200})
+
+    def test_prometheus(self):
+        text = self.metrics.prometheus()
+        self.assertIn('# TYPE infoblox_request_total counter\n', text)
+        self.assertIn('infoblox_request_total{method="GET",status="404",'
+                      'type="record:host"} 1\n', text)
+        self.assertIn('infoblox_request_duration_seconds_bucket{method="GET",'
+                      'type="record:host",le="0.1"} 1\n', text)
+        self.assertIn('infoblox_request_duration_seconds_bucket{method="GET",'
+                      'type="record:host",le="+Inf"} 2\n', text)
+        self.assertIn('infoblox_request_wait_seconds_count{method="GET",'
+                      'type="record:host"} 2\n', text)
+
+    def test_label_escaping(self):
+        self.assertEqual(metrics._labels(type='a"b\\c'), 'type="a\\"b\\\\c"')
+
+    def test_reset(self):
+        self.metrics.reset()
+        self.assertEqual(self.metrics.requests, {})
+
+
+class SessionHookTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.wapi.add_host('foo.bar.net', ['10.0.0.1'])
+        self.session = self.wapi.session()
+        self.events = []
+        self.session.add_hook(self.events.append)
+
+    def tearDown(self):
+        self.wapi.stop()
+
+    def test_event_per_request(self):
+        host = record.Host(self.session, name='foo.bar.net')
+        host.comment = 'Updated'
+        host.save()
+        self.assertEqual([(e.method, e.wapi_type, e.status)
+                          for e in self.events],
+                         [('GET', 'record:host', 200),
+                          ('PUT', 'record:host', 200)])
+        event = self.events[0]
+        self.assertGreater(event.connect, 0)
+        self.assertEqual(self.events[1].connect, 0)
+        self.assertGreater(event.bytes_received, 0)
+        self.assertGreater(event.bytes_sent, 0)
+        self.assertGreater(event.duration, event.wait)
+
+    def test_decoded_body_is_returned(self):
+        response = self.session.get('record:host')
+        self.assertEqual(response.json()[0]['name'], 'foo.bar.net')
+        self.assertEqual(response.json()[0]['name'], 'foo.bar.net')
+
+    def test_hook_errors_are_logged(self):
+        self.session.add_hook(mock.Mock(side_effect=ValueError))
+        with mock.patch('infoblox.session.LOGGER') as logger:
+            self.assertEqual(self.session.get('record:host').status_code,
+                             200)
+            self.assertTrue(logger.exception.called)
+
+    def test_remove_hook(self):
+        self.session.remove_hook(self.events.append)
+        self.session.get('record:host')
+        self.assertEqual(self.events, [])
+
+    def test_connection_error(self):
+        self.wapi.stop()
+        self.assertRaises(requests.ConnectionError, self.session.get,
+                          'record:host')
+        self.assertIsNone(self.events[0].status)
+        self.assertIsInstance(self.events[0].error,
+                              requests.ConnectionError)
+
+
+class NoHookTests(unittest.TestCase):
+
+    def test_request_is_not_timed(self):
+        obj = session.Session('localhost')
+        with mock.patch.object(obj.session, 'request') as request:
+            with mock.patch('infoblox.session.metrics.RequestEvent') as event:
+                obj._send('GET', 'record:host', 'http://localhost/')
+                self.assertFalse(event.called)
+                self.assertTrue(request.called)
@@ -0,0 +1,315 @@
+"""
+Record Tests
+
+"""
+import json
+
+import httmock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import exceptions
+from infoblox import record
+from infoblox import session
+
+
+class RecordTests(unittest.TestCase):
+
+    HOST = '127.0.0.1'
+    REF = 'record:host/ZG5zLmhvc3Q:foo.bar.net/default'
+    IPV4_REF = 'record:host_ipv4addr/ZG5zLmhvc3RfYWRkcmVzcw:%s/default'
+
+    def setUp(self):
+        self.session = session.Session(self.HOST)
+        self.requests = []
+
+    def json_response(self, value, status_code=200):
+        return {'content': json.dumps(value),
+                'headers': {'content-type': 'application/json'},
+                'status_code': status_code}
+
+
+class HostNestedTests(RecordTests):
+
+    ADDRESSES = ['10.0.0.%i' % i for i in range(1, 9)]
+
+    @httmock.all_requests
+    def host_mock(self, url, request):
+        self.requests.append((request.method, url.path, request.body))
+        if url.path.endswith('/request'):
+            return self.json_response(
+                [{'_ref': op['object'],
+                  'ipv4addr': op['object'].split(':')[2].split('/')[0],
+                  'mac': '00:00:00:00:00:01'}
+                 for op in json.loads(request.body)])
+        return self.json_response([{
+            '_ref': self.REF,
+            'name': 'foo.bar.net',
+            'ipv4addrs': [{'_ref': self.IPV4_REF % address,
+                           'ipv4addr': address,
+                           'host': 'foo.bar.net'}
+                          for address in self.ADDRESSES]}])
+
+    def test_fetch_is_single_request(self):
+        with httmock.HTTMock(self.host_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual([addr.ipv4addr for addr in host.ipv4addrs],
+                         self.ADDRESSES)
+        self.assertEqual(host.ipv4addrs[0]._ref,
+                         self.IPV4_REF % self.ADDRESSES[0])
+        self.assertIsInstance(host.ipv4addrs[0], record.HostIPv4)
+        self.assertFalse(host.ipv4addrs[0].dirty)
+
+    def test_fetch_nested_is_single_request(self):
+        with httmock.HTTMock(self.host_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            self.assertTrue(host.fetch_nested())
+        self.assertEqual(len(self.requests), 2)
+        method, path, body = self.requests[1]
+        self.assertEqual(path, '/wapi/v1.2/request')
+        self.assertEqual(len(json.loads(body)), len(self.ADDRESSES))
+        self.assertEqual(host.ipv4addrs[0].mac, '00:00:00:00:00:01')
+        self.assertEqual(host.ipv4addrs[0].ipv4addr, self.ADDRESSES[0])
+        self.assertListEqual(host._nested_partial(), [])
+
+
+class RecordIterateTests(RecordTests):
+
+    PAGES = 3
+
+    @httmock.all_requests
+    def paging_mock(self, url, request):
+        self.requests.append((url.query, request.body))
+        page = len(self.requests) - 1
+        result = {'result': [{'_ref': '%s/%i/%i' % (self.REF, page, i),
+                              'name': 'host%i-%i.bar.net' % (page, i)}
+                             for i in range(2)]}
+        if page < self.PAGES - 1:
+            result['next_page_id'] = 'page%i' % (page + 1)
+        return self.json_response(result)
+
+    def test_iterate_yields_all_pages(self):
+        with httmock.HTTMock(self.paging_mock):
+            hosts = list(record.Host.iterate(self.session, page_size=2,
+                                             zone='bar.net'))
+        self.assertEqual(len(hosts), self.PAGES * 2)
+        self.assertIsInstance(hosts[0], record.Host)
+        self.assertEqual(hosts[-1].name, 'host2-1.bar.net')
+
+    def test_iterate_first_request_args(self):
+        with httmock.HTTMock(self.paging_mock):
+            list(record.Host.iterate(self.session, page_size=2,
+                                     zone='bar.net'))
+        query, body = self.requests[0]
+        self.assertIn('_paging=1', query)
+        self.assertIn('_max_results=2', query)
+        self.assertEqual(json.loads(body), {'zone': 'bar.net'})
+        self.assertEqual(self.requests[1][0], '_page_id=page1')
+
+    def test_iterate_is_lazy(self):
+        with httmock.HTTMock(self.paging_mock):
+            hosts = record.Host.iterate(self.session, page_size=2)
+            next(hosts)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_iterate_prefetch(self):
+        with httmock.HTTMock(self.paging_mock):
+            hosts = list(record.Host.iterate(self.session, page_size=2,
+                                             prefetch=True))
+        self.assertEqual(len(hosts), self.PAGES * 2)
+
+    def test_iterate_stream(self):
+        with httmock.HTTMock(self.paging_mock):
+            hosts = list(record.Host.iterate(self.session, page_size=2,
+                                             stream=True))
+        self.assertEqual([host.name for host in hosts],
+                         ['host%i-%i.bar.net' % (page, i)
+                          for page in range(self.PAGES) for i in range(2)])
+        self.assertEqual(self.requests[2][0], '_page_id=page2')
+
+    def test_iterate_stream_and_prefetch(self):
+        self.assertRaises(ValueError, list,
+                          record.Host.iterate(self.session, prefetch=True,
+                                              stream=True))
+
+    @httmock.all_requests
+    def error_mock(self, url, request):
+        return self.json_response({'text': 'Bad search'}, 400)
+
+    def test_iterate_error_raises(self):
+        with httmock.HTTMock(self.error_mock):
+            for prefetch in (False, True):
+                self.assertRaises(exceptions.ProtocolError, list,
+                                  record.Host.iterate(self.session,
+                                                      prefetch=prefetch))
+            self.assertRaises(exceptions.ProtocolError, list,
+                              record.Host.iterate(self.session, stream=True))
+
+
+class RecordSaveTests(RecordTests):
+
+    @httmock.all_requests
+    def host_mock(self, url, request):
+        self.requests.append((request.method, request.body))
+        if request.method == 'GET':
+            return self.json_response([{
+                '_ref': self.REF, 'name': 'foo.bar.net', 'comment': 'old',
+                'ipv4addrs': [{'_ref': self.IPV4_REF % '10.0.0.1',
+                               'ipv4addr': '10.0.0.1'}]}])
+        return self.json_response(self.REF, 201)
+
+    def test_save_without_changes_is_skipped(self):
+        with httmock.HTTMock(self.host_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            self.assertTrue(host.save())
+        self.assertEqual([method for method, _body in self.requests],
+                         ['GET'])
+
+    def test_save_only_sends_changed_fields(self):
+        with httmock.HTTMock(self.host_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            host.comment = 'new'
+            host.save()
+        method, body = self.requests[1]
+        self.assertEqual(method, 'PUT')
+        self.assertEqual(json.loads(body),
+                         {'_ref': self.REF, 'comment': 'new'})
+        self.assertFalse(host.dirty)
+
+    def test_save_sends_emptied_fields(self):
+        with httmock.HTTMock(self.host_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            host.comment = ''
+            host.save()
+        self.assertEqual(json.loads(self.requests[1][1]),
+                         {'_ref': self.REF, 'comment': ''})
+
+    def test_add_ipv4addr_marks_change(self):
+        with httmock.HTTMock(self.host_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            host.add_ipv4addr('10.0.0.2')
+            host.save()
+        self.assertEqual(json.loads(self.requests[1][1])['ipv4addrs'],
+                         [{'ipv4addr': '10.0.0.1'}, {'ipv4addr': '10.0.0.2'}])
+
+    @httmock.all_requests
+    def containers_mock(self, url, request):
+        self.requests.append((request.method, request.body))
+        if request.method == 'GET':
+            return self.json_response([{
+                '_ref': self.REF, 'name': 'foo.bar.net',
+                'aliases': ['x.bar.net'],
+                'extattrs': {'Owner': {'value': 'a'}},
+                'ipv4addrs': [{'_ref': self.IPV4_REF % '10.0.0.1',
+                               'ipv4addr': '10.0.0.1'}]}])
+        return self.json_response(self.REF)
+
+    def test_save_sends_lists_changed_in_place(self):
+        with httmock.HTTMock(self.containers_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            host.aliases.append('y.bar.net')
+            self.assertEqual(host.changed, {'aliases'})
+            self.assertTrue(host.dirty)
+            host.save()
+        self.assertEqual(json.loads(self.requests[1][1]),
+                         {'_ref': self.REF,
+                          'aliases': ['x.bar.net', 'y.bar.net']})
+        self.assertFalse(host.dirty)
+
+    def test_save_sends_dicts_changed_in_place(self):
+        with httmock.HTTMock(self.containers_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            host.extattrs['Owner']['value'] = 'b'
+            host.save()
+        self.assertEqual(json.loads(self.requests[1][1]),
+                         {'_ref': self.REF,
+                          'extattrs': {'Owner': {'value': 'b'}}})
+
+    def test_save_sends_nested_addresses_changed_in_place(self):
+        with httmock.HTTMock(self.containers_mock):
+            host = record.Host(self.session, name='foo.bar.net')
+            host.ipv4addrs[0].ipv4addr = '10.0.0.2'
+            self.assertEqual(host.changed, {'ipv4addrs'})
+            host.save()
+        self.assertEqual(json.loads(self.requests[1][1]),
+                         {'_ref': self.REF,
+                          'ipv4addrs': [{'ipv4addr': '10.0.0.2'}]})
+        self.assertFalse(host.dirty)
+
+    def test_add_ipv4addr_does_not_share_default(self):
+        record.Host(self.session).add_ipv4addr('10.0.0.1')
+        self.assertListEqual(record.Host(self.session).ipv4addrs, [])
+
+    @httmock.all_requests
+    def return_fields_mock(self, url, request):
+        self.requests.append((request.method, url.query))
+        return self.json_response({'_ref': self.REF, 'name': 'foo.bar.net',
+                                   'dns_name': 'foo.bar.net'}, 201)
+
+    def test_save_assigns_returned_object(self):
+        host = record.Host(self.session)
+        host.name = 'foo.bar.net'
+        with httmock.HTTMock(self.return_fields_mock):
+            self.assertTrue(host.save())
+        self.assertEqual(len(self.requests), 1)
+        self.assertIn('_return_fields=', self.requests[0][1])
+        self.assertEqual(host._ref, self.REF)
+        self.assertEqual(host.dns_name, 'foo.bar.net')
+        self.assertFalse(host.dirty)
+
+    def test_save_refetch(self):
+        host = record.Host(self.session)
+        host.name = 'foo.bar.net'
+        with httmock.HTTMock(self.return_fields_mock):
+            host.save(refetch=True)
+        self.assertEqual([method for method, _query in self.requests],
+                         ['POST', 'GET'])
+
+
+class RecordFetchManyTests(RecordTests):
+
+    @httmock.all_requests
+    def lookup_mock(self, url, request):
+        name = json.loads(request.body)['name']
+        if name == 'error.bar.net':
+            return self.json_response({'text': 'Lookup failed'}, 400)
+        if name == 'missing.bar.net':
+            return self.json_response([])
+        if name == 'undecodable.bar.net':
+            return {'content': b'<html>', 'status_code': 200}
+        if name == 'unexpected.bar.net':
+            return self.json_response(['Lookup failed'], 500)
+        return self.json_response([{'_ref': '%s/%s' % (self.REF, name),
+                                    'name': name}])
+
+    def test_results_in_input_order(self):
+        names = ['host%i.bar.net' % i for i in range(20)]
+        with httmock.HTTMock(self.lookup_mock):
+            hosts = record.Host.fetch_many(self.session,
+                                           [{'name': name} for name in names],
+                                           workers=4)
+        self.assertEqual([host.name for host in hosts], names)
+
+    def test_per_item_errors(self):
+        names = ['a.bar.net', 'error.bar.net', 'missing.bar.net', 'b.bar.net']
+        with httmock.HTTMock(self.lookup_mock):
+            results = record.Host.fetch_many(self.session,
+                                             [{'name': name}
+                                              for name in names])
+        self.assertEqual(results[0].name, 'a.bar.net')
+        self.assertIsInstance(results[1], exceptions.ProtocolError)
+        self.assertIsNone(results[2])
+        self.assertEqual(results[3].name, 'b.bar.net')
+
+    def test_undecodable_responses(self):
+        names = ['undecodable.bar.net', 'unexpected.bar.net', 'a.bar.net']
+        with httmock.HTTMock(self.lookup_mock):
+            results = record.Host.fetch_many(self.session,
+                                             [{'name': name}
+                                              for name in names])
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIsInstance(results[1], exceptions.ProtocolError)
+        self.assertEqual(results[2].name, 'a.bar.net')
@@ -2,6 +2,11 @@
 Infoblox Tests
 
 """
+import json
+import os
+import shutil
+import tempfile
+
 import httmock
 try:
     import unittest2 as unittest
@@ -35,7 +40,7 @@ class SessionDeleteTests(SessionTests):
     def test_delete(self):
         with httmock.HTTMock(self.delete_mock):
             response = self.session.delete(self.REF)
-            self.assertEqual(self.REF, response.content)
+            self.assertEqual(self.REF, response.text)
 
 
 class SessionGetTests(SessionTests):
@@ -55,3 +60,141 @@ class SessionGetTests(SessionTests):
         with httmock.HTTMock(self.get_mock):
             response = self.session.get('objname', {'name': 'foo'})
             self.assertEqual(self.content, response.json())
+
+
+class SessionAuthTests(SessionTests):
+
+    def setUp(self):
+        super(SessionAuthTests, self).setUp()
+        self.requests = []
+        self.valid = 'abc'
+
+    @httmock.all_requests
+    def auth_mock(self, url, request):
+        auth, cookie = (request.headers.get('Authorization'),
+                        request.headers.get('Cookie'))
+        self.requests.append((auth, cookie))
+        if auth:
+            return httmock.response(200, '[]', {
+                'Set-Cookie': 'ibapauth="%s"; httponly; Path=/' % self.valid},
+                request=request)
+        if cookie != 'ibapauth="%s"' % self.valid:
+            return httmock.response(401, 'Unauthorized', request=request)
+        return httmock.response(200, '[]', request=request)
+
+    def test_basic_auth_only_on_first_request(self):
+        with httmock.HTTMock(self.auth_mock):
+            self.session.get('record:host')
+            self.session.get('record:host')
+        self.assertIsNotNone(self.requests[0][0])
+        self.assertEqual(self.requests[1], (None, 'ibapauth="abc"'))
+        self.assertTrue(self.session.authenticated)
+
+    def test_renews_rejected_cookie(self):
+        with httmock.HTTMock(self.auth_mock):
+            self.session.get('record:host')
+            self.valid = 'def'
+            response = self.session.get('record:host')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.requests), 3)
+        self.assertIsNone(self.requests[1][0])
+        self.assertIsNotNone(self.requests[2][0])
+        self.assertIn('def', self.session.session.cookies.get('ibapauth'))
+
+
+class SessionCookieFileTests(SessionAuthTests):
+
+    def setUp(self):
+        super(SessionCookieFileTests, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.cookie_file = os.path.join(self.directory, 'cookie')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cookie_is_persisted_and_reused(self):
+        with httmock.HTTMock(self.auth_mock):
+            session.Session(self.HOST,
+                            cookie_file=self.cookie_file).get('record:host')
+            session.Session(self.HOST,
+                            cookie_file=self.cookie_file).get('record:host')
+        self.assertEqual(self.requests[1], (None, 'ibapauth="abc"'))
+        self.assertEqual(os.stat(self.cookie_file).st_mode & 0o777, 0o600)
+
+    def test_cookie_for_other_host_is_ignored(self):
+        with httmock.HTTMock(self.auth_mock):
+            session.Session(self.HOST,
+                            cookie_file=self.cookie_file).get('record:host')
+        value = session.Session('127.0.0.2', cookie_file=self.cookie_file)
+        self.assertFalse(value.authenticated)
+
+    def test_cookie_for_other_user_is_ignored(self):
+        with httmock.HTTMock(self.auth_mock):
+            session.Session(self.HOST, 'alice', 'secret',
+                            cookie_file=self.cookie_file).get('record:host')
+        self.assertFalse(session.Session(self.HOST, 'bob', 'secret',
+                                         cookie_file=self.cookie_file)
+                         .authenticated)
+        self.assertTrue(session.Session(self.HOST, 'alice', 'secret',
+                                        cookie_file=self.cookie_file)
+                        .authenticated)
+
+    def test_cookie_without_user_is_ignored(self):
+        with open(self.cookie_file, 'w') as handle:
+            json.dump({'host': self.HOST, 'ibapauth': 'abc'}, handle)
+        value = session.Session(self.HOST, cookie_file=self.cookie_file)
+        self.assertFalse(value.authenticated)
+
+    def test_file_that_is_not_an_object_is_ignored(self):
+        with open(self.cookie_file, 'w') as handle:
+            json.dump(['abc'], handle)
+        value = session.Session(self.HOST, cookie_file=self.cookie_file)
+        self.assertFalse(value.authenticated)
+
+    def test_password_is_not_stored(self):
+        with httmock.HTTMock(self.auth_mock):
+            session.Session(self.HOST, 'alice', 'secret',
+                            cookie_file=self.cookie_file).get('record:host')
+        with open(self.cookie_file) as handle:
+            value = json.load(handle)
+        self.assertEqual(sorted(value), ['host', 'ibapauth', 'username'])
+        self.assertEqual(value['username'], 'alice')
+
+
+class SessionPoolTests(unittest.TestCase):
+
+    def test_default_pool_size(self):
+        value = session.Session('127.0.0.1')
+        adapter = value.session.get_adapter('https://127.0.0.1/')
+        self.assertEqual(adapter._pool_maxsize, session.POOL_MAXSIZE)
+        self.assertFalse(value.verify)
+
+    def test_pool_settings(self):
+        value = session.Session('127.0.0.1', pool_maxsize=32,
+                                pool_block=True, keepalive=30)
+        adapter = value.session.get_adapter('https://127.0.0.1/')
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertTrue(adapter._pool_block)
+        self.assertIn('socket_options', adapter.poolmanager.connection_pool_kw)
+
+    def test_timeout_and_verify_are_passed(self):
+        value = session.Session('127.0.0.1', timeout=(1, 5),
+                                verify='/etc/ssl/ca.pem')
+        captured = {}
+
+        @httmock.all_requests
+        def capture(url, request):
+            return {'status_code': 200, 'content': '[]'}
+
+        original = value.session.request
+
+        def request(*args, **kwargs):
+            captured.update(kwargs)
+            kwargs['verify'] = False
+            return original(*args, **kwargs)
+
+        value.session.request = request
+        with httmock.HTTMock(capture):
+            value.get('record:host')
+        self.assertEqual(captured['timeout'], (1, 5))
+        self.assertEqual(captured['verify'], '/etc/ssl/ca.pem')
@@ -0,0 +1,136 @@
+"""
+Snapshot Tests
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import mock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import cli
+from infoblox import compact
+from infoblox import record
+from infoblox import snapshot
+from infoblox import testing
+
+
+class SnapshotTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'hosts.db')
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.wapi.add_host('a.bar.net', ['10.0.0.1'], ['fd00::1'])
+        self.wapi.add_host('b.bar.net', ['10.0.0.2'])
+        self.wapi.add_host('c.baz.net', ['10.0.1.1'])
+        self.session = self.wapi.session()
+        self.snapshot = snapshot.Snapshot(self.path)
+
+    def tearDown(self):
+        self.snapshot.close()
+        self.wapi.stop()
+        shutil.rmtree(self.directory)
+
+    def test_refresh(self):
+        counts = self.snapshot.refresh(self.session, page_size=2)
+        self.assertEqual(counts, {'added': 3, 'updated': 0, 'removed': 0,
+                                  'unchanged': 0})
+        self.assertEqual(len(self.snapshot), 3)
+        self.assertEqual(self.wapi.requests['GET'], 2)
+        self.assertIsNotNone(self.snapshot.refreshed)
+
+    def test_incremental_refresh(self):
+        self.snapshot.refresh(self.session)
+        host = record.Host(self.session, name='a.bar.net')
+        host.comment = 'Changed'
+        host.save()
+        record.Host(self.session, name='b.bar.net').delete()
+        self.wapi.add_host('d.bar.net')
+        counts = self.snapshot.refresh(self.session)
+        self.assertEqual(counts, {'added': 1, 'updated': 1, 'removed': 1,
+                                  'unchanged': 1})
+        self.assertEqual(self.snapshot.get('a.bar.net').comment, 'Changed')
+        self.assertNotIn('b.bar.net', self.snapshot)
+
+    def test_zone_refresh_only_prunes_the_zone(self):
+        self.snapshot.refresh(self.session)
+        record.Host(self.session, name='c.baz.net').delete()
+        record.Host(self.session, name='a.bar.net').delete()
+        counts = self.snapshot.refresh(self.session, zone='bar.net')
+        self.assertEqual(counts['removed'], 1)
+        self.assertIn('c.baz.net', self.snapshot)
+
+    def test_search(self):
+        self.snapshot.refresh(self.session)
+        self.assertEqual([h.name for h in self.snapshot.search(
+            zone='bar.net')], ['a.bar.net', 'b.bar.net'])
+        self.assertEqual([h.name for h in self.snapshot.search(
+            ipv4addr='10.0.1.1')], ['c.baz.net'])
+        self.assertEqual([h.name for h in self.snapshot.search(
+            ipv6addr='fd00::1', zone='bar.net')], ['a.bar.net'])
+        self.assertEqual(list(self.snapshot.search(ipv6addr='10.0.0.1')),
+                         [])
+        self.assertEqual(len(list(self.snapshot)), 3)
+
+    def test_records_are_not_bound_to_a_session(self):
+        self.snapshot.refresh(self.session)
+        host = self.snapshot.get('a.bar.net')
+        self.assertIsNone(host._session)
+        self.assertEqual(host.addresses(), ['10.0.0.1'])
+        self.assertIsNone(self.snapshot.get('missing.bar.net'))
+
+    def test_put_and_remove(self):
+        self.snapshot.put({'_ref': 'record:host/ZG5z:e.bar.net/default',
+                           'name': 'e.bar.net',
+                           'ipv4addrs': [{'ipv4addr': '10.0.0.5',
+                                          'mac': '00:11:22:33:44:55'}]})
+        self.assertEqual(self.snapshot.get('e.bar.net').name, 'e.bar.net')
+        self.assertEqual([h.name for h in self.snapshot.search(
+            mac='00:11:22:33:44:55')], ['e.bar.net'])
+        self.snapshot.remove('record:host/ZG5z:e.bar.net/default')
+        self.assertEqual(len(self.snapshot), 0)
+        self.assertEqual(list(self.snapshot.search(
+            mac='00:11:22:33:44:55')), [])
+
+    def test_rename_through_observed_session(self):
+        self.snapshot.refresh(self.session)
+        self.session.add_observer(self.snapshot)
+        host = record.Host(self.session, name='b.bar.net')
+        host.name = 'd.bar.net'
+        host.save()
+        self.assertIsNone(self.snapshot.get('b.bar.net'))
+        self.assertEqual(self.snapshot.get('d.bar.net')._ref, host._ref)
+        self.assertEqual(len(self.snapshot), 3)
+
+    def test_compact_records(self):
+        self.snapshot.refresh(self.session)
+        local = snapshot.Snapshot(self.path, compact.Host)
+        self.assertIsInstance(local.get('a.bar.net'), compact.Host)
+        local.close()
+
+
+class SnapshotCommandTests(unittest.TestCase):
+
+    def test_snapshot(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'hosts.db')
+        with testing.FakeWAPI() as wapi:
+            wapi.add_host('a.bar.net', ['10.0.0.1'])
+            argv = ['infoblox-host', wapi.host, 'snapshot', path]
+            with mock.patch.object(sys, 'argv', argv):
+                with mock.patch('infoblox.cli.InfobloxHost') as api:
+                    api.return_value.session = wapi.session()
+                    with mock.patch('sys.stderr'):
+                        with self.assertRaises(SystemExit) as context:
+                            cli.main()
+        self.assertEqual(context.exception.code, 0)
+        with snapshot.Snapshot(path) as local:
+            self.assertIn('a.bar.net', local)
+        shutil.rmtree(directory)
@@ -0,0 +1,102 @@
+"""
+Streaming Parser Tests
+
+"""
+import json
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import record
+from infoblox import stream
+from infoblox import testing
+
+
+class ParserTests(unittest.TestCase):
+
+    PAGE = {'result': [{'name': u'höst.bar.net', 'ttl': 60, 'ok': True,
+                        'comment': 'a "quoted\\\\" ] } value', 'view': None,
+                        'ipv4addrs': [{'ipv4addr': '10.0.0.1'}, {}, []]},
+                       {'name': 'b.bar.net'}, 1.5, 'text', None],
+            'next_page_id': '789c5590', 'count': 5}
+
+    def parse(self, content, size, key=stream.RESULT):
+        parser = stream.Parser(key)
+        items = []
+        for offset in range(0, len(content), size):
+            items.extend(parser.feed(content[offset:offset + size]))
+        parser.close()
+        return items, parser.members
+
+    def test_every_chunk_size(self):
+        content = json.dumps(self.PAGE, indent=1).encode('utf-8')
+        for size in range(1, 40):
+            items, members = self.parse(content, size)
+            self.assertEqual(items, self.PAGE['result'], size)
+            self.assertEqual(members, {'next_page_id': '789c5590',
+                                       'count': 5}, size)
+
+    def test_array(self):
+        content = json.dumps(self.PAGE['result']).encode('utf-8')
+        self.assertEqual(self.parse(content, 7),
+                         (self.PAGE['result'], {}))
+
+    def test_other_key(self):
+        content = b'{"result": 1, "items": [{"a": [1]}]}'
+        self.assertEqual(self.parse(content, 3, 'items'),
+                         ([{'a': [1]}], {'result': 1}))
+
+    def test_items_are_returned_as_completed(self):
+        parser = stream.Parser()
+        self.assertEqual(parser.feed(b'{"result": [{"a": 1}, {"b"'),
+                         [{'a': 1}])
+        self.assertEqual(parser.feed(b': 2}]}'), [{'b': 2}])
+        parser.close()
+
+    def test_buffer_is_released(self):
+        parser = stream.Parser()
+        parser.feed(b'[' + b'{"name": "host.bar.net"},' * 1000 + b'{"na')
+        self.assertEqual(bytes(parser._buffer), b'{"na')
+
+    def test_invalid(self):
+        for content in (b'', b'{"result": [1, 2]', b'"text"', b'[1] [2]',
+                        b'{"a" 1}', b'{"result": [}', b'[1, }'):
+            parser = stream.Parser()
+            with self.assertRaises(ValueError):
+                parser.feed(content)
+                parser.close()
+
+
+class SessionStreamTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.addCleanup(self.wapi.stop)
+        for offset in range(25):
+            self.wapi.add_host('host%02i.bar.net' % offset,
+                               ['10.0.0.%i' % offset])
+        self.session = self.wapi.session()
+
+    def test_iter_objects(self):
+        response = self.session.get('record:host', stream=True)
+        self.assertEqual([value['name'] for value in
+                          response.iter_objects(16)],
+                         ['host%02i.bar.net' % offset
+                          for offset in range(25)])
+
+    def test_iterate(self):
+        hosts = record.Host.iterate(self.session, page_size=10, stream=True)
+        self.assertEqual([host.ipv4addrs[0].ipv4addr for host in hosts],
+                         ['10.0.0.%i' % offset for offset in range(25)])
+
+    def test_hooks_do_not_read_the_body(self):
+        events = []
+        self.session.add_hook(events.append)
+        hosts = list(record.Host.iterate(self.session, page_size=10,
+                                         stream=True))
+        self.assertEqual(len(hosts), 25)
+        self.assertEqual(len(events), 3)
+        self.assertGreater(events[0].bytes_received, 0)
+        self.assertEqual(events[0].decode, 0)
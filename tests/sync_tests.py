@@ -0,0 +1,197 @@
+"""
+Sync Tests
+
+"""
+import io
+import json
+import sys
+
+import httmock
+import mock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import cli
+from infoblox import record
+from infoblox import session
+from infoblox import sync
+
+
+def host_values(name, addresses, comment=None):
+    return {'_ref': 'record:host/%s:%s/default' % (name, name),
+            'name': name,
+            'comment': comment,
+            'ipv4addrs': [{'_ref': 'record:host_ipv4addr/%s:%s/default' %
+                                   (addr, addr),
+                           'ipv4addr': addr} for addr in addresses]}
+
+
+class ReadDesiredTests(unittest.TestCase):
+
+    def test_addresses_are_normalized(self):
+        handle = io.StringIO(u'{"name": "a", "ipv4addrs": ["10.0.0.2", '
+                             u'{"ipv4addr": "10.0.0.1"}]}\n')
+        self.assertEqual(sync.read_desired(handle),
+                         {'a': {'name': 'a',
+                                'ipv4addrs': [{'ipv4addr': '10.0.0.1'},
+                                              {'ipv4addr': '10.0.0.2'}]}})
+
+    def test_address_fields_are_kept(self):
+        handle = io.StringIO(u'{"name": "a", "ipv4addrs": [{"ipv4addr": '
+                             u'"10.0.0.1", "mac": "00:50:56:00:00:01"}]}\n')
+        self.assertEqual(sync.read_desired(handle)['a']['ipv4addrs'],
+                         [{'ipv4addr': '10.0.0.1',
+                           'mac': '00:50:56:00:00:01'}])
+
+    def test_address_without_address(self):
+        self.assertRaises(ValueError, sync.read_desired, io.StringIO(
+            u'{"name": "a", "ipv4addrs": [{"mac": "00:50:56:00:00:01"}]}\n'))
+
+    def test_missing_name(self):
+        self.assertRaises(ValueError, sync.read_desired,
+                          io.StringIO(u'{"comment": "a"}\n'))
+
+    def test_unknown_field(self):
+        self.assertRaises(ValueError, sync.read_desired,
+                          io.StringIO(u'{"name": "a", "bogus": 1}\n'))
+
+    def test_invalid_json(self):
+        with self.assertRaises(ValueError) as context:
+            sync.read_desired(io.StringIO(u'{"name": "a"}\n{"name": \n'))
+        self.assertIn('Line 2', str(context.exception))
+
+    def test_not_an_object(self):
+        with self.assertRaises(ValueError) as context:
+            sync.read_desired(io.StringIO(u'["a"]\n'))
+        self.assertIn('Line 1', str(context.exception))
+
+
+class DiffTests(unittest.TestCase):
+
+    def setUp(self):
+        self.host = record.Host._from_values(
+            None, host_values('a', ['10.0.0.2', '10.0.0.1']))
+
+    def test_no_changes(self):
+        self.assertEqual(sync.diff(self.host, {
+            'name': 'a', 'ipv4addrs': ['10.0.0.1', '10.0.0.2'],
+            'comment': ''}), {})
+
+    def test_changes(self):
+        self.assertEqual(sync.diff(self.host, {
+            'name': 'a', 'ipv4addrs': ['10.0.0.1'], 'comment': 'new'}),
+            {'ipv4addrs': [{'ipv4addr': '10.0.0.1'}], 'comment': 'new'})
+
+    def test_address_field_changes(self):
+        self.host.ipv4addrs[0].mac = '00:50:56:00:00:02'
+        desired = {'ipv4addrs': [{'ipv4addr': '10.0.0.1'},
+                                 {'ipv4addr': '10.0.0.2',
+                                  'mac': '00:50:56:00:00:02'}]}
+        self.assertEqual(sync.diff(self.host, desired), {})
+        desired['ipv4addrs'][1]['mac'] = '00:50:56:00:00:03'
+        self.assertEqual(sync.diff(self.host, desired), desired)
+
+    def test_apply_keeps_unmanaged_address_fields(self):
+        self.host.ipv4addrs[0].mac = '00:50:56:00:00:02'
+        self.host.ipv4addrs[0].configure_for_dhcp = True
+        sync.apply(self.host, {'ipv4addrs': ['10.0.0.2', '10.0.0.3']})
+        self.assertEqual(self.host._save_values()['ipv4addrs'],
+                         [{'ipv4addr': '10.0.0.2', 'configure_for_dhcp': True,
+                           'mac': '00:50:56:00:00:02'},
+                          {'ipv4addr': '10.0.0.3'}])
+
+
+class SyncTests(unittest.TestCase):
+
+    CURRENT = [host_values('same', ['10.0.0.1'], 'test'),
+               host_values('changed', ['10.0.0.2'], 'old'),
+               host_values('extra', ['10.0.0.3'])]
+
+    def setUp(self):
+        self.session = session.Session('127.0.0.1')
+        self.requests = []
+        self.desired = {
+            'same': {'name': 'same', 'ipv4addrs': ['10.0.0.1'],
+                     'comment': 'test'},
+            'changed': {'name': 'changed', 'comment': 'new'},
+            'new': {'name': 'new', 'ipv4addrs': ['10.0.0.4']}}
+
+    @httmock.all_requests
+    def wapi_mock(self, url, request):
+        body = json.loads(request.body) if request.body else None
+        self.requests.append((request.method, url.path, body))
+        if request.method == 'GET':
+            content = {'result': self.CURRENT}
+        else:
+            content = [op['object'] for op in body]
+        return {'content': json.dumps(content),
+                'headers': {'content-type': 'application/json'},
+                'status_code': 200}
+
+    def run_sync(self, **kwargs):
+        with httmock.HTTMock(self.wapi_mock):
+            return list(sync.sync(self.session, self.desired, **kwargs))
+
+    def test_minimal_changes_in_one_batch(self):
+        changes = self.run_sync()
+        self.assertEqual(changes, [
+            {'action': 'update', 'host': 'changed', 'changes': ['comment']},
+            {'action': 'create', 'host': 'new'}])
+        self.assertEqual(len(self.requests), 2)
+        method, path, operations = self.requests[1]
+        self.assertEqual(path, '/wapi/v1.2/request')
+        self.assertEqual(operations[0]['method'], 'PUT')
+        self.assertEqual(operations[0]['data'], {'comment': 'new'})
+        self.assertEqual(operations[1]['method'], 'POST')
+        self.assertEqual(operations[1]['data']['name'], 'new')
+        self.assertEqual(operations[1]['data']['ipv4addrs'],
+                         [{'ipv4addr': '10.0.0.4'}])
+
+    def test_zone_rejects_hosts_outside_of_it(self):
+        self.desired = {'a.bar.net': {'name': 'a.bar.net'},
+                        'b.baz.net': {'name': 'b.baz.net'},
+                        'c.foo.bar.net.': {'name': 'c.foo.bar.net.'}}
+        with self.assertRaises(ValueError) as context:
+            self.run_sync(zone='bar.net')
+        self.assertIn('b.baz.net', str(context.exception))
+        self.assertNotIn('a.bar.net', str(context.exception))
+        self.assertEqual(self.requests, [])
+
+    def test_prune(self):
+        changes = self.run_sync(prune=True)
+        self.assertIn({'action': 'delete', 'host': 'extra'}, changes)
+        self.assertEqual(self.requests[1][2][1],
+                         {'method': 'DELETE',
+                          'object': 'record:host/extra:extra/default'})
+
+    def test_dry_run(self):
+        changes = self.run_sync(prune=True, dry_run=True)
+        self.assertEqual(len(changes), 3)
+        self.assertEqual([method for method, _p, _b in self.requests],
+                         ['GET'])
+
+
+class SyncCommandTests(unittest.TestCase):
+
+    def run_main(self, data):
+        argv = ['infoblox-host', '127.0.0.1', 'sync', '-']
+        stderr = io.StringIO()
+        with mock.patch.object(sys, 'argv', argv), \
+                mock.patch('sys.stdin', io.StringIO(data)), \
+                mock.patch('sys.stderr', stderr), \
+                mock.patch('infoblox.cli.InfobloxHost') as api:
+            with self.assertRaises(SystemExit) as context:
+                cli.main()
+        self.assertFalse(api.called)
+        return context.exception.code, stderr.getvalue()
+
+    def test_invalid_json(self):
+        code, stderr = self.run_main(u'{"name": "a"}\n{"name": \n')
+        self.assertEqual(code, 1)
+        self.assertTrue(stderr.startswith('Line 2 is not valid JSON'))
+
+    def test_missing_name(self):
+        self.assertEqual(self.run_main(u'{"comment": "a"}\n'),
+                         (1, 'Line 1 is missing the host name\n'))
@@ -0,0 +1,178 @@
+"""
+Fake WAPI Server Tests
+
+"""
+import time
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import cache
+from infoblox import exceptions
+from infoblox import record
+from infoblox import testing
+
+
+class FakeWAPITestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.session = self.wapi.session()
+
+    def tearDown(self):
+        self.wapi.stop()
+
+
+class RecordTests(FakeWAPITestCase):
+
+    def test_create_fetch_update_delete(self):
+        host = record.Host(self.session)
+        host.name = 'foo.bar.net'
+        host.add_ipv4addr('10.0.0.1')
+        self.assertTrue(host.save())
+        self.assertTrue(host._ref.startswith('record:host/'))
+        self.assertEqual(host.ipv4addrs[0].host, 'foo.bar.net')
+
+        host = record.Host(self.session, name='foo.bar.net')
+        self.assertEqual(host.addresses(), ['10.0.0.1'])
+        host.comment = 'Updated'
+        host.add_ipv4addr('10.0.0.2')
+        host.save()
+
+        values = self.wapi.hosts()[0]
+        self.assertEqual(values['comment'], 'Updated')
+        self.assertEqual([a['ipv4addr'] for a in values['ipv4addrs']],
+                         ['10.0.0.1', '10.0.0.2'])
+        self.assertTrue(host.delete())
+        self.assertEqual(self.wapi.hosts(), [])
+
+    def test_rename_changes_reference(self):
+        ref = self.wapi.add_host('a.bar.net', ['10.0.0.1'])
+        host = record.Host(self.session, name='a.bar.net')
+        host.name = 'b.bar.net'
+        host.save()
+        self.assertEqual(host._ref, ref.replace('a.bar.net', 'b.bar.net'))
+        self.assertEqual(record.Host(self.session, host._ref).name,
+                         'b.bar.net')
+        self.assertRaises(exceptions.ProtocolError, record.Host,
+                          self.session, ref)
+
+    def test_search_by_address(self):
+        self.wapi.add_host('a.bar.net', ['10.0.0.1'])
+        self.wapi.add_host('b.bar.net', ['10.0.0.2'], ['fd00::2'])
+        self.assertEqual(record.Host(self.session, ipv4addr='10.0.0.2').name,
+                         'b.bar.net')
+        self.assertEqual(record.Host(self.session, ipv6addr='fd00::2').name,
+                         'b.bar.net')
+
+    def test_ipv4address(self):
+        ref = self.wapi.add_host('a.bar.net', ['10.0.0.1'])
+        address = record.IPv4Address(self.session, ip_address='10.0.0.1')
+        self.assertEqual(address.names, ['a.bar.net'])
+        self.assertEqual(address.objects, [ref])
+        self.assertIs(record.get_class(address._ref), record.IPv4Address)
+
+    def test_duplicate_name(self):
+        self.wapi.add_host('a.bar.net')
+        host = record.Host(self.session)
+        host.name = 'a.bar.net'
+        self.assertRaises(exceptions.ProtocolError, host.save)
+
+    def test_missing_reference(self):
+        host = record.Host(self.session)
+        host._ref = 'record:host/bWlzc2luZw:a.bar.net/default'
+        self.assertRaises(exceptions.ProtocolError, host.fetch)
+
+
+class PagingTests(FakeWAPITestCase):
+
+    def test_iterate(self):
+        for offset in range(25):
+            self.wapi.add_host('host%02i.bar.net' % offset)
+        names = [host.name for host in
+                 record.Host.iterate(self.session, page_size=10)]
+        self.assertEqual(names, ['host%02i.bar.net' % offset
+                                 for offset in range(25)])
+        self.assertEqual(self.wapi.requests['GET'], 3)
+
+    def test_iterate_regex_search(self):
+        self.wapi.add_host('a.bar.net')
+        self.wapi.add_host('b.baz.net')
+        names = [host.name for host in
+                 record.Host.iterate(self.session, **{'name~': 'bar'})]
+        self.assertEqual(names, ['a.bar.net'])
+
+
+class MultiRequestTests(FakeWAPITestCase):
+
+    def test_batch_saves(self):
+        hosts = []
+        with self.session.batch(10) as batch:
+            for offset in range(15):
+                host = record.Host(self.session)
+                host.name = 'host%02i.bar.net' % offset
+                batch.save(host)
+                hosts.append(host)
+        self.assertEqual(batch.errors, [])
+        self.assertTrue(all(host._ref for host in hosts))
+        self.assertEqual(len(self.wapi.hosts()), 15)
+        self.assertEqual(self.wapi.requests['POST'], 2)
+
+    def test_failed_request_is_rolled_back(self):
+        self.wapi.add_host('a.bar.net')
+        response = self.session.post('request', [
+            {'method': 'POST', 'object': 'record:host',
+             'data': {'name': 'b.bar.net'}},
+            {'method': 'POST', 'object': 'record:host',
+             'data': {'name': 'a.bar.net'}}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([h['name'] for h in self.wapi.hosts()],
+                         ['a.bar.net'])
+
+
+class CachingSessionTests(FakeWAPITestCase):
+
+    def test_write_invalidates_search(self):
+        session = self.wapi.session(cache.CachingSession)
+        self.wapi.add_host('a.bar.net')
+        host = record.Host(session, name='a.bar.net')
+        host.comment = 'Updated'
+        host.save()
+        self.assertEqual(record.Host(session, name='a.bar.net').comment,
+                         'Updated')
+
+
+class AuthenticationTests(FakeWAPITestCase):
+
+    def test_cookie_is_reused(self):
+        self.wapi.add_host('a.bar.net')
+        record.Host(self.session, name='a.bar.net')
+        self.assertTrue(self.session.authenticated)
+        self.session.auth = ('admin', 'invalid')
+        self.assertEqual(record.Host(self.session, name='a.bar.net').name,
+                         'a.bar.net')
+
+    def test_invalid_credentials(self):
+        session = self.wapi.session()
+        session.auth = ('admin', 'invalid')
+        self.assertEqual(session.get('record:host').status_code, 401)
+
+
+class FaultInjectionTests(FakeWAPITestCase):
+
+    def test_fail_next(self):
+        self.wapi.fail_next(status=503)
+        self.assertEqual(self.session.get('record:host').status_code, 503)
+        self.assertEqual(self.session.get('record:host').status_code, 200)
+
+    def test_error_rate(self):
+        self.wapi.error_rate = 1
+        self.assertEqual(self.session.get('record:host').status_code, 500)
+
+    def test_latency(self):
+        self.wapi.latency = 0.05
+        start = time.time()
+        self.session.get('record:host')
+        self.assertGreaterEqual(time.time() - start, 0.05)
@@ -0,0 +1,127 @@
+"""
+Tracing Tests
+
+"""
+import contextlib
+import sys
+
+import mock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from infoblox import record
+from infoblox import session
+from infoblox import testing
+from infoblox import tracing
+
+
+class Span(object):
+
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class Tracer(object):
+    """Records spans with the OpenTelemetry start_as_current_span API."""
+
+    def __init__(self):
+        self.spans = []
+        self.stack = []
+
+    @contextlib.contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = Span(name, attributes,
+                    self.stack[-1].name if self.stack else None)
+        self.spans.append(span)
+        self.stack.append(span)
+        try:
+            yield span
+        finally:
+            self.stack.pop()
+
+    def names(self):
+        return [(span.name, span.parent) for span in self.spans]
+
+
+class TracingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wapi = testing.FakeWAPI()
+        self.wapi.start()
+        self.ref = self.wapi.add_host('foo.bar.net', ['10.0.0.1'])
+        self.session = self.wapi.session()
+        self.tracer = Tracer()
+        tracing.configure(self.tracer)
+
+    def tearDown(self):
+        tracing.disable()
+        self.wapi.stop()
+
+    def test_fetch(self):
+        record.Host(self.session, name='foo.bar.net')
+        self.assertEqual(self.tracer.names(),
+                         [('Host.fetch', None),
+                          ('GET', 'Host.fetch'),
+                          ('Host.assign', 'Host.fetch'),
+                          ('HostIPv4.assign', 'Host.assign')])
+        fetch, get = self.tracer.spans[:2]
+        self.assertEqual(fetch.attributes, {'wapi.type': 'record:host',
+                                            'wapi.ref': self.ref})
+        self.assertEqual(get.attributes['http.response.status_code'], 200)
+        self.assertEqual(get.attributes['wapi.type'], 'record:host')
+
+    def test_save_and_delete(self):
+        host = record.Host(self.session)
+        host.name = 'new.bar.net'
+        host.save()
+        save = self.tracer.spans[0]
+        self.assertEqual(save.name, 'Host.save')
+        self.assertEqual(save.attributes['wapi.ref'], host._ref)
+        ref = host._ref
+        del self.tracer.spans[:]
+        host.delete()
+        self.assertEqual(self.tracer.names(),
+                         [('Host.delete', None), ('DELETE', 'Host.delete')])
+        self.assertEqual(self.tracer.spans[0].attributes['wapi.ref'], ref)
+
+    def test_disabled(self):
+        tracing.disable()
+        record.Host(self.session, name='foo.bar.net')
+        self.assertEqual(self.tracer.spans, [])
+
+    def test_noop_span(self):
+        tracing.disable()
+        with tracing.span('GET') as span:
+            span.set_attribute('key', 'value')
+
+
+class ConfigureTests(unittest.TestCase):
+
+    def tearDown(self):
+        tracing.disable()
+
+    def test_requires_opentelemetry(self):
+        with mock.patch('infoblox.tracing.trace', None):
+            with mock.patch.dict(sys.modules, {'opentelemetry': None}):
+                self.assertRaises(RuntimeError, tracing.configure)
+
+    def test_uses_global_tracer_provider(self):
+        trace = mock.Mock()
+        with mock.patch('infoblox.tracing.trace', trace):
+            tracing.configure()
+        trace.get_tracer.assert_called_once_with(tracing.TRACER_NAME)
+        self.assertIs(tracing.tracer, trace.get_tracer.return_value)
+
+    def test_session_is_not_traced_when_disabled(self):
+        obj = session.Session('localhost')
+        with mock.patch.object(obj.session, 'request'):
+            with mock.patch('infoblox.tracing.span') as span:
+                obj._send('GET', 'record:host', 'http://localhost/')
+                self.assertFalse(span.called)